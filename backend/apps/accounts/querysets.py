@@ -16,24 +16,30 @@ def get_projects_for_user(user: User) -> QuerySet[Project]:
     - PM: only client projects assigned via ProjectAssignment
     - CLIENT: only projects where client_org matches user's organization
     - Superuser without profile: all projects (legacy)
+
+    The queryset is annotated with Project.objects.with_financials() so
+    serializers can read consumed hours, cost and latest progress without
+    per-project queries.
     """
+    projects = Project.objects.with_financials()
+
     if user.is_superuser and not hasattr(user, "profile"):
-        return Project.objects.all()
+        return projects
 
     profile = user.profile
 
     if profile.role == "DIRECTOR":
-        return Project.objects.all()
+        return projects
 
     if profile.role == "ADMIN":
-        return Project.objects.filter(is_internal=True)
+        return projects.filter(is_internal=True)
 
     if profile.role == "PM":
         assigned_ids = profile.project_assignments.values_list("project_id", flat=True)
-        return Project.objects.filter(is_internal=False, id__in=assigned_ids)
+        return projects.filter(is_internal=False, id__in=assigned_ids)
 
     if profile.role == "CLIENT":
-        return Project.objects.filter(client_org=profile.organization)
+        return projects.filter(client_org=profile.organization)
 
     return Project.objects.none()
 
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
+from .dashboard_cache import CeoDashboardCache
 from .models import (
     Advance,
     BillingRole,
@@ -9,13 +10,32 @@ from .models import (
     HealthSnapshot,
     Phase,
     Project,
+    ProjectFinancialRollup,
     ProjectHealthAlert,
     ProjectRoleRate,
     SimpleChangeRequest,
     Sprint,
     SprintTask,
     TimeEntry,
+    UserBillingRole,
 )
+from .services import DailyFactService, FinancialRollupService
+
+
+class CeoDashboardInvalidationMixin:
+    """Las ediciones en el admin (incluidas las inlines) invalidan ceo_dashboard."""
+
+    def save_model(self, request, obj, form, change):  # type: ignore[no-untyped-def]
+        super().save_model(request, obj, form, change)
+        CeoDashboardCache.invalidate(f"admin {obj._meta.model_name}")
+
+    def delete_model(self, request, obj):  # type: ignore[no-untyped-def]
+        super().delete_model(request, obj)
+        CeoDashboardCache.invalidate(f"admin {obj._meta.model_name}")
+
+    def delete_queryset(self, request, queryset):  # type: ignore[no-untyped-def]
+        super().delete_queryset(request, queryset)
+        CeoDashboardCache.invalidate(f"admin {queryset.model._meta.model_name}")
 
 
 class PhaseInline(admin.TabularInline):
@@ -29,7 +49,7 @@ class ProjectRoleRateInline(admin.TabularInline):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(CeoDashboardInvalidationMixin, admin.ModelAdmin):
     list_display = [
         "code",
         "name",
@@ -65,6 +85,13 @@ class BillingRoleAdmin(admin.ModelAdmin):
     list_display = ["role_name", "default_hourly_rate"]
 
 
+@admin.register(UserBillingRole)
+class UserBillingRoleAdmin(admin.ModelAdmin):
+    list_display = ["user_email", "billing_role"]
+    list_filter = ["billing_role"]
+    search_fields = ["user_email"]
+
+
 @admin.register(TimeEntry)
 class TimeEntryAdmin(admin.ModelAdmin):
     list_display = [
@@ -79,6 +106,52 @@ class TimeEntryAdmin(admin.ModelAdmin):
     search_fields = ["user_name", "user_email", "description"]
     readonly_fields = ["clockify_id", "synced_at"]
 
+    # Las ediciones manuales recalculan rollups y hechos diarios de los proyectos afectados
+    def save_model(self, request, obj, form, change):  # type: ignore[no-untyped-def]
+        project_ids = {obj.project_id}
+        if change:
+            project_ids.update(
+                TimeEntry.objects.filter(pk=obj.pk).values_list("project_id", flat=True)
+            )
+        super().save_model(request, obj, form, change)
+        FinancialRollupService.rebuild(project_ids)
+        DailyFactService.rebuild(project_ids)
+
+    def delete_model(self, request, obj):  # type: ignore[no-untyped-def]
+        project_id = obj.project_id
+        super().delete_model(request, obj)
+        FinancialRollupService.rebuild([project_id])
+        DailyFactService.rebuild([project_id])
+
+    def delete_queryset(self, request, queryset):  # type: ignore[no-untyped-def]
+        project_ids = set(queryset.values_list("project_id", flat=True))
+        super().delete_queryset(request, queryset)
+        FinancialRollupService.rebuild(project_ids)
+        DailyFactService.rebuild(project_ids)
+
+
+@admin.register(ProjectFinancialRollup)
+class ProjectFinancialRollupAdmin(admin.ModelAdmin):
+    list_display = [
+        "project",
+        "consumed_hours",
+        "actual_cost",
+        "entry_count",
+        "last_entry_date",
+        "updated_at",
+    ]
+    readonly_fields = [
+        "project",
+        "consumed_hours",
+        "actual_cost",
+        "entry_count",
+        "first_entry_date",
+        "last_entry_date",
+        "phase_subtotals",
+        "role_subtotals",
+        "updated_at",
+    ]
+
 
 @admin.register(HealthSnapshot)
 class HealthSnapshotAdmin(admin.ModelAdmin):
@@ -143,7 +216,7 @@ class ChangeRequestInline(admin.TabularInline):
 
 
 @admin.register(Sprint)
-class SprintAdmin(admin.ModelAdmin):
+class SprintAdmin(CeoDashboardInvalidationMixin, admin.ModelAdmin):
     list_display = ["name", "project", "status", "start_date", "end_date", "sort_order"]
     list_filter = ["status", "project"]
     search_fields = ["name", "project__name"]
@@ -179,7 +252,7 @@ class ChangeRequestPhaseImpactInline(admin.TabularInline):
 
 
 @admin.register(ChangeRequest)
-class ChangeRequestAdmin(admin.ModelAdmin):
+class ChangeRequestAdmin(CeoDashboardInvalidationMixin, admin.ModelAdmin):
     list_display = ["description", "sprint", "status", "estimated_hours", "is_charged", "charged_amount", "created_at"]
     list_filter = ["status", "is_charged", "sprint"]
     search_fields = ["description", "detail"]
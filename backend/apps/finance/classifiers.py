@@ -4,8 +4,23 @@ Task-level classification for internal TimeEntry records.
 Instead of grouping by Project.internal_category (project-level),
 this classifies each TimeEntry by matching its description field
 against known task patterns (Jira keys, prefixes, keywords).
+
+The result is stored on TimeEntry at ingest (see classify_entry); bump
+CLASSIFIER_VERSION whenever a rule changes and run
+`manage.py reclassify_time_entries`.
+
+The description rules are the regexes below, listed in priority order in
+GOAL_RULES; a RuleEngine compiles them into a single scan per description.
 """
+import _sre
+import functools
 import re
+from collections.abc import Collection, Iterable
+from re import _casefix as sre_casefix
+from re import _constants as sre_constants
+from re import _parser as sre_parse
+
+CLASSIFIER_VERSION = 2
 
 # --------------- Exclusion rules ---------------
 
@@ -34,6 +49,7 @@ _DAILYS_RE = re.compile(
     r"\bAT-2\b|\bREU-DAILY\b|\bREU-WEEKLY\b|\bDA-175\b",
     re.IGNORECASE,
 )
+_DAILYS_KW_RE = re.compile(r"daily", re.IGNORECASE)
 
 _VENTAS_RE = re.compile(
     r"\bAT-66\b|\bMKT-|\bVA-\d+\b",
@@ -81,51 +97,217 @@ APPIX_GENERAL_PROJECTS = {"Appix General", "General Appix", "APPIX GENERAL"}
 SUSPICIOUS_TASKS_RE = re.compile(r"\bAT-156\b")  # Guías de Embarque → La Moderna
 
 
-def classify_time_entry(description: str, project_name: str) -> str | None:
-    """
-    Classify a single internal TimeEntry into a goal category.
+# --------------- Compiled engine ---------------
 
-    Returns category key (DAILYS, VENTAS, etc.) or None if excluded/unclassified.
+
+def _required_literals(items: Iterable[tuple]) -> list[str] | None:
     """
-    # Exclusions
-    if is_excluded(description, project_name):
-        return None
-    if is_hr_no_laboral(description):
+    ASCII literals such that every match of the parsed (sub)pattern contains
+    at least one of them, or None when no such set can be derived. Picks the
+    option whose shortest literal is longest.
+    """
+    best: list[str] | None = None
+    run: list[str] = []
+
+    def consider(options: list[str] | None) -> None:
+        nonlocal best
+        if options and (best is None or min(map(len, options)) > min(map(len, best))):
+            best = options
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and av < 128:
+            run.append(chr(av))
+            continue
+        if op is sre_constants.AT:
+            # Zero width (\b, ^, $): the literals around it stay contiguous
+            continue
+        consider(["".join(run)] if run else None)
+        run = []
+        if op is sre_constants.BRANCH:
+            branches = [_required_literals(branch) for branch in av[1]]
+            if all(branches):
+                consider([literal for branch in branches for literal in branch])
+        elif op is sre_constants.SUBPATTERN and not av[1] and not av[2]:
+            consider(_required_literals(av[3]))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            consider(_required_literals(av[2]))
+    consider(["".join(run)] if run else None)
+    return best
+
+
+@functools.cache
+def _ascii_fold_table() -> dict[int, int]:
+    """
+    Non-ASCII characters that re.IGNORECASE matches against an ASCII letter
+    (K Kelvin sign, İ, ı, ſ), mapped to that letter, taken from re's own
+    case tables.
+    """
+    table = {
+        codepoint: _sre.unicode_tolower(codepoint)
+        for codepoint in range(128, 0x10000)
+        if _sre.unicode_tolower(codepoint) < 128
+    }
+    for codepoint, equivalents in sre_casefix._EXTRA_CASES.items():
+        for equivalent in equivalents:
+            if codepoint < 128 <= equivalent:
+                table[equivalent] = codepoint
+            elif equivalent < 128 <= codepoint:
+                table[codepoint] = equivalent
+    return table
+
+
+class RuleEngine:
+    """
+    Single-pass, first-match-wins rule matcher.
+
+    Each rule is (name, pattern). From every pattern the engine derives its
+    anchors: ASCII literals such that every text the pattern matches
+    contains at least one of them once folded. One alternation over all
+    anchors finds the candidate rules in a single scan, and only those are
+    verified with their own pattern; a pattern without anchors
+    (unanchored_rules) is always verified. Results are memoized per text.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[tuple[str, re.Pattern]],
+        cache_size: int = 4096,
+    ) -> None:
+        self.rules = tuple(rules)
+
+        rules_by_anchor: dict[str, set[int]] = {}
+        unanchored: list[int] = []
+        for index, (_name, pattern) in enumerate(self.rules):
+            literals = _required_literals(sre_parse.parse(pattern.pattern, pattern.flags))
+            if not literals:
+                unanchored.append(index)
+                continue
+            for literal in literals:
+                rules_by_anchor.setdefault(literal.lower(), set()).add(index)
+        self._unanchored = frozenset(unanchored)
+        self.unanchored_rules = tuple(self.rules[index][0] for index in unanchored)
+
+        # The scanner reports one anchor per position (the longest); an anchor
+        # also implies every anchor contained in it
+        self._candidates_by_anchor = {
+            anchor: frozenset().union(
+                *(indexes for other, indexes in rules_by_anchor.items() if other in anchor)
+            )
+            for anchor in rules_by_anchor
+        }
+        alternation = "|".join(
+            re.escape(anchor) for anchor in sorted(rules_by_anchor, key=len, reverse=True)
+        )
+        # Zero-width lookahead: overlapping anchors are all found
+        self._scanner = re.compile(f"(?=({alternation}))") if rules_by_anchor else None
+        self._fold_table = _ascii_fold_table()
+
+        self.matches = functools.lru_cache(maxsize=cache_size)(self._matches)
+        self.first = functools.lru_cache(maxsize=cache_size)(self._first)
+
+    def _candidates(self, text: str) -> list[int]:
+        candidates = set(self._unanchored)
+        if self._scanner is not None:
+            # Folding maps every character a pattern can match against an
+            # anchor letter to that letter in lowercase
+            folded = text.translate(self._fold_table).lower()
+            for match in self._scanner.finditer(folded):
+                candidates |= self._candidates_by_anchor[match.group(1)]
+        return sorted(candidates)
+
+    def _matches(self, text: str) -> frozenset[str]:
+        """Names of every rule that matches the text."""
+        return frozenset(
+            self.rules[index][0]
+            for index in self._candidates(text)
+            if self.rules[index][1].search(text)
+        )
+
+    def _first(self, text: str) -> str | None:
+        """Name of the first rule, in declaration order, that matches the text."""
+        for index in self._candidates(text):
+            if self.rules[index][1].search(text):
+                return self.rules[index][0]
         return None
 
-    desc = description or ""
 
-    # 1. DAILYS
-    if _DAILYS_RE.search(desc) or "daily" in desc.lower():
-        return "DAILYS"
+GOAL_RULES = RuleEngine((
+    ("HR_NO_LABORAL", _HR_NO_LABORAL_RE),
+    ("SUSPICIOUS", SUSPICIOUS_TASKS_RE),
+    ("EXCLUDED", _PMO_TRACKING_RE),
+    ("DAILYS", _DAILYS_RE),
+    ("DAILYS", _DAILYS_KW_RE),
+    ("CAPACITACION", _CAPACITACION_RE),
+    ("CAPACITACION", _CAPACITACION_KW_RE),
+    ("VENTAS", _VENTAS_RE),
+    ("VENTAS", _VENTAS_KW_RE),
+    ("REUNIONES", _REUNIONES_RE),
+    ("REUNIONES", _REUNIONES_KW_RE),
+    ("INNOVACION", _INNOVACION_RE),
+    ("INNOVACION", _INNOVACION_KW_RE),
+))
+
+# Category priority: description rules and project membership of a
+# category are checked before the next category
+_CATEGORY_PRIORITY = (
+    ("DAILYS", frozenset()),
+    ("CAPACITACION", CAPACITACION_PROJECTS),
+    ("VENTAS", VENTAS_PROJECTS),
+    ("REUNIONES", frozenset()),
+    ("INNOVACION", INNOVACION_PROJECTS),
+    ("APPIX_GENERAL", APPIX_GENERAL_PROJECTS),
+)
+
+
+def classify_entry(description: str, project_name: str) -> tuple[str, bool, bool]:
+    """
+    Stored classification of a TimeEntry, as ceo_dashboard consumes it:
+    goal category plus the HR / suspicious flags, in one scan of the
+    description.
+
+    Returns:
+        (goal_category or "", is_hr_no_laboral, is_suspicious)
+    """
+    return classify_matches(GOAL_RULES.matches(description or ""), project_name)
+
+
+def classify_matches(matched: Collection[str], project_name: str) -> tuple[str, bool, bool]:
+    """classify_entry from the names of the GOAL_RULES that matched the description."""
+    hr_no_laboral = "HR_NO_LABORAL" in matched
+    suspicious = "SUSPICIOUS" in matched
+    if hr_no_laboral or "EXCLUDED" in matched or project_name in EXCLUDED_PROJECTS:
+        return "", hr_no_laboral, suspicious
+    for category, projects in _CATEGORY_PRIORITY:
+        if category in matched or project_name in projects:
+            return category, hr_no_laboral, suspicious
+    return "", hr_no_laboral, suspicious
+
 
-    # 2. CAPACITACION (keywords first — catches "training" under VENTAS project)
-    if project_name in CAPACITACION_PROJECTS:
-        return "CAPACITACION"
-    if _CAPACITACION_RE.search(desc) or _CAPACITACION_KW_RE.search(desc):
-        return "CAPACITACION"
+def classify_time_entry(description: str, project_name: str) -> str | None:
+    """
+    Classify a single internal TimeEntry into a goal category.
+
+    Returns category key (DAILYS, VENTAS, etc.) or None if excluded/unclassified.
+    """
+    return classify_entry(description, project_name)[0] or None
 
-    # 3. VENTAS
-    if project_name in VENTAS_PROJECTS:
-        return "VENTAS"
-    if _VENTAS_RE.search(desc) or _VENTAS_KW_RE.search(desc):
-        return "VENTAS"
 
-    # 4. REUNIONES
-    if _REUNIONES_RE.search(desc) or _REUNIONES_KW_RE.search(desc):
-        return "REUNIONES"
+# --------------- Jira keys ---------------
 
-    # 5. INNOVACION
-    if project_name in INNOVACION_PROJECTS:
-        return "INNOVACION"
-    if _INNOVACION_RE.search(desc) or _INNOVACION_KW_RE.search(desc):
-        return "INNOVACION"
+JIRA_KEY_RE = re.compile(r"\[([A-Z]+-\d+)\]")
+# Known internal Jira prefixes (legitimate internal boards)
+INTERNAL_JIRA_PREFIXES = frozenset({"AT", "AP", "DA", "VA", "DD", "HR"})
 
-    # 6. APPIX_GENERAL (catch-all for Appix General project)
-    if project_name in APPIX_GENERAL_PROJECTS:
-        return "APPIX_GENERAL"
 
-    # Unclassified internal → None (excluded from goals)
+@functools.lru_cache(maxsize=4096)
+def external_jira_key(description: str) -> str | None:
+    """
+    First bracketed Jira key of a description when it belongs to a non-internal
+    board (an internal entry that may be misclassified client work).
+    """
+    match = JIRA_KEY_RE.search(description)
+    if match and match.group(1).split("-")[0] not in INTERNAL_JIRA_PREFIXES:
+        return match.group(1)
     return None
 
 
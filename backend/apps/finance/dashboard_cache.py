@@ -0,0 +1,172 @@
+"""
+Cache del payload de ceo_dashboard en el cache de Django (Redis).
+
+La llave es (conjunto de proyectos visibles, date_from, date_to). La
+invalidacion es global: invalidate() guarda una nueva version y toda
+entrada con otra version deja de ser fresca. Se llama cuando el sync o
+los loaders escriben time entries (FinancialRollupService.apply_delta),
+al reconstruir rollups o hechos diarios (rebuild, tambien desde el
+admin), tras la evaluacion de salud y al cambiar facturas de fase,
+anticipos o change requests (API y admin).
+
+Con CEO_DASHBOARD_STALE_WHILE_REVALIDATE una entrada vieja se sirve de
+inmediato y el recalculo corre en Celery (refresh_ceo_dashboard).
+"""
+
+import hashlib
+import logging
+import time
+from collections.abc import Callable, Iterable
+from datetime import date
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ceo_dashboard"
+VERSION_KEY = f"{KEY_PREFIX}:version"
+STATS_KEY = f"{KEY_PREFIX}:stats:{{}}"
+STATS = (
+    "hits", "misses", "stale", "compute_count", "compute_ms_total", "compute_ms_last",
+)
+
+
+class CeoDashboardCache:
+    """Cache con invalidacion por version y metricas de hit rate / tiempo de calculo."""
+
+    @staticmethod
+    def key(
+        project_ids: Iterable[int], date_from: date | None, date_to: date | None
+    ) -> str:
+        raw = "|".join(
+            [",".join(map(str, sorted(project_ids))), str(date_from), str(date_to)]
+        )
+        return f"{KEY_PREFIX}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    @staticmethod
+    def invalidate(reason: str = "") -> None:
+        """
+        Marcar como viejas todas las entradas cacheadas. Dentro de una
+        transaccion espera al commit, para no cachear datos sin confirmar
+        bajo la version nueva.
+        """
+
+        def bump() -> None:
+            cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+            logger.info("CEO dashboard cache invalidated (%s)", reason or "manual")
+
+        transaction.on_commit(bump)
+
+    @staticmethod
+    def _incr(name: str, delta: int = 1) -> None:
+        key = STATS_KEY.format(name)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, delta, timeout=None)
+
+    @classmethod
+    def get_or_compute(
+        cls,
+        project_ids: list[int],
+        date_from: date | None,
+        date_to: date | None,
+        compute: Callable[[], dict[str, Any]],
+    ) -> tuple[dict[str, Any], str]:
+        """
+        Payload cacheado o recien calculado.
+
+        Returns:
+            (payload, estado) con estado HIT, MISS o STALE.
+        """
+        key = cls.key(project_ids, date_from, date_to)
+        version = cache.get(VERSION_KEY, 0)
+        entry = cache.get(key)
+
+        if (
+            entry is not None
+            and entry["version"] == version
+            and time.time() - entry["computed_at"] < settings.CEO_DASHBOARD_CACHE_TTL
+        ):
+            cls._incr("hits")
+            return entry["payload"], "HIT"
+
+        if entry is not None and settings.CEO_DASHBOARD_STALE_WHILE_REVALIDATE:
+            cls._incr("stale")
+            # Un solo recalculo en vuelo por llave
+            if cache.add(f"{key}:refreshing", 1, timeout=settings.CEO_DASHBOARD_CACHE_TTL):
+                from apps.integrations.tasks import refresh_ceo_dashboard
+
+                refresh_ceo_dashboard.delay(
+                    sorted(project_ids),
+                    date_from.isoformat() if date_from else None,
+                    date_to.isoformat() if date_to else None,
+                )
+            return entry["payload"], "STALE"
+
+        cls._incr("misses")
+        return cls._compute_and_store(key, version, compute), "MISS"
+
+    @classmethod
+    def _compute_and_store(
+        cls, key: str, version: int, compute: Callable[[], dict[str, Any]]
+    ) -> dict[str, Any]:
+        started = time.monotonic()
+        payload = compute()
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+
+        timeout = (
+            settings.CEO_DASHBOARD_STALE_TTL
+            if settings.CEO_DASHBOARD_STALE_WHILE_REVALIDATE
+            else settings.CEO_DASHBOARD_CACHE_TTL
+        )
+        # La version leida antes de calcular: si hubo una invalidacion en
+        # medio, la entrada ya nace vieja
+        cache.set(
+            key,
+            {"version": version, "computed_at": time.time(), "payload": payload},
+            timeout=timeout,
+        )
+        cache.delete(f"{key}:refreshing")
+        cls._incr("compute_count")
+        cls._incr("compute_ms_total", elapsed_ms)
+        cache.set(STATS_KEY.format("compute_ms_last"), elapsed_ms, timeout=None)
+        logger.info("CEO dashboard computed in %d ms", elapsed_ms)
+        return payload
+
+    @classmethod
+    def refresh(
+        cls, project_ids: list[int], date_from: date | None, date_to: date | None
+    ) -> dict[str, Any]:
+        """Recalcular y guardar una entrada (revalidacion en segundo plano)."""
+        from .models import Project
+        from .views import build_ceo_dashboard
+
+        projects = Project.objects.with_financials().filter(pk__in=project_ids)
+        return cls._compute_and_store(
+            cls.key(project_ids, date_from, date_to),
+            cache.get(VERSION_KEY, 0),
+            lambda: build_ceo_dashboard(projects, date_from, date_to),
+        )
+
+    @staticmethod
+    def stats() -> dict[str, Any]:
+        """Contadores acumulados para monitoreo."""
+        values = cache.get_many([STATS_KEY.format(name) for name in STATS])
+        counts = {name: values.get(STATS_KEY.format(name), 0) for name in STATS}
+        requests = counts["hits"] + counts["misses"] + counts["stale"]
+        return {
+            "requests": requests,
+            "hits": counts["hits"],
+            "misses": counts["misses"],
+            "stale": counts["stale"],
+            "hit_rate": round((counts["hits"] + counts["stale"]) / requests, 4)
+            if requests else None,
+            "compute_count": counts["compute_count"],
+            "avg_compute_ms": round(counts["compute_ms_total"] / counts["compute_count"], 1)
+            if counts["compute_count"] else None,
+            "last_compute_ms": counts["compute_ms_last"] or None,
+        }
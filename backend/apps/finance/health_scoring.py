@@ -0,0 +1,76 @@
+"""
+Scoring de salud vectorizado sobre arrays de NumPy.
+
+Aplica las mismas reglas y clamps que TripleAxisService.evaluate_health
+para miles de pares (consumo, progreso) a la vez: backtesting de umbrales
+sobre el historico de HealthSnapshot y simulaciones what-if.
+
+Las comparaciones se hacen en centesimas enteras (los porcentajes de
+HealthSnapshot tienen 2 decimales), asi que los limites coinciden
+exactamente con la comparacion Decimal de la version escalar. El score
+usa la misma aritmetica float + truncamiento que int().
+"""
+
+from decimal import Decimal
+
+import numpy as np
+
+from .services import DEFAULT_HEALTH_THRESHOLDS, HealthThresholds
+
+HEALTHY, WARNING, CRITICAL = 0, 1, 2
+STATUS_LABELS = ("HEALTHY", "WARNING", "CRITICAL")
+STATUS_CODES = {label: code for code, label in enumerate(STATUS_LABELS)}
+
+
+def to_hundredths(values) -> np.ndarray:  # type: ignore[no-untyped-def]
+    """Porcentajes (float, Decimal o array) a centesimas enteras int64."""
+    return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _threshold_hundredths(value: Decimal) -> int:
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def evaluate_health_vectorized(
+    consumption_pct,  # type: ignore[no-untyped-def]
+    progress_pct,
+    thresholds: HealthThresholds = DEFAULT_HEALTH_THRESHOLDS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Version vectorizada de TripleAxisService.evaluate_health.
+
+    Args:
+        consumption_pct: array (o escalar) de consumo en %, precision 0.01.
+        progress_pct: array (o escalar) de progreso en %, mismo shape.
+        thresholds: umbrales a aplicar.
+
+    Returns:
+        (status_codes, scores): arrays int8/int64 con codigos HEALTHY,
+        WARNING o CRITICAL (ver STATUS_LABELS) y el score 0-100.
+    """
+    consumption = to_hundredths(consumption_pct)
+    progress = to_hundredths(progress_pct)
+    deviation_cents = np.abs(consumption - progress)
+    deviation = deviation_cents / 100
+
+    critical = (consumption >= _threshold_hundredths(thresholds.critical_consumption)) & (
+        progress < _threshold_hundredths(thresholds.critical_progress)
+    )
+    warning = deviation_cents > _threshold_hundredths(thresholds.warning_deviation)
+    healthy = deviation_cents <= _threshold_hundredths(thresholds.healthy_deviation)
+
+    # Mismo orden de reglas que la version escalar; el default es la
+    # zona intermedia (WARNING con su propio score)
+    status = np.select(
+        [critical, warning, healthy], [CRITICAL, WARNING, HEALTHY], default=WARNING
+    ).astype(np.int8)
+    score = np.select(
+        [critical, warning, healthy],
+        [
+            np.maximum(0, np.trunc(100 - deviation * 2)),
+            np.maximum(15, np.trunc(100 - deviation)),
+            np.minimum(100, np.trunc(100 - deviation)),
+        ],
+        default=np.maximum(20, np.trunc(100 - deviation * 1.5)),
+    ).astype(np.int64)
+    return status, score
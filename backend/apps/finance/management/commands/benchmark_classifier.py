@@ -0,0 +1,140 @@
+"""
+Management command to benchmark the compiled goal classifier
+(classifiers.classify_entry) against a per-rule reference (every
+GOAL_RULES pattern searched on its own) on a real Clockify export.
+
+Every description of the Description CSV is classified under every
+project name of the Task CSV. Reports time per entry for the reference,
+the engine on a cold cache (one scan per description) and the engine
+with memoization, plus the number of mismatches.
+
+Usage:
+    python manage.py benchmark_classifier
+    python manage.py benchmark_classifier --desc-csv path/to/desc.csv --repeat 5
+"""
+
+import csv
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.classifiers import GOAL_RULES, classify_entry, classify_matches
+
+DEFAULT_DESC_CSV = "Enero_Febrero_Description.csv"
+DEFAULT_TASK_CSV = "Enero_febrero_Task.csv"
+
+
+def reference_classification(description: str, project_name: str) -> tuple[str, bool, bool]:
+    """classify_entry's result with every GOAL_RULES pattern searched on its own."""
+    desc = description or ""
+    matched = {name for name, pattern in GOAL_RULES.rules if pattern.search(desc)}
+    return classify_matches(matched, project_name)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the compiled goal classifier against the per-rule reference."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--desc-csv",
+            type=str,
+            default=None,
+            help=f"Path to the Description CSV. Defaults to RAW_DATA/{DEFAULT_DESC_CSV}.",
+        )
+        parser.add_argument(
+            "--task-csv",
+            type=str,
+            default=None,
+            help=f"Path to the Task CSV (project names). Defaults to RAW_DATA/{DEFAULT_TASK_CSV}.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Timing runs per variant; the best run is reported.",
+        )
+
+    def handle(self, *args, **options):
+        raw_dir = self._find_raw_dir()
+        desc_path = Path(options["desc_csv"] or raw_dir / DEFAULT_DESC_CSV)
+        task_path = Path(options["task_csv"] or raw_dir / DEFAULT_TASK_CSV)
+        for path in (desc_path, task_path):
+            if not path.exists():
+                raise CommandError(f"CSV not found: {path}")
+
+        descriptions = self._column(desc_path, "Description")
+        project_names = sorted(set(self._column(task_path, "Project")))
+        pairs = [(desc, project) for project in project_names for desc in descriptions]
+        self.stdout.write(
+            f"{len(descriptions)} descriptions ({len(set(descriptions))} distinct) "
+            f"x {len(project_names)} projects = {len(pairs)} classifications"
+        )
+
+        mismatches = [
+            (desc, project)
+            for desc, project in pairs
+            if classify_entry(desc, project) != reference_classification(desc, project)
+        ]
+
+        def engine_cold():
+            for desc, project in pairs:
+                GOAL_RULES.matches.cache_clear()
+                classify_entry(desc, project)
+
+        def engine_memoized():
+            GOAL_RULES.matches.cache_clear()
+            for desc, project in pairs:
+                classify_entry(desc, project)
+
+        def reference():
+            for desc, project in pairs:
+                reference_classification(desc, project)
+
+        results = [
+            (label, self._best_of(fn, options["repeat"]) / len(pairs) * 1e6)
+            for label, fn in (
+                ("reference (per rule)", reference),
+                ("engine, cold cache", engine_cold),
+                ("engine, memoized", engine_memoized),
+            )
+        ]
+        baseline = results[0][1]
+        for label, us_per_entry in results:
+            self.stdout.write(
+                f"  {label:<22} {us_per_entry:8.2f} us/entry  x{baseline / us_per_entry:.1f}"
+            )
+
+        if mismatches:
+            for desc, project in mismatches[:10]:
+                self.stdout.write(self.style.ERROR(f"  MISMATCH: {project} | {desc[:60]}"))
+            raise CommandError(f"{len(mismatches)} classifications differ from the reference.")
+        self.stdout.write(self.style.SUCCESS("  Engine matches the reference on every entry."))
+
+    @staticmethod
+    def _best_of(fn, repeat: int) -> float:
+        best = float("inf")
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    @staticmethod
+    def _column(path: Path, column: str) -> list[str]:
+        with open(path, encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            if column not in (reader.fieldnames or []):
+                raise CommandError(f"{path.name} has no '{column}' column")
+            return [row[column] for row in reader]
+
+    def _find_raw_dir(self) -> Path:
+        # Try common locations
+        candidates = [
+            Path(__file__).resolve().parents[5] / "DA-Rentabilidad" / "RAW_DATA",
+            Path.cwd() / "DA-Rentabilidad" / "RAW_DATA",
+        ]
+        for p in candidates:
+            if p.exists():
+                return p
+        return candidates[0]
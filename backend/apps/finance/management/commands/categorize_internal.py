@@ -8,11 +8,15 @@ Usage:
     python manage.py categorize_internal --dry-run
 """
 
+import re
+
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Q
 
+from apps.finance.classifiers import RuleEngine
 from apps.finance.models import Project, TimeEntry
+from apps.finance.services import FinancialRollupService, RollupDelta
 
 # ── Project name → internal category mapping ────────────────────
 CATEGORY_MAP = {
@@ -53,6 +57,12 @@ RECLASSIFY_RULES = [
     ("fabric", "DATA-LM"),
 ]
 
+# All patterns in one scan per description; the first rule in list order wins
+RECLASSIFY_ENGINE = RuleEngine(
+    (target_code, re.compile(re.escape(pattern), re.IGNORECASE))
+    for pattern, target_code in RECLASSIFY_RULES
+)
+
 
 class Command(BaseCommand):
     help = "Assign internal_category to internal projects and optionally reclassify misassigned entries."
@@ -124,6 +134,7 @@ class Command(BaseCommand):
 
         total_moved = 0
         total_hours = 0
+        rollup_delta = RollupDelta()
 
         if not dry_run:
             ctx = transaction.atomic()
@@ -131,35 +142,37 @@ class Command(BaseCommand):
 
         try:
             for entry in internal_entries:
-                desc_lower = entry.description.lower()
-
-                for pattern, target_code in RECLASSIFY_RULES:
-                    if pattern in desc_lower:
-                        target_project = client_projects.get(target_code)
-                        if not target_project:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f"  SKIP: Target project {target_code} not found "
-                                    f"(entry: {entry.user_name} - {entry.description[:60]})"
-                                )
-                            )
-                            break
-
-                        self.stdout.write(
-                            f"  MOVE: {entry.user_name} | {entry.duration_hours}h | "
-                            f"{entry.project.code} -> {target_code} | "
-                            f"{entry.description[:60]}"
+                target_code = RECLASSIFY_ENGINE.first(entry.description)
+                if target_code is None:
+                    continue
+
+                target_project = client_projects.get(target_code)
+                if not target_project:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"  SKIP: Target project {target_code} not found "
+                            f"(entry: {entry.user_name} - {entry.description[:60]})"
                         )
+                    )
+                    continue
+
+                self.stdout.write(
+                    f"  MOVE: {entry.user_name} | {entry.duration_hours}h | "
+                    f"{entry.project.code} -> {target_code} | "
+                    f"{entry.description[:60]}"
+                )
 
-                        if not dry_run:
-                            entry.project = target_project
-                            entry.save(update_fields=["project_id"])
+                if not dry_run:
+                    rollup_delta.remove_entry(entry)
+                    entry.project = target_project
+                    entry.save(update_fields=["project_id"])
+                    rollup_delta.add_entry(entry)
 
-                        total_moved += 1
-                        total_hours += float(entry.duration_hours)
-                        break  # Only match first rule
+                total_moved += 1
+                total_hours += float(entry.duration_hours)
 
             if not dry_run:
+                FinancialRollupService.apply_delta(rollup_delta)
                 ctx.__exit__(None, None, None)
         except Exception:
             if not dry_run:
@@ -4,7 +4,8 @@ Management command to load clean Clockify data from JSON into the database.
 Reads the output of process_raw_clockify and creates:
 - Project records (with is_internal flag)
 - TimeEntry records (with clockify_id for idempotency)
-- BillingRole if missing
+- BillingRole and UserBillingRole (email -> role) if missing
+- ProjectFinancialRollup updates (deltas of replaced entries)
 
 Usage:
     python manage.py load_clean_data
@@ -20,7 +21,13 @@ from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from apps.finance.models import BillingRole, Project, TimeEntry
+from apps.finance.models import BillingRole, Project, TimeEntry, UserBillingRole
+from apps.finance.services import (
+    FinancialRollupService,
+    RateCard,
+    RollupDelta,
+    TimeEntryUpsertService,
+)
 
 # ── User → role mapping ───────────────────────────────────────────
 USER_ROLES = {
@@ -95,19 +102,14 @@ class Command(BaseCommand):
     def _load_all(self, projects_data: dict) -> tuple[int, int]:
         total_projects = 0
         total_entries = 0
-        role_cache = {r.role_name: r for r in BillingRole.objects.all()}
+        # Mismo resolver de rol y tarifa que el sync de Clockify
+        rate_card = RateCard.load()
+        rollup_delta = RollupDelta()
 
         for proj_name, proj_data in projects_data.items():
             is_internal = proj_data.get("is_internal", False)
             code = self._generate_code(proj_name)
 
-            # Delete old entries from previous import (idempotent)
-            old_count = TimeEntry.objects.filter(
-                clockify_id__startswith=f"{CLOCKIFY_PREFIX}-{code.lower()}-"
-            ).delete()[0]
-            if old_count:
-                self.stdout.write(f"  Deleted {old_count} old entries for {code}")
-
             # Create or update project
             internal_category = proj_data.get("internal_category", "")
             project, created = Project.objects.update_or_create(
@@ -139,12 +141,17 @@ class Command(BaseCommand):
                 user_name = entry["user"]
                 user_info = USER_ROLES.get(user_name, {})
                 email = user_info.get("email", f"{user_name.lower().replace(' ', '.')}@appix.mx")
-                role_name = user_info.get("role", "General")
-
-                billing_role = role_cache.get(role_name)
+                billing_role = rate_card.role_for(email)
 
                 hours = Decimal(entry["hours"])
-                amount = Decimal(entry["amount"])
+                entry_date = date.fromisoformat(entry["date"])
+                amount = rate_card.cost(
+                    project.id,
+                    billing_role,
+                    hours,
+                    entry_date,
+                    amount=Decimal(entry["amount"]) if "amount" in entry else None,
+                )
 
                 entry_objs.append(TimeEntry(
                     clockify_id=f"{CLOCKIFY_PREFIX}-{code.lower()}-{i:04d}",
@@ -155,13 +162,29 @@ class Command(BaseCommand):
                     description=entry.get("description", ""),
                     duration_hours=hours,
                     cost=amount,
-                    date=date.fromisoformat(entry["date"]),
+                    date=entry_date,
                 ))
 
-            if entry_objs:
-                TimeEntry.objects.bulk_create(entry_objs)
-                total_entries += len(entry_objs)
-
+            # Upsert idempotente: solo escribe filas nuevas o con cambios y
+            # borra las de una importacion previa que ya no vienen
+            old_entries = TimeEntry.objects.filter(
+                clockify_id__startswith=f"{CLOCKIFY_PREFIX}-{code.lower()}-"
+            )
+            result = TimeEntryUpsertService.upsert(
+                entry_objs, rollup_delta, stale_scope=old_entries
+            )
+            if result["deleted"] or result["skipped"]:
+                self.stdout.write(
+                    f"  {code}: {result['skipped']} unchanged, "
+                    f"{result['deleted']} old entries deleted"
+                )
+            total_entries += len(entry_objs)
+
+        FinancialRollupService.apply_delta(rollup_delta)
+        if rate_card.drift:
+            self.stdout.write(self.style.WARNING(
+                f"  {rate_card.drift} entries with an amount different from the rate card"
+            ))
         return total_projects, total_entries
 
     # ── Billing Roles ──────────────────────────────────────────────
@@ -171,12 +194,22 @@ class Command(BaseCommand):
         for info in USER_ROLES.values():
             roles_needed.add(info["role"])
 
+        roles = {}
         for role_name in roles_needed:
-            BillingRole.objects.get_or_create(
+            roles[role_name], _ = BillingRole.objects.get_or_create(
                 role_name=role_name,
                 defaults={"default_hourly_rate": DEFAULT_RATE},
             )
 
+        # Solo agrega usuarios nuevos: no pisa asignaciones editadas en el admin
+        UserBillingRole.objects.bulk_create(
+            [
+                UserBillingRole(user_email=info["email"].lower(), billing_role=roles[info["role"]])
+                for info in USER_ROLES.values()
+            ],
+            ignore_conflicts=True,
+        )
+
     # ── Helpers ────────────────────────────────────────────────────
 
     def _generate_code(self, project_name: str) -> str:
@@ -35,6 +35,13 @@ from apps.finance.models import (
     Sprint,
     SprintTask,
     TimeEntry,
+    UserBillingRole,
+)
+from apps.finance.services import (
+    FinancialRollupService,
+    RateCard,
+    RollupDelta,
+    TimeEntryUpsertService,
 )
 
 # ---------------------------------------------------------------------------
@@ -275,6 +282,8 @@ class Command(BaseCommand):
             self._print_raw_summary_colorado(raw_colorado)
             return
 
+        self.rollup_delta = RollupDelta()
+
         with transaction.atomic():
             # 4. Billing roles
             roles = self._ensure_billing_roles()
@@ -283,14 +292,19 @@ class Command(BaseCommand):
             self._delete_old_capmx()
             self._delete_old_colorado()
 
-            # 6. Create all projects (including Colorado)
+            # 6. Create all projects (including Colorado) and their role rates
             projects = self._create_projects()
+            self._create_capmx_role_rates(projects["CAP-MX"], roles)
+            self._create_colorado_role_rates(projects["COLORADO"], roles)
+
+            # Roles y tarifas en memoria: mismo resolver que el sync de Clockify
+            self.rate_card = RateCard.load(p.id for p in projects.values())
 
             # 7. Full CAP-MX setup (uses raw merged data)
-            self._setup_capmx(projects["CAP-MX"], roles, raw_merged)
+            self._setup_capmx(projects["CAP-MX"], raw_merged)
 
             # 8. Full Colorado setup (uses raw merged + filtered data)
-            self._setup_colorado(projects["COLORADO"], roles, raw_colorado)
+            self._setup_colorado(projects["COLORADO"], raw_colorado)
 
             # 9. Other projects: basic time entries
             for proj_name, monthly_rows in monthly_data.items():
@@ -299,7 +313,15 @@ class Command(BaseCommand):
                     continue
                 code = proj_def["code"]
                 if code in projects:
-                    self._setup_basic_project(projects[code], roles, monthly_rows)
+                    self._setup_basic_project(projects[code], monthly_rows)
+
+            # 10. Rollups financieros por proyecto
+            FinancialRollupService.apply_delta(self.rollup_delta)
+
+        if self.rate_card.drift:
+            self.stdout.write(self.style.WARNING(
+                f"  {self.rate_card.drift} entries con monto distinto a la tarifa vigente"
+            ))
 
         self.stdout.write(self.style.SUCCESS("\nDatos reales cargados exitosamente."))
         self.stdout.write(
@@ -691,6 +713,18 @@ class Command(BaseCommand):
             roles[name] = role
             status = "Creado" if created else "Existe"
             self.stdout.write(f"  BillingRole '{name}': {status}")
+
+        # Solo agrega usuarios nuevos: no pisa asignaciones editadas en el admin
+        UserBillingRole.objects.bulk_create(
+            [
+                UserBillingRole(
+                    user_email=profile["email"].lower(),
+                    billing_role=roles[profile["role"]],
+                )
+                for profile in USER_PROFILES.values()
+            ],
+            ignore_conflicts=True,
+        )
         return roles
 
     # ------------------------------------------------------------------
@@ -746,12 +780,11 @@ class Command(BaseCommand):
     # CAP-MX Full Setup
     # ------------------------------------------------------------------
 
-    def _setup_capmx(self, project, roles, raw_merged):
+    def _setup_capmx(self, project, raw_merged):
         """Full setup for CAP-MX: phases, sprints, time entries, health."""
         phase_objs = self._create_capmx_phases(project)
-        self._create_capmx_role_rates(project, roles)
         sprint_objs = self._create_capmx_sprints(project)
-        self._create_capmx_time_entries(project, roles, phase_objs, sprint_objs, raw_merged)
+        self._create_capmx_time_entries(project, phase_objs, sprint_objs, raw_merged)
         self._create_capmx_health(project)
         self.stdout.write(self.style.SUCCESS("  CAP-MX: setup completo"))
 
@@ -997,7 +1030,7 @@ class Command(BaseCommand):
         )
         return sprint_objs
 
-    def _create_capmx_time_entries(self, project, roles, phase_objs, sprint_objs, raw_merged):
+    def _create_capmx_time_entries(self, project, phase_objs, sprint_objs, raw_merged):
         """Create time entries for CAP-MX from raw merged CSV data.
 
         Uses the daily records from Date-Task-Desc.csv merged with
@@ -1031,9 +1064,9 @@ class Command(BaseCommand):
             phase_name = SPRINT_PHASE_NAMES.get(sprint_num)
             phase = phase_objs.get(phase_name) if phase_name else None
 
-            role_name = profile["role"]
-            role = roles.get(role_name)
-            cost = row["amount"]  # Use actual Clockify amount (exact)
+            role = self.rate_card.role_for(profile["email"])
+            # Use actual Clockify amount (exact); drift vs the rate card is counted
+            cost = self.rate_card.cost(project.id, role, hours, row["date"], amount=row["amount"])
 
             entries.append(
                 TimeEntry(
@@ -1051,7 +1084,7 @@ class Command(BaseCommand):
                 )
             )
 
-        TimeEntry.objects.bulk_create(entries)
+        TimeEntryUpsertService.upsert(entries, self.rollup_delta)
         total_hours = sum(e.duration_hours for e in entries)
         total_cost = sum(e.cost for e in entries)
         users = set(e.user_name for e in entries)
@@ -1112,7 +1145,7 @@ class Command(BaseCommand):
     # Colorado Full Setup
     # ------------------------------------------------------------------
 
-    def _setup_colorado(self, project, roles, raw_merged):
+    def _setup_colorado(self, project, raw_merged):
         """Full setup for Colorado: phases, sprints, time entries, health."""
         phase_objs = self._create_colorado_phases(project)
 
@@ -1125,9 +1158,8 @@ class Command(BaseCommand):
         AnticipoCoverageService.recompute(project)
         self.stdout.write(f"    Anticipo: $11,880 (59.4%) — S1+S2 cubiertos")
 
-        self._create_colorado_role_rates(project, roles)
         sprint_objs = self._create_colorado_sprints(project)
-        self._create_colorado_time_entries(project, roles, phase_objs, sprint_objs, raw_merged)
+        self._create_colorado_time_entries(project, phase_objs, sprint_objs, raw_merged)
         self._create_colorado_health(project, raw_merged)
         self.stdout.write(self.style.SUCCESS("  COLORADO: setup completo"))
 
@@ -1485,7 +1517,7 @@ class Command(BaseCommand):
         )
         return sprint_objs
 
-    def _create_colorado_time_entries(self, project, roles, phase_objs, sprint_objs, raw_merged):
+    def _create_colorado_time_entries(self, project, phase_objs, sprint_objs, raw_merged):
         """Create time entries for Colorado from merged CSV data.
 
         Uses task map for known tasks, date-based fallback for "(Without task)".
@@ -1517,9 +1549,8 @@ class Command(BaseCommand):
             phase_name = COLORADO_SPRINT_PHASE_NAMES.get(sprint_num)
             phase = phase_objs.get(phase_name) if phase_name else None
 
-            role_name = profile["role"]
-            role = roles.get(role_name)
-            cost = row["amount"]
+            role = self.rate_card.role_for(profile["email"])
+            cost = self.rate_card.cost(project.id, role, hours, row["date"], amount=row["amount"])
 
             entries.append(
                 TimeEntry(
@@ -1537,7 +1568,7 @@ class Command(BaseCommand):
                 )
             )
 
-        TimeEntry.objects.bulk_create(entries)
+        TimeEntryUpsertService.upsert(entries, self.rollup_delta)
         total_hours = sum(e.duration_hours for e in entries)
         total_cost = sum(e.cost for e in entries)
         users = set(e.user_name for e in entries)
@@ -1603,13 +1634,8 @@ class Command(BaseCommand):
     # Basic project setup (non-CAP-MX)
     # ------------------------------------------------------------------
 
-    def _setup_basic_project(self, project, roles, monthly_rows):
+    def _setup_basic_project(self, project, monthly_rows):
         """Create time entries for non-CAP-MX projects from monthly data."""
-        # Clean existing CSV-imported entries
-        TimeEntry.objects.filter(
-            clockify_id__startswith=f"csv-{project.code.lower()}"
-        ).delete()
-
         entries = []
         counter = 0
 
@@ -1635,14 +1661,16 @@ class Command(BaseCommand):
                 if total_hours > 0 and amount > 0
                 else Decimal("0.00")
             )
-            role_name = profile["role"]
-            role = roles.get(role_name)
+            role = self.rate_card.role_for(profile["email"])
             user_slug = user_name.split()[0].lower()
             daily_entries = self._distribute_hours(total_hours, biz_days)
 
             for d, hours in daily_entries:
                 counter += 1
-                cost = (hours * rate).quantize(Decimal("0.01"))
+                # Monto mensual de Clockify repartido por dia
+                cost = self.rate_card.cost(
+                    project.id, role, hours, d, amount=(hours * rate).quantize(Decimal("0.01"))
+                )
                 entries.append(
                     TimeEntry(
                         clockify_id=f"csv-{project.code.lower()}-{user_slug}-{counter:04d}",
@@ -1658,12 +1686,21 @@ class Command(BaseCommand):
                     )
                 )
 
+        # Upsert contra la importacion previa: omite filas sin cambios y
+        # borra las que ya no vienen en el CSV
+        old_entries = TimeEntry.objects.filter(
+            clockify_id__startswith=f"csv-{project.code.lower()}"
+        )
+        result = TimeEntryUpsertService.upsert(
+            entries, self.rollup_delta, stale_scope=old_entries
+        )
+
         if entries:
-            TimeEntry.objects.bulk_create(entries)
             total_h = sum(e.duration_hours for e in entries)
             total_c = sum(e.cost for e in entries)
             self.stdout.write(
-                f"  {project.code}: {len(entries)} entries, "
+                f"  {project.code}: {len(entries)} entries "
+                f"({result['skipped']} sin cambios), "
                 f"{total_h:.2f}h, ${total_c:,.2f} MXN"
             )
         else:
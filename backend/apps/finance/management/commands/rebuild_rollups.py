@@ -0,0 +1,47 @@
+"""
+Management command to recompute ProjectFinancialRollup and DailyTimeFact
+from TimeEntry.
+
+The sync and CSV loaders keep both tables current with deltas; use this after
+manual data fixes or to seed the tables for existing projects.
+
+Usage:
+    python manage.py rebuild_rollups
+    python manage.py rebuild_rollups --project CAP-MX --project COLORADO
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.finance.models import Project
+from apps.finance.services import DailyFactService, FinancialRollupService
+
+
+class Command(BaseCommand):
+    help = "Recompute per-project financial rollups and daily facts from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project",
+            action="append",
+            default=[],
+            help="Project code to rebuild (repeatable). Defaults to all projects.",
+        )
+
+    def handle(self, *args, **options):
+        codes = options["project"]
+        project_ids = None
+        if codes:
+            project_ids = list(
+                Project.objects.filter(code__in=codes).values_list("id", flat=True)
+            )
+            if len(project_ids) != len(set(codes)):
+                raise CommandError(f"Unknown project code in: {', '.join(codes)}")
+
+        with transaction.atomic():
+            count = FinancialRollupService.rebuild(project_ids)
+            fact_count = DailyFactService.rebuild(project_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} rollups rebuilt, {fact_count} daily facts.")
+        )
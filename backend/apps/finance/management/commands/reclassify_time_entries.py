@@ -0,0 +1,59 @@
+"""
+Management command to re-apply the development-goal classification rules
+(apps.finance.classifiers) to stored TimeEntry rows.
+
+New and changed entries are classified at ingest; run this after bumping
+CLASSIFIER_VERSION, after renaming projects, or once after the migration
+that added the classification fields.
+
+Usage:
+    python manage.py reclassify_time_entries
+    python manage.py reclassify_time_entries --all --project CAP-MX
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.finance.classifiers import CLASSIFIER_VERSION
+from apps.finance.dashboard_cache import CeoDashboardCache
+from apps.finance.models import Project, TimeEntry
+from apps.finance.services import TimeEntryClassificationService
+
+
+class Command(BaseCommand):
+    help = "Re-classify time entries whose classification is missing or outdated."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-classify every entry, not only those from an older rules version.",
+        )
+        parser.add_argument(
+            "--project",
+            action="append",
+            default=[],
+            help="Project code to re-classify (repeatable). Defaults to all projects.",
+        )
+
+    def handle(self, *args, **options):
+        entries = TimeEntry.objects.all()
+        codes = options["project"]
+        if codes:
+            found = Project.objects.filter(code__in=codes).count()
+            if found != len(set(codes)):
+                raise CommandError(f"Unknown project code in: {', '.join(codes)}")
+            entries = entries.filter(project__code__in=codes)
+        if not options["all"]:
+            entries = TimeEntryClassificationService.stale(entries)
+
+        with transaction.atomic():
+            count = TimeEntryClassificationService.reclassify(entries)
+            if count:
+                CeoDashboardCache.invalidate("reclassification")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} entries classified with rules version {CLASSIFIER_VERSION}."
+            )
+        )
@@ -19,6 +19,7 @@ from apps.finance.models import (
     ProjectRoleRate,
     TimeEntry,
 )
+from apps.finance.services import DailyFactService, FinancialRollupService
 
 
 class Command(BaseCommand):
@@ -242,4 +243,8 @@ class Command(BaseCommand):
                 health_score=38,
             )
 
+        seeded_ids = [p1.id, p2.id]
+        FinancialRollupService.rebuild(seeded_ids)
+        DailyFactService.rebuild(seeded_ids)
+
         self.stdout.write(self.style.SUCCESS("\nDone. Design projects seeded."))
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_project_internal_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectFinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumed_hours', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=14)),
+                ('actual_cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('first_entry_date', models.DateField(blank=True, null=True)),
+                ('last_entry_date', models.DateField(blank=True, null=True)),
+                ('phase_subtotals', models.JSONField(blank=True, default=dict)),
+                ('role_subtotals', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='financial_rollup', to='finance.project')),
+            ],
+        ),
+    ]
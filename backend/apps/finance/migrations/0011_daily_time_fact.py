@@ -0,0 +1,67 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:23
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_daily_facts(apps, schema_editor):
+    TimeEntry = apps.get_model("finance", "TimeEntry")
+    DailyTimeFact = apps.get_model("finance", "DailyTimeFact")
+    rows = (
+        TimeEntry.objects.order_by()
+        .values("project", "user_email", "date")
+        .annotate(
+            name=models.Max("user_name"),
+            hours=models.Sum("duration_hours"),
+            cost=models.Sum("cost"),
+            count=models.Count("id"),
+            missing=models.Count("id", filter=models.Q(description__regex=r"^\s*$")),
+        )
+    )
+    DailyTimeFact.objects.bulk_create(
+        (
+            DailyTimeFact(
+                project_id=row["project"],
+                user_email=row["user_email"],
+                user_name=row["name"],
+                date=row["date"],
+                total_hours=row["hours"],
+                total_cost=row["cost"],
+                entry_count=row["count"],
+                missing_description_count=row["missing"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_project_financial_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTimeFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=254)),
+                ('user_name', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('total_hours', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=12)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('missing_description_count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_facts', to='finance.project')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='finance_dai_date_5aa7da_idx')],
+                'unique_together': {('project', 'user_email', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_facts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_daily_time_fact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeentry',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
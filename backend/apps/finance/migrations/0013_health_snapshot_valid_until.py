@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0012_time_entry_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthsnapshot',
+            name='valid_until',
+            field=models.DateTimeField(blank=True, help_text='Ultima evaluacion que confirmo estos valores (modo dedupe). Null en snapshots previos: vigente hasta el siguiente.', null=True),
+        ),
+    ]
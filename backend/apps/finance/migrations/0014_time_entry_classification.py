@@ -0,0 +1,64 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+from apps.finance.classifiers import CLASSIFIER_VERSION, classify_entry
+
+
+def backfill_classification(apps, schema_editor):
+    TimeEntry = apps.get_model("finance", "TimeEntry")
+    last_id = 0
+    while True:
+        rows = list(
+            TimeEntry.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "description", "project__name")[:2000]
+        )
+        if not rows:
+            return
+        batch = []
+        for entry_id, description, project_name in rows:
+            goal_category, hr_no_laboral, suspicious = classify_entry(description, project_name)
+            batch.append(TimeEntry(
+                id=entry_id,
+                goal_category=goal_category,
+                is_hr_no_laboral=hr_no_laboral,
+                is_suspicious=suspicious,
+                classification_version=CLASSIFIER_VERSION,
+            ))
+        TimeEntry.objects.bulk_update(
+            batch,
+            ["goal_category", "is_hr_no_laboral", "is_suspicious", "classification_version"],
+        )
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0013_health_snapshot_valid_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeentry',
+            name='classification_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='goal_category',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='is_hr_no_laboral',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='is_suspicious',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_classification, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.9 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0014_time_entry_classification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBillingRole',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=254, unique=True)),
+            ],
+            options={
+                'ordering': ['user_email'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='projectrolerate',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='projectrolerate',
+            name='effective_from',
+            field=models.DateField(blank=True, help_text='Vigente desde esta fecha (vacio = desde siempre)', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='projectrolerate',
+            constraint=models.UniqueConstraint(fields=('project', 'billing_role', 'effective_from'), name='unique_project_role_rate_from'),
+        ),
+        migrations.AddConstraint(
+            model_name='projectrolerate',
+            constraint=models.UniqueConstraint(condition=models.Q(('effective_from__isnull', True)), fields=('project', 'billing_role'), name='unique_project_role_rate_undated'),
+        ),
+        migrations.AddField(
+            model_name='userbillingrole',
+            name='billing_role',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_assignments', to='finance.billingrole'),
+        ),
+    ]
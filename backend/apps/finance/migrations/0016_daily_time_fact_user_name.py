@@ -0,0 +1,56 @@
+# Generated by Django 5.0.9 on 2026-10-18 14:45
+
+from django.db import migrations, models
+
+
+def clear_daily_facts(apps, schema_editor):
+    # Los hechos por email pueden repetir (project, user_name, date)
+    apps.get_model("finance", "DailyTimeFact").objects.all().delete()
+
+
+def backfill_daily_facts(apps, schema_editor):
+    TimeEntry = apps.get_model("finance", "TimeEntry")
+    DailyTimeFact = apps.get_model("finance", "DailyTimeFact")
+    rows = (
+        TimeEntry.objects.order_by()
+        .values("project", "user_name", "date")
+        .annotate(
+            email=models.Max("user_email"),
+            hours=models.Sum("duration_hours"),
+            cost=models.Sum("cost"),
+            count=models.Count("id"),
+            missing=models.Count("id", filter=models.Q(description__regex=r"^\s*$")),
+        )
+    )
+    DailyTimeFact.objects.bulk_create(
+        (
+            DailyTimeFact(
+                project_id=row["project"],
+                user_email=row["email"],
+                user_name=row["user_name"],
+                date=row["date"],
+                total_hours=row["hours"],
+                total_cost=row["cost"],
+                entry_count=row["count"],
+                missing_description_count=row["missing"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0015_rate_card'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_daily_facts, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='dailytimefact',
+            unique_together={('project', 'user_name', 'date')},
+        ),
+        migrations.RunPython(backfill_daily_facts, migrations.RunPython.noop),
+    ]
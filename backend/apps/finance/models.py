@@ -1,6 +1,84 @@
+import hashlib
 from decimal import Decimal
 
 from django.db import models
+from django.db.models.functions import Coalesce
+
+from .classifiers import CLASSIFIER_VERSION, classify_entry
+
+
+class ProjectQuerySet(models.QuerySet):
+    """QuerySet de proyectos con agregados financieros precalculados."""
+
+    def with_financials(self) -> "ProjectQuerySet":
+        """
+        Anota horas consumidas, costo real y el ultimo progreso/valor ganado
+        en una sola query. Los totales salen de ProjectFinancialRollup y solo
+        se agregan desde TimeEntry (subquery correlacionada) si no hay rollup.
+
+        Anotaciones: total_consumed_hours, total_actual_cost,
+        latest_progress_percent, latest_earned_value (None si no hay snapshot).
+        """
+        entries = TimeEntry.objects.filter(project=models.OuterRef("pk")).order_by()
+        latest_snapshot = HealthSnapshot.objects.filter(
+            project=models.OuterRef("pk")
+        ).order_by("-timestamp")
+
+        def entries_sum(field: str) -> models.Subquery:
+            return models.Subquery(
+                entries.values("project")
+                .annotate(total=models.Sum(field))
+                .values("total")
+            )
+
+        return self.annotate(
+            total_consumed_hours=Coalesce(
+                models.F("financial_rollup__consumed_hours"),
+                entries_sum("duration_hours"),
+                models.Value(Decimal("0")),
+                output_field=models.DecimalField(max_digits=14, decimal_places=4),
+            ),
+            total_actual_cost=Coalesce(
+                models.F("financial_rollup__actual_cost"),
+                entries_sum("cost"),
+                models.Value(Decimal("0.00")),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            ),
+            latest_progress_percent=models.Subquery(
+                latest_snapshot.values("progress_percent")[:1],
+                output_field=models.DecimalField(max_digits=5, decimal_places=2),
+            ),
+            latest_earned_value=models.Subquery(
+                latest_snapshot.values("earned_value")[:1],
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+
+    def with_phase_details(self) -> "ProjectQuerySet":
+        """
+        Precarga lo que pide el detalle de proyecto: fases con horas reales
+        anotadas (total_actual_hours) y sus impactos de CR activos
+        (active_cr_impacts), y las tarifas por rol con su BillingRole.
+        Numero de queries constante sin importar fases ni CRs.
+        """
+        active_impacts = ChangeRequestPhaseImpact.objects.filter(
+            change_request__status__in=ACTIVE_CR_STATUSES
+        ).select_related("change_request")
+        phases = Phase.objects.annotate(
+            total_actual_hours=Coalesce(
+                models.Sum("time_entries__duration_hours"),
+                models.Value(Decimal("0")),
+                output_field=models.DecimalField(max_digits=14, decimal_places=4),
+            )
+        ).prefetch_related(
+            models.Prefetch(
+                "cr_impacts", queryset=active_impacts, to_attr="active_cr_impacts"
+            )
+        )
+        return self.prefetch_related(
+            models.Prefetch("phases", queryset=phases),
+            "role_rates__billing_role",
+        )
 
 
 class Project(models.Model):
@@ -83,6 +161,8 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ["name"]
 
@@ -144,19 +224,68 @@ class BillingRole(models.Model):
 
 
 class ProjectRoleRate(models.Model):
-    """Tarifa especifica por proyecto (override de BillingRole)."""
+    """
+    Tarifa especifica por proyecto (override de BillingRole). Un cambio de
+    tarifa es una fila nueva con su effective_from; sin fecha rige desde
+    siempre.
+    """
 
     project = models.ForeignKey(
         Project, on_delete=models.CASCADE, related_name="role_rates"
     )
     billing_role = models.ForeignKey(BillingRole, on_delete=models.CASCADE)
     hourly_rate = models.DecimalField(max_digits=8, decimal_places=2)
+    effective_from = models.DateField(
+        null=True, blank=True, help_text="Vigente desde esta fecha (vacio = desde siempre)"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "billing_role", "effective_from"],
+                name="unique_project_role_rate_from",
+            ),
+            # NULL no choca en el indice anterior: una sola tarifa sin fecha
+            models.UniqueConstraint(
+                fields=["project", "billing_role"],
+                condition=models.Q(effective_from__isnull=True),
+                name="unique_project_role_rate_undated",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        since = f" desde {self.effective_from}" if self.effective_from else ""
+        return (
+            f"{self.project.code} / {self.billing_role.role_name}: "
+            f"${self.hourly_rate}/hr{since}"
+        )
+
+
+class UserBillingRole(models.Model):
+    """Rol facturable de cada usuario de Clockify, por email."""
+
+    user_email = models.EmailField(unique=True)
+    billing_role = models.ForeignKey(
+        BillingRole, on_delete=models.CASCADE, related_name="user_assignments"
+    )
 
     class Meta:
-        unique_together = ("project", "billing_role")
+        ordering = ["user_email"]
+
+    def save(self, *args, **kwargs) -> None:
+        self.user_email = self.user_email.lower()
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
-        return f"{self.project.code} / {self.billing_role.role_name}: ${self.hourly_rate}/hr"
+        return f"{self.user_email} -> {self.billing_role.role_name}"
+
+
+CLASSIFICATION_FIELDS = (
+    "goal_category",
+    "is_hr_no_laboral",
+    "is_suspicious",
+    "classification_version",
+)
 
 
 class TimeEntry(models.Model):
@@ -188,6 +317,15 @@ class TimeEntry(models.Model):
     duration_hours = models.DecimalField(max_digits=8, decimal_places=4)
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
     date = models.DateField()
+    # Hash de los campos de negocio; el sync y los loaders omiten filas sin cambios
+    content_hash = models.CharField(max_length=40, blank=True, default="")
+
+    # Clasificacion de metas de desarrollo (apps.finance.classifiers), calculada
+    # al guardar; classification_version 0 = nunca clasificada
+    goal_category = models.CharField(max_length=20, blank=True, default="")
+    is_hr_no_laboral = models.BooleanField(default=False)
+    is_suspicious = models.BooleanField(default=False)
+    classification_version = models.PositiveSmallIntegerField(default=0)
 
     synced_at = models.DateTimeField(auto_now_add=True)
 
@@ -200,6 +338,103 @@ class TimeEntry(models.Model):
     def __str__(self) -> str:
         return f"{self.project.code} | {self.user_name} | {self.date} | {self.duration_hours}h"
 
+    def compute_content_hash(self) -> str:
+        """SHA-1 de proyecto, fase, rol, usuario, descripcion, duracion, costo y fecha."""
+        parts = (
+            self.project_id,
+            self.phase_id,
+            self.billing_role_id,
+            self.user_email,
+            self.description,
+            Decimal(self.duration_hours).quantize(Decimal("0.0001")),
+            Decimal(self.cost).quantize(Decimal("0.01")),
+            self.date,
+        )
+        return hashlib.sha1("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+    def apply_classification(self, project_name: str | None = None) -> None:
+        """Calcular goal_category y flags con la version actual de las reglas."""
+        if project_name is None:
+            project_name = self.project.name
+        self.goal_category, self.is_hr_no_laboral, self.is_suspicious = classify_entry(
+            self.description, project_name
+        )
+        self.classification_version = CLASSIFIER_VERSION
+
+    def save(self, *args, **kwargs) -> None:
+        self.content_hash = self.compute_content_hash()
+        self.apply_classification()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {
+                *kwargs["update_fields"], "content_hash", *CLASSIFICATION_FIELDS
+            }
+        super().save(*args, **kwargs)
+
+
+class ProjectFinancialRollup(models.Model):
+    """
+    Totales financieros materializados por proyecto.
+
+    Se mantiene con deltas desde el sync de Clockify y los loaders CSV;
+    `manage.py rebuild_rollups` lo recalcula desde cero.
+    Los subtotales se guardan como {"<id>|none": {"hours": str, "cost": str}}.
+    """
+
+    project = models.OneToOneField(
+        Project, on_delete=models.CASCADE, related_name="financial_rollup"
+    )
+    consumed_hours = models.DecimalField(
+        max_digits=14, decimal_places=4, default=Decimal("0")
+    )
+    actual_cost = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+    entry_count = models.IntegerField(default=0)
+    first_entry_date = models.DateField(null=True, blank=True)
+    last_entry_date = models.DateField(null=True, blank=True)
+    phase_subtotals = models.JSONField(default=dict, blank=True)
+    role_subtotals = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.project.code} | {self.consumed_hours}h | ${self.actual_cost}"
+
+
+class DailyTimeFact(models.Model):
+    """
+    Agregado diario de TimeEntry por (proyecto, usuario, fecha).
+
+    Los dashboards filtran por rango de fechas sobre esta tabla en lugar de
+    TimeEntry. Se refresca junto con ProjectFinancialRollup. El usuario es
+    user_name, la misma dimension por la que agrupa ceo_dashboard.
+    """
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="daily_facts"
+    )
+    user_email = models.EmailField()
+    user_name = models.CharField(max_length=255)
+    date = models.DateField()
+
+    total_hours = models.DecimalField(
+        max_digits=12, decimal_places=4, default=Decimal("0")
+    )
+    total_cost = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00")
+    )
+    entry_count = models.IntegerField(default=0)
+    missing_description_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        unique_together = ("project", "user_name", "date")
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.project.code} | {self.user_name} | {self.date} | {self.total_hours}h"
+
 
 class HealthSnapshot(models.Model):
     """Instantanea historica del Triple Axis para analisis de tendencia."""
@@ -215,6 +450,14 @@ class HealthSnapshot(models.Model):
     earned_value = models.DecimalField(max_digits=12, decimal_places=2)
     health_status = models.CharField(max_length=10)
     health_score = models.IntegerField(default=50, help_text="0-100 para Gauge Chart")
+    valid_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=(
+            "Ultima evaluacion que confirmo estos valores (modo dedupe). "
+            "Null en snapshots previos: vigente hasta el siguiente."
+        ),
+    )
 
     class Meta:
         ordering = ["-timestamp"]
@@ -366,6 +609,16 @@ class SimpleChangeRequest(models.Model):
         return f"{self.sprint} / SimpleChange {self.task_jira_key} [{self.status}]"
 
 
+# Estados de CR cuyo impacto en horas cuenta para las fases
+ACTIVE_CR_STATUSES = (
+    "accepted",
+    "to_start",
+    "in_process",
+    "pending_acceptance",
+    "completed",
+)
+
+
 class ChangeRequest(models.Model):
     """Solicitud de cambio fuera de alcance."""
 
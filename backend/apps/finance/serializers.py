@@ -4,6 +4,7 @@ from django.db import models as db_models
 from rest_framework import serializers
 
 from .models import (
+    ACTIVE_CR_STATUSES,
     Advance,
     BillingRole,
     ChangeRequest,
@@ -18,6 +19,53 @@ from .models import (
     SprintTask,
     TimeEntry,
 )
+from .services import RateService
+
+
+def _consumed_hours(obj: Project) -> Decimal:
+    """Horas consumidas: anotacion de with_financials() o aggregate como fallback."""
+    if hasattr(obj, "total_consumed_hours"):
+        return obj.total_consumed_hours
+    return obj.time_entries.aggregate(
+        total=db_models.Sum("duration_hours")
+    )["total"] or Decimal("0")
+
+
+def _actual_cost(obj: Project) -> Decimal:
+    """Costo real: anotacion de with_financials() o aggregate como fallback."""
+    if hasattr(obj, "total_actual_cost"):
+        return obj.total_actual_cost
+    return obj.time_entries.aggregate(
+        total=db_models.Sum("cost")
+    )["total"] or Decimal("0.00")
+
+
+def _rates(serializer: serializers.Serializer) -> RateService:
+    """RateService del request (context["rates"]) o uno nuevo."""
+    return serializer.context.get("rates") or RateService()
+
+
+def _phases_data(serializer: serializers.Serializer, obj: Project) -> list:
+    """
+    Fases del proyecto con la tarifa calculada una sola vez y pasada por
+    contexto. Usa las fases precargadas por with_phase_details() si existen.
+    """
+    context = {
+        **serializer.context,
+        "project_hourly_rate": _rates(serializer).for_project(obj),
+    }
+    return PhaseSerializer(obj.phases.all(), many=True, context=context).data
+
+
+def _latest_snapshot_value(obj: Project, field: str) -> Decimal | None:
+    """Campo del ultimo HealthSnapshot (anotado como latest_<field> si existe)."""
+    annotation = f"latest_{field}"
+    if hasattr(obj, annotation):
+        value = getattr(obj, annotation)
+        # Algunos backends no conservan la escala del campo en subqueries
+        return value.quantize(Decimal("0.01")) if value is not None else None
+    latest = obj.health_snapshots.order_by("-timestamp").first()
+    return getattr(latest, field) if latest else None
 
 
 class PhaseSerializer(serializers.ModelSerializer):
@@ -35,7 +83,12 @@ class PhaseSerializer(serializers.ModelSerializer):
         ]
 
     def get_actual_hours(self, obj: Phase) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"]
+        if hasattr(obj, "total_actual_hours"):
+            total = obj.total_actual_hours
+        else:
+            total = obj.time_entries.aggregate(
+                total=db_models.Sum("duration_hours")
+            )["total"]
         return str((total or Decimal("0")).quantize(Decimal("0.01")))
 
     def get_invoice_file_url(self, obj: Phase) -> str | None:
@@ -50,14 +103,17 @@ class PhaseSerializer(serializers.ModelSerializer):
         return obj.invoice_file.url
 
     def get_cr_impact(self, obj: Phase) -> dict:
-        """Aggregate CR impact data for accepted/active CRs affecting this phase."""
-        impacts = ChangeRequestPhaseImpact.objects.filter(
-            phase=obj,
-            change_request__status__in=[
-                "accepted", "to_start", "in_process",
-                "pending_acceptance", "completed",
-            ],
-        ).select_related("change_request")
+        """
+        Aggregate CR impact data for accepted/active CRs affecting this phase.
+        Reads active_cr_impacts and project_hourly_rate (context) when the
+        project detail precomputed them.
+        """
+        if hasattr(obj, "active_cr_impacts"):
+            impacts = obj.active_cr_impacts
+        else:
+            impacts = ChangeRequestPhaseImpact.objects.filter(
+                phase=obj, change_request__status__in=ACTIVE_CR_STATUSES
+            ).select_related("change_request")
 
         items = []
         total_hours = Decimal("0")
@@ -65,14 +121,9 @@ class PhaseSerializer(serializers.ModelSerializer):
         total_absorbed = Decimal("0")
 
         # Derive hourly rate from project
-        project = obj.project
-        consumed = project.time_entries.aggregate(
-            total=db_models.Sum("duration_hours")
-        )["total"] or Decimal("0")
-        actual_cost = project.time_entries.aggregate(
-            total=db_models.Sum("cost")
-        )["total"] or Decimal("0")
-        hourly_rate = (actual_cost / consumed) if consumed > 0 else Decimal("500")
+        hourly_rate = self.context.get("project_hourly_rate")
+        if hourly_rate is None:
+            hourly_rate = _rates(self).for_project(obj.project_id)
 
         for imp in impacts:
             cr = imp.change_request
@@ -145,7 +196,7 @@ class ProjectRoleRateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProjectRoleRate
-        fields = ["id", "billing_role", "billing_role_name", "hourly_rate"]
+        fields = ["id", "billing_role", "billing_role_name", "hourly_rate", "effective_from"]
 
 
 class HealthSnapshotSerializer(serializers.ModelSerializer):
@@ -160,6 +211,7 @@ class HealthSnapshotSerializer(serializers.ModelSerializer):
             "earned_value",
             "health_status",
             "health_score",
+            "valid_until",
         ]
 
 
@@ -206,24 +258,22 @@ class ProjectListSerializer(serializers.ModelSerializer):
         ]
 
     def get_consumed_hours(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"]
-        return str((total or Decimal("0")).quantize(Decimal("0.01")))
+        return str(_consumed_hours(obj).quantize(Decimal("0.01")))
 
     def get_consumption_percent(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"] or Decimal("0")
+        total = _consumed_hours(obj)
         if obj.budget_hours == 0:
             return "0.00"
         return str((total / obj.budget_hours * 100).quantize(Decimal("0.01")))
 
     def get_progress_percent(self, obj: Project) -> str:
-        latest = obj.health_snapshots.order_by("-timestamp").first()
-        if latest:
-            return str(latest.progress_percent)
+        progress = _latest_snapshot_value(obj, "progress_percent")
+        if progress is not None:
+            return str(progress)
         return "0.00"
 
     def get_actual_cost(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("cost"))["total"]
-        return str((total or Decimal("0.00")).quantize(Decimal("0.01")))
+        return str(_actual_cost(obj).quantize(Decimal("0.01")))
 
 
 class ProjectDetailSerializer(serializers.ModelSerializer):
@@ -233,7 +283,7 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
     actual_cost = serializers.SerializerMethodField()
     earned_value = serializers.SerializerMethodField()
     anticipo_file_url = serializers.SerializerMethodField()
-    phases = PhaseSerializer(many=True, read_only=True)
+    phases = serializers.SerializerMethodField()
     role_rates = ProjectRoleRateSerializer(many=True, read_only=True)
     latest_snapshot = serializers.SerializerMethodField()
 
@@ -266,31 +316,32 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_consumed_hours(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"]
-        return str((total or Decimal("0")).quantize(Decimal("0.01")))
+        return str(_consumed_hours(obj).quantize(Decimal("0.01")))
 
     def get_consumption_percent(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"] or Decimal("0")
+        total = _consumed_hours(obj)
         if obj.budget_hours == 0:
             return "0.00"
         return str((total / obj.budget_hours * 100).quantize(Decimal("0.01")))
 
     def get_progress_percent(self, obj: Project) -> str:
-        latest = obj.health_snapshots.order_by("-timestamp").first()
-        if latest:
-            return str(latest.progress_percent)
+        progress = _latest_snapshot_value(obj, "progress_percent")
+        if progress is not None:
+            return str(progress)
         return "0.00"
 
     def get_actual_cost(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("cost"))["total"]
-        return str((total or Decimal("0.00")).quantize(Decimal("0.01")))
+        return str(_actual_cost(obj).quantize(Decimal("0.01")))
 
     def get_earned_value(self, obj: Project) -> str:
-        latest = obj.health_snapshots.order_by("-timestamp").first()
-        if latest:
-            return str(latest.earned_value)
+        earned_value = _latest_snapshot_value(obj, "earned_value")
+        if earned_value is not None:
+            return str(earned_value)
         return "0.00"
 
+    def get_phases(self, obj: Project) -> list:
+        return _phases_data(self, obj)
+
     def get_anticipo_file_url(self, obj: Project) -> str | None:
         if not obj.anticipo_file:
             return None
@@ -349,9 +400,9 @@ class ClientProjectListSerializer(serializers.ModelSerializer):
         ]
 
     def get_progress_percent(self, obj: Project) -> str:
-        latest = obj.health_snapshots.order_by("-timestamp").first()
-        if latest:
-            return str(latest.progress_percent)
+        progress = _latest_snapshot_value(obj, "progress_percent")
+        if progress is not None:
+            return str(progress)
         return "0.00"
 
 
@@ -359,7 +410,7 @@ class ClientProjectDetailSerializer(serializers.ModelSerializer):
     """Detailed project view for CLIENT users — phases but no costs."""
 
     progress_percent = serializers.SerializerMethodField()
-    phases = PhaseSerializer(many=True, read_only=True)
+    phases = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
@@ -375,11 +426,14 @@ class ClientProjectDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_progress_percent(self, obj: Project) -> str:
-        latest = obj.health_snapshots.order_by("-timestamp").first()
-        if latest:
-            return str(latest.progress_percent)
+        progress = _latest_snapshot_value(obj, "progress_percent")
+        if progress is not None:
+            return str(progress)
         return "0.00"
 
+    def get_phases(self, obj: Project) -> list:
+        return _phases_data(self, obj)
+
 
 class PhaseComparisonSerializer(serializers.Serializer):
     phase_name = serializers.CharField()
@@ -416,29 +470,27 @@ class PortfolioProjectSerializer(serializers.ModelSerializer):
         ]
 
     def get_consumed_hours(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"]
-        return str((total or Decimal("0")).quantize(Decimal("0.01")))
+        return str(_consumed_hours(obj).quantize(Decimal("0.01")))
 
     def get_consumption_percent(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"] or Decimal("0")
+        total = _consumed_hours(obj)
         if obj.budget_hours == 0:
             return "0.00"
         return str((total / obj.budget_hours * 100).quantize(Decimal("0.01")))
 
     def get_progress_percent(self, obj: Project) -> str:
-        latest = obj.health_snapshots.order_by("-timestamp").first()
-        if latest:
-            return str(latest.progress_percent)
+        progress = _latest_snapshot_value(obj, "progress_percent")
+        if progress is not None:
+            return str(progress)
         return "0.00"
 
     def get_deviation(self, obj: Project) -> str:
-        total = obj.time_entries.aggregate(total=db_models.Sum("duration_hours"))["total"] or Decimal("0")
+        total = _consumed_hours(obj)
         consumption = Decimal("0")
         if obj.budget_hours > 0:
             consumption = total / obj.budget_hours * 100
 
-        latest = obj.health_snapshots.order_by("-timestamp").first()
-        progress = latest.progress_percent if latest else Decimal("0")
+        progress = _latest_snapshot_value(obj, "progress_percent") or Decimal("0")
 
         return str(abs(consumption - progress).quantize(Decimal("0.01")))
 
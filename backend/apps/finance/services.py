@@ -1,8 +1,45 @@
+from bisect import bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
+from time import time_ns
+from typing import Any
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models as db_models
+from django.db import transaction
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek
+from django.utils import timezone
 
-from .models import HealthSnapshot, Project, ProjectHealthAlert
+from .classifiers import CLASSIFIER_VERSION
+from .dashboard_cache import CeoDashboardCache
+from .models import (
+    CLASSIFICATION_FIELDS,
+    BillingRole,
+    DailyTimeFact,
+    HealthSnapshot,
+    Project,
+    ProjectFinancialRollup,
+    ProjectHealthAlert,
+    ProjectRoleRate,
+    TimeEntry,
+    UserBillingRole,
+)
+
+
+@dataclass(frozen=True)
+class HealthThresholds:
+    """Umbrales (en %) de las reglas de TripleAxisService.evaluate_health."""
+
+    critical_consumption: Decimal = Decimal("80")
+    critical_progress: Decimal = Decimal("50")
+    warning_deviation: Decimal = Decimal("15")
+    healthy_deviation: Decimal = Decimal("10")
+
+
+DEFAULT_HEALTH_THRESHOLDS = HealthThresholds()
 
 
 class TripleAxisService:
@@ -16,20 +53,20 @@ class TripleAxisService:
     @staticmethod
     def calculate_consumption_percent(project: Project) -> Decimal:
         """Porcentaje de horas consumidas vs presupuestadas."""
-        total_consumed = project.time_entries.aggregate(
-            total=db_models.Sum("duration_hours")
-        )["total"] or Decimal("0")
-
         if project.budget_hours == 0:
             return Decimal("0")
 
+        total_consumed = TripleAxisService.calculate_consumed_hours(project)
         return (total_consumed / project.budget_hours * 100).quantize(
             TripleAxisService.QUANTIZE
         )
 
     @staticmethod
     def calculate_consumed_hours(project: Project) -> Decimal:
-        """Total de horas consumidas."""
+        """Total de horas consumidas (del rollup si existe)."""
+        rollup = FinancialRollupService.get(project)
+        if rollup is not None:
+            return rollup.consumed_hours
         return (
             project.time_entries.aggregate(total=db_models.Sum("duration_hours"))[
                 "total"
@@ -39,7 +76,10 @@ class TripleAxisService:
 
     @staticmethod
     def calculate_actual_cost(project: Project) -> Decimal:
-        """Costo real total del proyecto."""
+        """Costo real total del proyecto (del rollup si existe)."""
+        rollup = FinancialRollupService.get(project)
+        if rollup is not None:
+            return rollup.actual_cost
         return (
             project.time_entries.aggregate(total=db_models.Sum("cost"))["total"]
             or Decimal("0.00")
@@ -56,7 +96,9 @@ class TripleAxisService:
 
     @staticmethod
     def evaluate_health(
-        consumption_pct: Decimal, progress_pct: Decimal
+        consumption_pct: Decimal,
+        progress_pct: Decimal,
+        thresholds: HealthThresholds = DEFAULT_HEALTH_THRESHOLDS,
     ) -> tuple[str, int]:
         """
         Evalua el estado de salud del proyecto.
@@ -65,22 +107,28 @@ class TripleAxisService:
             (status, score) donde status es CRITICAL/WARNING/HEALTHY
             y score es un entero 0-100 para el gauge chart.
 
-        Reglas:
+        Reglas (umbrales por defecto):
             CRITICAL: Consumo >= 80% AND Progreso < 50%
             WARNING:  Desviacion entre Consumo% y Progreso% > 15%
             HEALTHY:  Desviacion <= 10%
+
+        La version vectorizada para backtesting vive en
+        apps.finance.health_scoring y debe mantenerse en paridad.
         """
         deviation = abs(consumption_pct - progress_pct)
 
-        if consumption_pct >= Decimal("80") and progress_pct < Decimal("50"):
+        if (
+            consumption_pct >= thresholds.critical_consumption
+            and progress_pct < thresholds.critical_progress
+        ):
             score = max(0, int(100 - float(deviation) * 2))
             return ("CRITICAL", score)
 
-        if deviation > Decimal("15"):
+        if deviation > thresholds.warning_deviation:
             score = max(15, int(100 - float(deviation)))
             return ("WARNING", score)
 
-        if deviation <= Decimal("10"):
+        if deviation <= thresholds.healthy_deviation:
             score = min(100, int(100 - float(deviation)))
             return ("HEALTHY", score)
 
@@ -88,9 +136,68 @@ class TripleAxisService:
         score = max(20, int(100 - float(deviation) * 1.5))
         return ("WARNING", score)
 
+    @staticmethod
+    def _build_alert(
+        project: Project,
+        old_status: str,
+        status: str,
+        consumption_pct: Decimal,
+        progress_pct: Decimal,
+    ) -> ProjectHealthAlert | None:
+        """Alerta (sin guardar) si el status cambio a CRITICAL, o de HEALTHY a WARNING."""
+        if status == "CRITICAL" and old_status != "CRITICAL":
+            detail = "Desviacion critica detectada."
+        elif status == "WARNING" and old_status == "HEALTHY":
+            detail = "Desviacion significativa detectada."
+        else:
+            return None
+        return ProjectHealthAlert(
+            project=project,
+            alert_type=status,
+            message=(
+                f"Proyecto {project.name}: Consumo {consumption_pct}%, "
+                f"Progreso {progress_pct}%. {detail}"
+            ),
+        )
+
+    @staticmethod
+    def _is_unchanged(
+        previous: HealthSnapshot | None,
+        project: Project,
+        consumption_pct: Decimal,
+        progress_pct: Decimal,
+        actual_cost: Decimal,
+        status: str,
+        epsilon: Decimal,
+    ) -> bool:
+        """
+        True si la evaluacion repite el snapshot anterior: mismo status (en el
+        snapshot y en el proyecto), consumo/progreso dentro de +-epsilon puntos
+        y costo real dentro de +-epsilon % del anterior (el costo puede cambiar
+        sin que cambien las horas, p. ej. al corregir una tarifa).
+        """
+        return (
+            previous is not None
+            and previous.health_status == status == project.current_health_status
+            and abs(previous.consumption_percent - consumption_pct) <= epsilon
+            and abs(previous.progress_percent - progress_pct) <= epsilon
+            and abs(previous.budget_consumed - actual_cost)
+            <= abs(previous.budget_consumed) * epsilon / 100
+        )
+
+    @staticmethod
+    def _dedupe_epsilon(epsilon: Decimal | None) -> Decimal:
+        if epsilon is None:
+            return Decimal(str(settings.HEALTH_SNAPSHOT_DEDUPE_EPSILON))
+        return epsilon
+
     @classmethod
     def run_evaluation(
-        cls, project: Project, jira_progress: Decimal
+        cls,
+        project: Project,
+        jira_progress: Decimal,
+        dedupe: bool = False,
+        epsilon: Decimal | None = None,
     ) -> HealthSnapshot:
         """
         Ejecuta evaluacion completa y genera un HealthSnapshot.
@@ -99,12 +206,27 @@ class TripleAxisService:
         2. Crea snapshot historico
         3. Actualiza estado del proyecto
         4. Genera alerta si cambio a CRITICAL o WARNING
+
+        Con dedupe=True, si el status no cambio y consumo/progreso se movieron
+        a lo mas `epsilon` puntos (HEALTH_SNAPSHOT_DEDUPE_EPSILON por defecto)
+        y el costo real a lo mas `epsilon` %, no se crea snapshot: se extiende
+        valid_until del anterior y se devuelve.
         """
         consumption_pct = cls.calculate_consumption_percent(project)
-        actual_cost = cls.calculate_actual_cost(project)
-        earned_value = cls.calculate_earned_value(project, jira_progress)
         status, score = cls.evaluate_health(consumption_pct, jira_progress)
+        actual_cost = cls.calculate_actual_cost(project)
+
+        if dedupe:
+            previous = project.health_snapshots.order_by("-timestamp").first()
+            if cls._is_unchanged(
+                previous, project, consumption_pct, jira_progress, actual_cost,
+                status, cls._dedupe_epsilon(epsilon),
+            ):
+                previous.valid_until = timezone.now()
+                previous.save(update_fields=["valid_until"])
+                return previous
 
+        earned_value = cls.calculate_earned_value(project, jira_progress)
         snapshot = HealthSnapshot.objects.create(
             project=project,
             consumption_percent=consumption_pct,
@@ -113,34 +235,1006 @@ class TripleAxisService:
             earned_value=earned_value,
             health_status=status,
             health_score=score,
+            valid_until=timezone.now(),
         )
 
         old_status = project.current_health_status
         project.current_health_status = status
         project.save(update_fields=["current_health_status", "updated_at"])
 
-        # Generar alerta si cambio a CRITICAL
-        if status == "CRITICAL" and old_status != "CRITICAL":
-            ProjectHealthAlert.objects.create(
-                project=project,
-                alert_type="CRITICAL",
-                message=(
-                    f"Proyecto {project.name}: Consumo {consumption_pct}%, "
-                    f"Progreso {jira_progress}%. Desviacion critica detectada."
+        alert = cls._build_alert(
+            project, old_status, status, consumption_pct, jira_progress
+        )
+        if alert is not None:
+            alert.save()
+
+        return snapshot
+
+    @staticmethod
+    def _portfolio_totals(project_ids: list[int]) -> dict[int, tuple[Decimal, Decimal]]:
+        """
+        (horas consumidas, costo real) por proyecto en una sola query:
+        del rollup si existe, si no agregando sus time entries.
+        """
+        entry_totals = (
+            TimeEntry.objects.filter(project=db_models.OuterRef("pk"))
+            .order_by()
+            .values("project")
+        )
+        decimal_field = db_models.DecimalField(max_digits=14, decimal_places=4)
+        rows = (
+            Project.objects.filter(pk__in=project_ids)
+            .order_by()
+            .annotate(
+                consumed=Coalesce(
+                    "financial_rollup__consumed_hours",
+                    db_models.Subquery(
+                        entry_totals.annotate(total=db_models.Sum("duration_hours"))
+                        .values("total")
+                    ),
+                    db_models.Value(Decimal("0")),
+                    output_field=decimal_field,
+                ),
+                cost=Coalesce(
+                    "financial_rollup__actual_cost",
+                    db_models.Subquery(
+                        entry_totals.annotate(total=db_models.Sum("cost")).values("total")
+                    ),
+                    db_models.Value(Decimal("0")),
+                    output_field=decimal_field,
                 ),
             )
-        # Generar alerta si cambio a WARNING desde HEALTHY
-        elif status == "WARNING" and old_status == "HEALTHY":
-            ProjectHealthAlert.objects.create(
-                project=project,
-                alert_type="WARNING",
-                message=(
-                    f"Proyecto {project.name}: Consumo {consumption_pct}%, "
-                    f"Progreso {jira_progress}%. Desviacion significativa detectada."
+            .values_list("pk", "consumed", "cost")
+        )
+        return {pk: (Decimal(consumed), Decimal(cost)) for pk, consumed, cost in rows}
+
+    @staticmethod
+    def _latest_snapshots(project_ids: list[int]) -> dict[int, HealthSnapshot]:
+        """Ultimo HealthSnapshot de cada proyecto, en una sola query."""
+        latest_ids = Project.objects.filter(pk__in=project_ids).annotate(
+            latest_id=db_models.Subquery(
+                HealthSnapshot.objects.filter(project=db_models.OuterRef("pk"))
+                .order_by("-timestamp")
+                .values("pk")[:1]
+            )
+        ).values("latest_id")
+        return {
+            s.project_id: s for s in HealthSnapshot.objects.filter(pk__in=latest_ids)
+        }
+
+    @classmethod
+    def evaluate_portfolio(
+        cls,
+        projects: Iterable[Project],
+        progress_map: dict[int, Decimal],
+        dedupe: bool = False,
+        epsilon: Decimal | None = None,
+    ) -> list[HealthSnapshot]:
+        """
+        Equivalente a run_evaluation para varios proyectos con un numero
+        constante de queries: un agregado agrupado para consumo y costo,
+        evaluate_health en memoria y escrituras en bulk.
+
+        Args:
+            projects: proyectos a evaluar; se omiten los que no estan en progress_map.
+            progress_map: {project_id: progreso Jira en %}.
+            dedupe, epsilon: como en run_evaluation; los snapshots extendidos
+                tambien se devuelven.
+        """
+        projects = [p for p in projects if p.id in progress_map]
+        if not projects:
+            return []
+
+        totals = cls._portfolio_totals([p.id for p in projects])
+        previous_by_project = (
+            cls._latest_snapshots([p.id for p in projects]) if dedupe else {}
+        )
+        epsilon = cls._dedupe_epsilon(epsilon)
+        now = timezone.now()
+        snapshots: list[HealthSnapshot] = []
+        extended: list[HealthSnapshot] = []
+        alerts: list[ProjectHealthAlert] = []
+
+        for project in projects:
+            progress = progress_map[project.id]
+            consumed_hours, actual_cost = totals[project.id]
+            consumption_pct = (
+                (consumed_hours / project.budget_hours * 100).quantize(cls.QUANTIZE)
+                if project.budget_hours
+                else Decimal("0")
+            )
+            status, score = cls.evaluate_health(consumption_pct, progress)
+            previous = previous_by_project.get(project.id)
+            if cls._is_unchanged(
+                previous, project, consumption_pct, progress, actual_cost, status, epsilon
+            ):
+                previous.valid_until = now
+                extended.append(previous)
+                continue
+
+            snapshots.append(
+                HealthSnapshot(
+                    project=project,
+                    consumption_percent=consumption_pct,
+                    progress_percent=progress,
+                    budget_consumed=actual_cost,
+                    earned_value=cls.calculate_earned_value(project, progress),
+                    health_status=status,
+                    health_score=score,
+                    valid_until=now,
+                )
+            )
+            alert = cls._build_alert(
+                project, project.current_health_status, status, consumption_pct, progress
+            )
+            if alert is not None:
+                alerts.append(alert)
+            project.current_health_status = status
+            project.updated_at = now
+
+        changed = [s.project for s in snapshots]
+        with transaction.atomic():
+            HealthSnapshot.objects.bulk_create(snapshots)
+            HealthSnapshot.objects.bulk_update(extended, ["valid_until"])
+            ProjectHealthAlert.objects.bulk_create(alerts)
+            Project.objects.bulk_update(
+                changed, ["current_health_status", "updated_at"]
+            )
+        return snapshots + extended
+
+
+class BurndownService:
+    """
+    Serie temporal del Financial Burndown Chart.
+
+    Obtiene los costos diarios con un solo GROUP BY date y todos los
+    snapshots con una sola query ordenada; las series acumuladas de costo
+    y valor ganado se construyen en memoria con un unico merge.
+    """
+
+    QUANTIZE = Decimal("0.01")
+
+    @classmethod
+    def build_series(
+        cls, project: Project, end_date: date | None = None
+    ) -> list[dict]:
+        """
+        Un punto por dia calendario desde la primera TimeEntry hasta end_date
+        (hoy por defecto), con el formato de BurndownPointSerializer.
+        """
+        daily_costs = list(
+            project.time_entries.values("date")
+            .annotate(total=db_models.Sum("cost"))
+            .order_by("date")
+        )
+        if not daily_costs:
+            return []
+
+        start_date = daily_costs[0]["date"]
+        end_date = end_date or timezone.now().date()
+        total_days = (end_date - start_date).days or 1
+        daily_budget = project.client_invoice_amount / total_days
+
+        snapshots = list(
+            project.health_snapshots.order_by("timestamp").values_list(
+                "timestamp", "earned_value"
+            )
+        )
+
+        points = []
+        cost_idx = 0
+        snap_idx = 0
+        cumulative_cost = Decimal("0.00")
+        earned_value = Decimal("0.00")
+        current_date = start_date
+
+        while current_date <= end_date:
+            if (
+                cost_idx < len(daily_costs)
+                and daily_costs[cost_idx]["date"] == current_date
+            ):
+                cumulative_cost += daily_costs[cost_idx]["total"] or Decimal("0.00")
+                cost_idx += 1
+
+            # Ultimo snapshot cuyo dia local es <= current_date
+            while (
+                snap_idx < len(snapshots)
+                and timezone.localtime(snapshots[snap_idx][0]).date() <= current_date
+            ):
+                earned_value = snapshots[snap_idx][1]
+                snap_idx += 1
+
+            days_elapsed = (current_date - start_date).days + 1
+            points.append(
+                {
+                    "date": current_date,
+                    "budget_line": (daily_budget * days_elapsed).quantize(cls.QUANTIZE),
+                    "actual_cost_cumulative": cumulative_cost.quantize(cls.QUANTIZE),
+                    "earned_value_cumulative": earned_value,
+                }
+            )
+            current_date += timedelta(days=1)
+
+        return points
+
+
+class HealthSnapshotRetentionService:
+    """
+    Niveles de retencion de HealthSnapshot:
+
+    - hourly: todos los snapshots de los ultimos HEALTH_SNAPSHOT_HOURLY_DAYS dias
+    - daily:  el ultimo de cada dia local hasta HEALTH_SNAPSHOT_DAILY_DAYS
+    - weekly: el ultimo de cada semana (lunes a domingo) despues de eso
+
+    compact() aplica la politica borrando lo que sobra; downsample() sirve
+    las mismas resoluciones al vuelo para health_history.
+    """
+
+    RESOLUTIONS = ("hourly", "daily", "weekly")
+    _BUCKETS = {"daily": TruncDay, "weekly": TruncWeek}
+
+    @classmethod
+    def _not_last_in_bucket(
+        cls, snapshots: db_models.QuerySet, resolution: str
+    ) -> db_models.QuerySet:
+        """Snapshots del queryset que no son el ultimo de su proyecto y bucket."""
+        trunc = cls._BUCKETS[resolution]
+        later = HealthSnapshot.objects.annotate(bucket=trunc("timestamp")).filter(
+            project=db_models.OuterRef("project"),
+            bucket=db_models.OuterRef("bucket"),
+            timestamp__gt=db_models.OuterRef("timestamp"),
+        )
+        return snapshots.annotate(bucket=trunc("timestamp")).filter(
+            db_models.Exists(later)
+        )
+
+    @classmethod
+    def downsample(
+        cls, snapshots: db_models.QuerySet, resolution: str
+    ) -> db_models.QuerySet:
+        """El ultimo snapshot de cada dia o semana; hourly devuelve todo."""
+        if resolution == "hourly":
+            return snapshots
+        excluded = cls._not_last_in_bucket(snapshots, resolution)
+        return snapshots.exclude(pk__in=excluded.values("pk"))
+
+    @staticmethod
+    def _local_midnight(day: date) -> datetime:
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    @classmethod
+    def compact(cls, now: datetime | None = None) -> int:
+        """
+        Aplicar los niveles de retencion. Los cortes se alinean al inicio del
+        dia / semana local para no partir un bucket entre dos niveles.
+
+        Returns:
+            Numero de snapshots borrados.
+        """
+        today = timezone.localdate(now)
+        daily_from = cls._local_midnight(
+            today - timedelta(days=settings.HEALTH_SNAPSHOT_HOURLY_DAYS)
+        )
+        weekly_day = today - timedelta(days=settings.HEALTH_SNAPSHOT_DAILY_DAYS)
+        weekly_from = cls._local_midnight(weekly_day - timedelta(days=weekly_day.weekday()))
+
+        deleted = 0
+        with transaction.atomic():
+            tiers = (
+                ("daily", HealthSnapshot.objects.filter(
+                    timestamp__lt=daily_from, timestamp__gte=weekly_from
+                )),
+                ("weekly", HealthSnapshot.objects.filter(timestamp__lt=weekly_from)),
+            )
+            for resolution, snapshots in tiers:
+                # Un solo DELETE ... WHERE id IN (subquery): los pks no pasan
+                # por Python
+                excluded = cls._not_last_in_bucket(snapshots, resolution)
+                count, _ = HealthSnapshot.objects.filter(
+                    pk__in=excluded.values("pk")
+                ).delete()
+                deleted += count
+        return deleted
+
+
+ROLLUP_ROW_FIELDS = (
+    "project_id",
+    "phase_id",
+    "billing_role_id",
+    "user_name",
+    "duration_hours",
+    "cost",
+    "date",
+)
+
+
+def _subtotal_key(related_id: int | None) -> str:
+    return str(related_id) if related_id is not None else "none"
+
+
+def _add_subtotal(
+    subtotals: dict[str, dict[str, str]], key: str, hours: Decimal, cost: Decimal
+) -> None:
+    """Suma (hours, cost) a un subtotal serializado y descarta los que quedan en cero."""
+    current = subtotals.get(key, {"hours": "0", "cost": "0"})
+    new_hours = Decimal(current["hours"]) + hours
+    new_cost = Decimal(current["cost"]) + cost
+    if new_hours == 0 and new_cost == 0:
+        subtotals.pop(key, None)
+    else:
+        subtotals[key] = {"hours": str(new_hours), "cost": str(new_cost)}
+
+
+class RollupDelta:
+    """
+    Acumula cambios de TimeEntry por proyecto para ProjectFinancialRollup.
+
+    Un upsert se registra como remove(fila anterior) + add(fila nueva);
+    las filas son dicts con ROLLUP_ROW_FIELDS. Tambien guarda las llaves
+    (project_id, user_name, date) tocadas para refrescar DailyTimeFact.
+    """
+
+    def __init__(self) -> None:
+        self.projects: dict[int, dict] = {}
+        self.daily_keys: set[tuple[int, str, date]] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.projects)
+
+    def add(self, row: dict) -> None:
+        self._apply(row, 1)
+
+    def remove(self, row: dict) -> None:
+        self._apply(row, -1)
+
+    def add_entry(self, entry: TimeEntry) -> None:
+        self.add({field: getattr(entry, field) for field in ROLLUP_ROW_FIELDS})
+
+    def remove_entry(self, entry: TimeEntry) -> None:
+        self.remove({field: getattr(entry, field) for field in ROLLUP_ROW_FIELDS})
+
+    def remove_queryset(self, entries: db_models.QuerySet) -> None:
+        """Registrar como removidas las filas de un queryset antes de borrarlo."""
+        for row in entries.values(*ROLLUP_ROW_FIELDS):
+            self.remove(row)
+
+    def _apply(self, row: dict, sign: int) -> None:
+        change = self.projects.setdefault(
+            row["project_id"],
+            {
+                "hours": Decimal("0"),
+                "cost": Decimal("0"),
+                "count": 0,
+                "phases": {},
+                "roles": {},
+                "dates_added": set(),
+                "dates_removed": set(),
+            },
+        )
+        hours = Decimal(row["duration_hours"]) * sign
+        cost = Decimal(row["cost"]) * sign
+        change["hours"] += hours
+        change["cost"] += cost
+        change["count"] += sign
+        _add_subtotal(change["phases"], _subtotal_key(row["phase_id"]), hours, cost)
+        _add_subtotal(change["roles"], _subtotal_key(row["billing_role_id"]), hours, cost)
+        entry_date = row["date"]
+        if isinstance(entry_date, str):
+            entry_date = date.fromisoformat(entry_date)
+        if sign > 0:
+            change["dates_added"].add(entry_date)
+        else:
+            change["dates_removed"].add(entry_date)
+        self.daily_keys.add((row["project_id"], row["user_name"], entry_date))
+
+
+class FinancialRollupService:
+    """
+    Mantiene ProjectFinancialRollup para que las lecturas sean O(proyectos)
+    en lugar de O(time entries).
+    """
+
+    @staticmethod
+    def get(project: Project) -> ProjectFinancialRollup | None:
+        return ProjectFinancialRollup.objects.filter(project=project).first()
+
+    @classmethod
+    def apply_delta(cls, delta: RollupDelta) -> None:
+        """
+        Aplica un RollupDelta despues de escribir las filas que lo originaron.
+        Proyectos sin rollup previo se recalculan completos. Tambien refresca
+        los DailyTimeFact de las llaves tocadas.
+        """
+        if not delta:
+            return
+
+        with transaction.atomic():
+            missing: list[int] = []
+            for project_id, change in delta.projects.items():
+                rollup = (
+                    ProjectFinancialRollup.objects.select_for_update()
+                    .filter(project_id=project_id)
+                    .first()
+                )
+                if rollup is None:
+                    missing.append(project_id)
+                    continue
+
+                rollup.consumed_hours += change["hours"]
+                rollup.actual_cost += change["cost"]
+                rollup.entry_count += change["count"]
+                for key, subtotal in change["phases"].items():
+                    _add_subtotal(
+                        rollup.phase_subtotals, key,
+                        Decimal(subtotal["hours"]), Decimal(subtotal["cost"]),
+                    )
+                for key, subtotal in change["roles"].items():
+                    _add_subtotal(
+                        rollup.role_subtotals, key,
+                        Decimal(subtotal["hours"]), Decimal(subtotal["cost"]),
+                    )
+
+                removed = change["dates_removed"]
+                touches_bounds = rollup.first_entry_date is None or any(
+                    d <= rollup.first_entry_date or d >= rollup.last_entry_date
+                    for d in removed
+                )
+                if removed and touches_bounds:
+                    bounds = TimeEntry.objects.filter(
+                        project_id=project_id
+                    ).aggregate(
+                        first=db_models.Min("date"), last=db_models.Max("date")
+                    )
+                    rollup.first_entry_date = bounds["first"]
+                    rollup.last_entry_date = bounds["last"]
+                elif change["dates_added"]:
+                    added_first = min(change["dates_added"])
+                    added_last = max(change["dates_added"])
+                    rollup.first_entry_date = min(
+                        filter(None, [rollup.first_entry_date, added_first])
+                    )
+                    rollup.last_entry_date = max(
+                        filter(None, [rollup.last_entry_date, added_last])
+                    )
+
+                rollup.save()
+
+            if missing:
+                cls.rebuild(missing)
+
+            DailyFactService.refresh(delta.daily_keys)
+            CeoDashboardCache.invalidate("time entries")
+            RateService.invalidate()
+
+    @staticmethod
+    def rebuild(project_ids: Iterable[int] | None = None) -> int:
+        """
+        Recalcula los rollups desde TimeEntry (todos si project_ids es None).
+
+        Returns:
+            Numero de rollups escritos.
+        """
+        projects = Project.objects.all()
+        if project_ids is not None:
+            projects = projects.filter(id__in=list(project_ids))
+        ids = list(projects.values_list("id", flat=True))
+
+        entries = TimeEntry.objects.filter(project_id__in=ids).order_by()
+        totals = {
+            row["project"]: row
+            for row in entries.values("project").annotate(
+                hours=db_models.Sum("duration_hours"),
+                cost=db_models.Sum("cost"),
+                count=db_models.Count("id"),
+                first=db_models.Min("date"),
+                last=db_models.Max("date"),
+            )
+        }
+        phase_subtotals: dict[int, dict] = {}
+        for row in entries.values("project", "phase").annotate(
+            hours=db_models.Sum("duration_hours"), cost=db_models.Sum("cost")
+        ):
+            _add_subtotal(
+                phase_subtotals.setdefault(row["project"], {}),
+                _subtotal_key(row["phase"]), row["hours"], row["cost"],
+            )
+        role_subtotals: dict[int, dict] = {}
+        for row in entries.values("project", "billing_role").annotate(
+            hours=db_models.Sum("duration_hours"), cost=db_models.Sum("cost")
+        ):
+            _add_subtotal(
+                role_subtotals.setdefault(row["project"], {}),
+                _subtotal_key(row["billing_role"]), row["hours"], row["cost"],
+            )
+
+        rollups = []
+        for project_id in ids:
+            total = totals.get(project_id, {})
+            rollups.append(
+                ProjectFinancialRollup(
+                    project_id=project_id,
+                    consumed_hours=total.get("hours") or Decimal("0"),
+                    actual_cost=total.get("cost") or Decimal("0.00"),
+                    entry_count=total.get("count", 0),
+                    first_entry_date=total.get("first"),
+                    last_entry_date=total.get("last"),
+                    phase_subtotals=phase_subtotals.get(project_id, {}),
+                    role_subtotals=role_subtotals.get(project_id, {}),
+                )
+            )
+
+        ProjectFinancialRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=["project"],
+            update_fields=[
+                "consumed_hours",
+                "actual_cost",
+                "entry_count",
+                "first_entry_date",
+                "last_entry_date",
+                "phase_subtotals",
+                "role_subtotals",
+                "updated_at",
+            ],
+        )
+        RateService.invalidate()
+        CeoDashboardCache.invalidate("rollup rebuild")
+        return len(rollups)
+
+    @staticmethod
+    def phase_hours(rollup: ProjectFinancialRollup | None, phase_id: int) -> Decimal | None:
+        """Horas de una fase segun el rollup (None si no hay rollup)."""
+        if rollup is None:
+            return None
+        subtotal = rollup.phase_subtotals.get(_subtotal_key(phase_id))
+        return Decimal(subtotal["hours"]) if subtotal else Decimal("0")
+
+
+# Columnas que un upsert por clockify_id sobrescribe (sprint lo asignan
+# solo los loaders CSV al crear, por eso no se toca)
+TIME_ENTRY_UPSERT_FIELDS = [
+    "project",
+    "phase",
+    "billing_role",
+    "user_name",
+    "user_email",
+    "description",
+    "duration_hours",
+    "cost",
+    "date",
+    "content_hash",
+    *CLASSIFICATION_FIELDS,
+]
+
+
+class TimeEntryUpsertService:
+    """Upsert de TimeEntry por clockify_id que omite filas cuyo content_hash no cambio."""
+
+    @staticmethod
+    def upsert(
+        entries: Iterable[TimeEntry],
+        rollup_delta: RollupDelta,
+        stale_scope: db_models.QuerySet | None = None,
+    ) -> dict[str, int]:
+        """
+        Escribe solo las entries nuevas o con hash distinto y registra sus
+        cambios en rollup_delta (el llamador aplica el delta en su transaccion).
+
+        Args:
+            entries: TimeEntry sin guardar; si un clockify_id se repite gana la ultima.
+            rollup_delta: delta a completar con las filas escritas o borradas.
+            stale_scope: filas previas del mismo origen; las que ya no vienen
+                en `entries` se borran.
+
+        Returns:
+            Conteos {"inserted", "updated", "skipped", "deleted"}.
+        """
+        by_id = {entry.clockify_id: entry for entry in entries}
+        for entry in by_id.values():
+            entry.content_hash = entry.compute_content_hash()
+
+        existing_rows = {
+            row["clockify_id"]: row
+            for row in TimeEntry.objects.filter(clockify_id__in=by_id).values(
+                "clockify_id", "content_hash", *ROLLUP_ROW_FIELDS
+            )
+        }
+        changed = [
+            entry
+            for clockify_id, entry in by_id.items()
+            if clockify_id not in existing_rows
+            or existing_rows[clockify_id]["content_hash"] != entry.content_hash
+        ]
+        if changed:
+            project_names = dict(
+                Project.objects.filter(
+                    id__in={entry.project_id for entry in changed}
+                ).values_list("id", "name")
+            )
+            for entry in changed:
+                entry.apply_classification(project_names[entry.project_id])
+            TimeEntry.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=["clockify_id"],
+                update_fields=TIME_ENTRY_UPSERT_FIELDS,
+                batch_size=1000,
+            )
+
+        updated = 0
+        for entry in changed:
+            if entry.clockify_id in existing_rows:
+                rollup_delta.remove(existing_rows[entry.clockify_id])
+                updated += 1
+            rollup_delta.add_entry(entry)
+
+        deleted = 0
+        if stale_scope is not None:
+            stale = stale_scope.exclude(clockify_id__in=by_id)
+            rollup_delta.remove_queryset(stale)
+            deleted = stale.delete()[0]
+
+        return {
+            "inserted": len(changed) - updated,
+            "updated": updated,
+            "skipped": len(by_id) - len(changed),
+            "deleted": deleted,
+        }
+
+
+class TimeEntryClassificationService:
+    """
+    Reaplica las reglas de apps.finance.classifiers a TimeEntry ya guardadas
+    (filas previas a la clasificacion o de una CLASSIFIER_VERSION anterior).
+    """
+
+    BATCH_SIZE = 2000
+
+    @classmethod
+    def stale(cls, entries: db_models.QuerySet | None = None) -> db_models.QuerySet:
+        """Entries cuya clasificacion no es de la version actual."""
+        if entries is None:
+            entries = TimeEntry.objects.all()
+        return entries.exclude(classification_version=CLASSIFIER_VERSION)
+
+    @classmethod
+    def reclassify(cls, entries: db_models.QuerySet) -> int:
+        """
+        Clasificar las entries del queryset con bulk_update por lotes.
+
+        Returns:
+            Numero de entries clasificadas.
+        """
+        # Lotes por keyset sobre id: no se mantiene un cursor abierto sobre la
+        # tabla que se esta actualizando
+        count = 0
+        last_id = 0
+        while True:
+            rows = list(
+                entries.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "description", "project__name")[: cls.BATCH_SIZE]
+            )
+            if not rows:
+                return count
+            batch = []
+            for entry_id, description, project_name in rows:
+                entry = TimeEntry(id=entry_id, description=description)
+                entry.apply_classification(project_name)
+                batch.append(entry)
+            TimeEntry.objects.bulk_update(batch, CLASSIFICATION_FIELDS)
+            count += len(batch)
+            last_id = rows[-1][0]
+
+
+class RateService:
+    """
+    Tarifa efectiva (costo real / horas consumidas, DEFAULT_RATE sin horas)
+    por proyecto, por rol y del portafolio, leida de ProjectFinancialRollup.
+
+    Cada instancia memoiza lo que ya resolvio: usar una por request. Entre
+    requests las tarifas viven en el cache de Django bajo una version que
+    invalidate() renueva cuando el sync o los loaders escriben time entries
+    (FinancialRollupService.apply_delta) o se reconstruyen los rollups.
+    """
+
+    DEFAULT_RATE = Decimal("500")
+    KEY_PREFIX = "rates"
+    VERSION_KEY = f"{KEY_PREFIX}:version"
+
+    def __init__(self) -> None:
+        self._memo: dict[str, Decimal | dict] = {}
+        self._version: int | None = None
+
+    @classmethod
+    def effective_rate(cls, cost: Decimal | None, hours: Decimal | None) -> Decimal:
+        """La definicion unica de tarifa efectiva."""
+        if hours and hours > 0:
+            return (cost or Decimal("0")) / hours
+        return cls.DEFAULT_RATE
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Renovar la version de las tarifas cacheadas al confirmar la transaccion."""
+        transaction.on_commit(lambda: cache.set(cls.VERSION_KEY, time_ns(), timeout=None))
+
+    def _key(self, name: str) -> str:
+        if self._version is None:
+            self._version = cache.get(self.VERSION_KEY, 0)
+        return f"{self.KEY_PREFIX}:{self._version}:{name}"
+
+    def _cached(self, names: list[str], compute) -> dict[str, Any]:
+        """
+        Valores de la memo de la instancia, luego del cache de Django y al
+        final de compute(faltantes) -> {name: valor}, en una sola llamada.
+        """
+        found = {name: self._memo[name] for name in names if name in self._memo}
+        missing = [name for name in names if name not in found]
+        if missing:
+            keys = {self._key(name): name for name in missing}
+            cached = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+            uncached = [name for name in missing if name not in cached]
+            computed = compute(uncached) if uncached else {}
+            if computed:
+                cache.set_many(
+                    {self._key(name): value for name, value in computed.items()},
+                    timeout=settings.RATE_CACHE_TTL,
+                )
+            self._memo.update(cached)
+            self._memo.update(computed)
+            found.update(cached)
+            found.update(computed)
+        return found
+
+    def for_projects(self, projects: Iterable[Project | int]) -> dict[int, Decimal]:
+        """
+        Tarifa por project_id para muchos proyectos en una sola query. Los
+        proyectos anotados con with_financials() no requieren query.
+        """
+        rates: dict[int, Decimal] = {}
+        ids: list[int] = []
+        for project in projects:
+            if isinstance(project, Project) and hasattr(project, "total_consumed_hours"):
+                rates[project.pk] = self._memo.setdefault(
+                    f"project:{project.pk}",
+                    self.effective_rate(project.total_actual_cost, project.total_consumed_hours),
+                )
+            else:
+                ids.append(getattr(project, "pk", project))
+
+        def compute(names: list[str]) -> dict[str, Decimal]:
+            totals = (
+                Project.objects.with_financials()
+                .filter(pk__in=[int(name.split(":")[1]) for name in names])
+                .values_list("pk", "total_actual_cost", "total_consumed_hours")
+            )
+            found = {
+                f"project:{pk}": self.effective_rate(cost, hours)
+                for pk, cost, hours in totals
+            }
+            return {name: found.get(name, self.DEFAULT_RATE) for name in names}
+
+        if ids:
+            cached = self._cached([f"project:{pk}" for pk in ids], compute)
+            rates.update({pk: cached[f"project:{pk}"] for pk in ids})
+        return rates
+
+    def for_project(self, project: Project | int) -> Decimal:
+        return self.for_projects([project])[getattr(project, "pk", project)]
+
+    def portfolio(self) -> Decimal:
+        """Tarifa de todos los proyectos con horas registradas."""
+
+        def compute(_names: list[str]) -> dict[str, Decimal]:
+            totals = ProjectFinancialRollup.objects.aggregate(
+                cost=db_models.Sum("actual_cost"), hours=db_models.Sum("consumed_hours")
+            )
+            return {"portfolio": self.effective_rate(totals["cost"], totals["hours"])}
+
+        return self._cached(["portfolio"], compute)["portfolio"]
+
+    def for_roles(self, project: Project | int | None = None) -> dict[int | None, Decimal]:
+        """
+        Tarifa por billing_role_id (None = entries sin rol) de un proyecto o,
+        sin proyecto, de todo el portafolio, desde los role_subtotals.
+        """
+        project_id = getattr(project, "pk", project)
+        name = f"roles:{project_id if project_id is not None else 'all'}"
+
+        def compute(_names: list[str]) -> dict[str, dict]:
+            rollups = ProjectFinancialRollup.objects.all()
+            if project_id is not None:
+                rollups = rollups.filter(project_id=project_id)
+            totals: dict[int | None, list[Decimal]] = {}
+            for subtotals in rollups.values_list("role_subtotals", flat=True):
+                for key, subtotal in subtotals.items():
+                    role_id = None if key == "none" else int(key)
+                    bucket = totals.setdefault(role_id, [Decimal("0"), Decimal("0")])
+                    bucket[0] += Decimal(subtotal["cost"])
+                    bucket[1] += Decimal(subtotal["hours"])
+            return {
+                name: {
+                    role_id: self.effective_rate(cost, hours)
+                    for role_id, (cost, hours) in totals.items()
+                }
+            }
+
+        return self._cached([name], compute)[name]
+
+
+class RateCard:
+    """
+    Tarifas de ingesta en memoria: se carga una vez por corrida del sync o
+    de un loader y cada time entry se costea con lookups en diccionarios.
+
+    - Rol del usuario: UserBillingRole por email. Sin asignacion queda sin
+      rol (costo 0 si la fuente no trae monto), salvo con
+      default_to_first_role, que asigna el primer BillingRole por nombre
+      (el comportamiento historico del sync de Clockify).
+    - Tarifa: el override ProjectRoleRate vigente en la fecha de la entry
+      (el de mayor effective_from <= fecha; sin fecha rige desde siempre) o
+      el default_hourly_rate del rol.
+    """
+
+    QUANTIZE = Decimal("0.01")
+
+    def __init__(
+        self,
+        roles: dict[int, BillingRole],
+        overrides: dict[tuple[int, int], list[tuple[date, Decimal]]],
+        role_by_email: dict[str, int],
+        default_to_first_role: bool = False,
+    ) -> None:
+        self.roles = roles
+        self.default_role = (
+            min(roles.values(), key=lambda r: r.role_name, default=None)
+            if default_to_first_role
+            else None
+        )
+        self.role_by_email = role_by_email
+        # Por (project_id, role_id): fechas de inicio ordenadas y sus tarifas
+        self._overrides: dict[tuple[int, int], tuple[list[date], list[Decimal]]] = {}
+        for key, periods in overrides.items():
+            periods = sorted(periods)
+            self._overrides[key] = (
+                [start for start, _rate in periods],
+                [rate for _start, rate in periods],
+            )
+        self.drift = 0
+
+    @classmethod
+    def load(
+        cls, project_ids: Iterable[int] | None = None, default_to_first_role: bool = False
+    ) -> "RateCard":
+        """Tres queries: roles, overrides (de project_ids o de todos) y asignaciones."""
+        rates = ProjectRoleRate.objects.all()
+        if project_ids is not None:
+            rates = rates.filter(project_id__in=list(project_ids))
+        overrides: dict[tuple[int, int], list[tuple[date, Decimal]]] = {}
+        for project_id, role_id, effective_from, rate in rates.values_list(
+            "project_id", "billing_role_id", "effective_from", "hourly_rate"
+        ):
+            overrides.setdefault((project_id, role_id), []).append(
+                (effective_from or date.min, rate)
+            )
+        return cls(
+            roles={role.id: role for role in BillingRole.objects.all()},
+            overrides=overrides,
+            role_by_email=dict(
+                UserBillingRole.objects.values_list("user_email", "billing_role_id")
+            ),
+            default_to_first_role=default_to_first_role,
+        )
+
+    def role_for(self, user_email: str) -> BillingRole | None:
+        role_id = self.role_by_email.get((user_email or "").lower())
+        return self.roles.get(role_id, self.default_role)
+
+    def hourly_rate(
+        self, project_id: int, role: BillingRole | None, on_date: date
+    ) -> Decimal:
+        """Tarifa vigente en on_date: override de proyecto o default del rol."""
+        if role is None:
+            return Decimal("0.00")
+        override = self._overrides.get((project_id, role.id))
+        if override:
+            starts, rates = override
+            index = bisect_right(starts, on_date) - 1
+            if index >= 0:
+                return rates[index]
+        return role.default_hourly_rate
+
+    def cost(
+        self,
+        project_id: int,
+        role: BillingRole | None,
+        hours: Decimal,
+        on_date: date,
+        amount: Decimal | None = None,
+    ) -> Decimal:
+        """
+        Costo de una entry: horas x tarifa vigente. Si la fuente ya trae el
+        monto calculado por Clockify (exportes CSV) ese monto manda, y las
+        diferencias contra la tarifa se cuentan en drift.
+        """
+        cost = (hours * self.hourly_rate(project_id, role, on_date)).quantize(self.QUANTIZE)
+        if amount is None:
+            return cost
+        if amount != cost:
+            self.drift += 1
+        return amount
+
+
+class DailyFactService:
+    """Mantiene DailyTimeFact (proyecto x usuario x fecha) desde TimeEntry."""
+
+    @staticmethod
+    def _aggregate(entries: db_models.QuerySet) -> list[DailyTimeFact]:
+        rows = (
+            entries.order_by()
+            .values("project", "user_name", "date")
+            .annotate(
+                email=db_models.Max("user_email"),
+                hours=db_models.Sum("duration_hours"),
+                cost=db_models.Sum("cost"),
+                count=db_models.Count("id"),
+                missing=db_models.Count(
+                    "id", filter=db_models.Q(description__regex=r"^\s*$")
                 ),
             )
+        )
+        return [
+            DailyTimeFact(
+                project_id=row["project"],
+                user_email=row["email"],
+                user_name=row["user_name"],
+                date=row["date"],
+                total_hours=row["hours"],
+                total_cost=row["cost"],
+                entry_count=row["count"],
+                missing_description_count=row["missing"],
+            )
+            for row in rows.iterator()
+        ]
 
-        return snapshot
+    @classmethod
+    def refresh(cls, keys: Iterable[tuple[int, str, date]]) -> None:
+        """
+        Recalcula los hechos de las llaves (project_id, user_name, date) dadas.
+        Se recalcula el producto cruzado de proyectos, usuarios y fechas para
+        resolverlo con un solo delete + insert.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+
+        scope = db_models.Q(
+            project_id__in={k[0] for k in keys},
+            user_name__in={k[1] for k in keys},
+            date__in={k[2] for k in keys},
+        )
+        facts = cls._aggregate(TimeEntry.objects.filter(scope))
+        with transaction.atomic():
+            DailyTimeFact.objects.filter(scope).delete()
+            DailyTimeFact.objects.bulk_create(facts, batch_size=1000)
+
+    @classmethod
+    def rebuild(cls, project_ids: Iterable[int] | None = None) -> int:
+        """Recalcula DailyTimeFact desde TimeEntry (todos si project_ids es None)."""
+        entries = TimeEntry.objects.all()
+        facts_qs = DailyTimeFact.objects.all()
+        if project_ids is not None:
+            project_ids = list(project_ids)
+            entries = entries.filter(project_id__in=project_ids)
+            facts_qs = facts_qs.filter(project_id__in=project_ids)
+
+        facts = cls._aggregate(entries)
+        with transaction.atomic():
+            facts_qs.delete()
+            DailyTimeFact.objects.bulk_create(facts, batch_size=1000)
+            CeoDashboardCache.invalidate("daily facts rebuild")
+        return len(facts)
 
 
 class AnticipoCoverageService:
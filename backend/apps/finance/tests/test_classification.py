@@ -0,0 +1,168 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.finance.classifiers import (
+    CLASSIFIER_VERSION,
+    SUSPICIOUS_TASKS_RE,
+    classify_time_entry,
+    is_hr_no_laboral,
+)
+from apps.finance.models import Project, TimeEntry
+from apps.finance.services import (
+    RollupDelta,
+    TimeEntryClassificationService,
+    TimeEntryUpsertService,
+)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+DESCRIPTIONS = [
+    "AT-2 Daily de equipo",
+    "REU-PLANNING sprint 4",
+    "CAP-CURSO Django avanzado",
+    "Cotización cliente nuevo",
+    "AT-156 Guías de Embarque",
+    "Permiso no laboral",
+    "AP-12 Tracker",
+    "INV-RD prototipo",
+    "",
+    "Soporte interno",
+]
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TimeEntryClassificationTest(TestCase):
+    """Tests de la clasificacion guardada en TimeEntry y su uso en ceo_dashboard."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.general = Project.objects.create(
+            name="Appix General",
+            code="INT-GEN",
+            client_name="Appix",
+            budget_hours=Decimal("0.00"),
+            client_invoice_amount=Decimal("0.00"),
+            target_margin=Decimal("0.00"),
+            is_internal=True,
+        )
+        self.ventas = Project.objects.create(
+            name="VENTAS",
+            code="INT-VEN",
+            client_name="Appix",
+            budget_hours=Decimal("0.00"),
+            client_invoice_amount=Decimal("0.00"),
+            target_margin=Decimal("0.00"),
+            is_internal=True,
+        )
+
+    def _entry(self, n: int, description: str, project: Project, hours: str = "1.50") -> TimeEntry:
+        return TimeEntry(
+            clockify_id=f"cls-{n}",
+            project=project,
+            user_name=f"Persona {n % 3}",
+            user_email=f"p{n % 3}@test.com",
+            description=description,
+            duration_hours=Decimal(hours),
+            cost=Decimal("100.00"),
+            date=date(2026, 1, 5 + n % 20),
+        )
+
+    def test_save_and_upsert_store_classification(self) -> None:
+        saved = self._entry(0, "AT-156 Guías de Embarque", self.general)
+        saved.save()
+        TimeEntryUpsertService.upsert(
+            [self._entry(1, "Permiso no laboral", self.ventas),
+             self._entry(2, "Seguimiento CRM", self.general)],
+            RollupDelta(),
+        )
+
+        rows = dict(
+            (cid, rest) for cid, *rest in TimeEntry.objects.values_list(
+                "clockify_id", "goal_category", "is_hr_no_laboral",
+                "is_suspicious", "classification_version",
+            )
+        )
+        self.assertEqual(rows["cls-0"], ["APPIX_GENERAL", False, True, CLASSIFIER_VERSION])
+        self.assertEqual(rows["cls-1"], ["", True, False, CLASSIFIER_VERSION])
+        self.assertEqual(rows["cls-2"], ["VENTAS", False, False, CLASSIFIER_VERSION])
+
+    def test_reclassify_command_updates_stale_rows(self) -> None:
+        for n, desc in enumerate(DESCRIPTIONS):
+            self._entry(n, desc, self.general).save()
+        TimeEntry.objects.filter(clockify_id__in=["cls-0", "cls-1"]).update(
+            goal_category="", classification_version=0
+        )
+        self.assertEqual(TimeEntryClassificationService.stale().count(), 2)
+
+        out = StringIO()
+        call_command("reclassify_time_entries", stdout=out)
+
+        self.assertIn("2 entries classified", out.getvalue())
+        self.assertFalse(TimeEntryClassificationService.stale().exists())
+        self.assertEqual(
+            TimeEntry.objects.get(clockify_id="cls-0").goal_category, "DAILYS"
+        )
+        call_command("reclassify_time_entries", "--all", stdout=out)
+        self.assertIn(f"{len(DESCRIPTIONS)} entries classified", out.getvalue())
+
+    def test_development_goals_match_per_entry_classification(self) -> None:
+        entries = [
+            self._entry(n, desc, project, hours=f"{n + 1}.25")
+            for n, (desc, project) in enumerate(
+                (d, p) for p in (self.general, self.ventas) for d in DESCRIPTIONS
+            )
+        ]
+        TimeEntryUpsertService.upsert(entries, RollupDelta())
+        # Filas de otra version de las reglas: el dashboard las clasifica en
+        # memoria sin escribirlas
+        TimeEntry.objects.filter(project=self.ventas).update(
+            goal_category="", classification_version=0
+        )
+
+        expected: dict[str, Decimal] = {}
+        by_person: dict[str, Decimal] = {}
+        hr = suspicious = Decimal("0")
+        for entry in entries:
+            if is_hr_no_laboral(entry.description):
+                hr += entry.duration_hours
+                continue
+            if SUSPICIOUS_TASKS_RE.search(entry.description):
+                suspicious += entry.duration_hours
+            cat = classify_time_entry(entry.description, entry.project.name)
+            if cat:
+                expected[cat] = expected.get(cat, Decimal("0")) + entry.duration_hours
+            if cat == "APPIX_GENERAL":
+                by_person[entry.user_name] = (
+                    by_person.get(entry.user_name, Decimal("0")) + entry.duration_hours
+                )
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("ceo", "ceo@test.com", "x"))
+        with self.assertLogs("apps.finance.views", "WARNING") as logs:
+            data = client.get("/api/v1/finance/ceo-dashboard/").data
+        self.assertIn("reclassify_time_entries", logs.output[0])
+
+        goals = {g["category"]: g for g in data["development_goals"]}
+        for cat, hours in expected.items():
+            self.assertEqual(goals[cat]["hours"], str(hours.quantize(Decimal("0.01"))))
+        self.assertEqual(
+            {g["category"] for g in goals.values() if g["has_data"]}, set(expected)
+        )
+        self.assertEqual(
+            goals["APPIX_GENERAL"]["person_breakdown"],
+            [
+                {"name": name, "hours": str(h.quantize(Decimal("0.01")))}
+                for name, h in sorted(by_person.items(), key=lambda x: x[1], reverse=True)
+            ],
+        )
+        alerts = {a["code"]: a for a in data["data_quality_alerts"]}
+        self.assertEqual(alerts["HR_NO_LABORAL"]["hours"], str(hr))
+        self.assertEqual(alerts["MISCLASSIFIED"]["hours"], str(suspicious))
+        self.assertEqual(TimeEntryClassificationService.stale().count(), len(DESCRIPTIONS))
@@ -0,0 +1,162 @@
+import csv
+import re
+from pathlib import Path
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from apps.finance.classifiers import (
+    CAPACITACION_PROJECTS,
+    EXCLUDED_PROJECTS,
+    GOAL_RULES,
+    INNOVACION_PROJECTS,
+    VENTAS_PROJECTS,
+    RuleEngine,
+    classify_entry,
+    external_jira_key,
+)
+from apps.finance.management.commands.benchmark_classifier import (
+    reference_classification,
+)
+from apps.finance.management.commands.categorize_internal import (
+    RECLASSIFY_ENGINE,
+    RECLASSIFY_RULES,
+)
+
+RAW_DATA = Path(__file__).resolve().parents[4] / "DA-Rentabilidad" / "RAW_DATA"
+DESC_CSV = RAW_DATA / "Enero_Febrero_Description.csv"
+
+PROJECTS = sorted(
+    EXCLUDED_PROJECTS | CAPACITACION_PROJECTS | VENTAS_PROJECTS | INNOVACION_PROJECTS
+    | {"Appix General", "Appix TI", "Dailys", "Capturando México"}
+)
+
+# Prioridad, limites de palabra, mayusculas y plegados de Unicode
+EDGE_DESCRIPTIONS = [
+    "",
+    "[AT-2]: Daily",
+    "AT-21 revision",
+    "REU-DAILY training",
+    "Taller de cotización",
+    "Curso de prospección",
+    "concurso interno",
+    "seguimiento   CRM y juntas appix",
+    "[AT-156] Guías de Embarque no laboral",
+    "[AT-156] planeación y organización",
+    "at-156 minusculas",
+    "AP-12 Tracker daily",
+    "ap-13 seguimiento",
+    "MKT-REU-INT",
+    "VA-12 y VA-",
+    "Pricing   AI DIS-MOCKUP",
+    "DAİLY con i turca",
+    "ſcope of work",
+    "Straße cotización",
+    "traınıng",
+    "Seguımiento crm",
+    "prıcing ai",
+    "autoestudıo",
+    "CAP-WOR\u212aSHOP",
+    "ſeguımıento",
+    "REU-PLANNING sprint",
+]
+
+
+class GoalRulesParityTest(SimpleTestCase):
+    """classify_entry (motor compilado) contra cada patron de GOAL_RULES por separado."""
+
+    def assert_parity(self, descriptions: list[str]) -> None:
+        for desc in descriptions:
+            for project in PROJECTS:
+                with self.subTest(description=desc, project=project):
+                    self.assertEqual(
+                        classify_entry(desc, project),
+                        reference_classification(desc, project),
+                    )
+
+    def test_edge_cases(self) -> None:
+        self.assert_parity(EDGE_DESCRIPTIONS)
+
+    @skipUnless(DESC_CSV.exists(), "export real de Clockify no disponible")
+    def test_real_export(self) -> None:
+        with open(DESC_CSV, encoding="utf-8-sig") as f:
+            descriptions = sorted({row["Description"] for row in csv.DictReader(f)})
+        self.assert_parity(descriptions)
+
+    def test_every_rule_has_derived_anchors(self) -> None:
+        # Una regla sin anclas se verificaria en cada descripcion
+        self.assertEqual(GOAL_RULES.unanchored_rules, ())
+
+    def test_matches_equal_per_rule_search(self) -> None:
+        for desc in EDGE_DESCRIPTIONS:
+            with self.subTest(description=desc):
+                self.assertEqual(
+                    GOAL_RULES.matches(desc),
+                    {name for name, pattern in GOAL_RULES.rules if pattern.search(desc)},
+                )
+
+    def test_first_match_wins(self) -> None:
+        self.assertEqual(classify_entry("Daily training", "VENTAS")[0], "DAILYS")
+        self.assertEqual(classify_entry("Taller de cotización", "VENTAS")[0], "CAPACITACION")
+        self.assertEqual(classify_entry("REU-PLANNING", "APPIX DATA")[0], "REUNIONES")
+        self.assertEqual(classify_entry("AP-12 Daily", "VENTAS"), ("", False, False))
+
+
+class RuleEngineTest(SimpleTestCase):
+    """Tests del RuleEngine generico."""
+
+    def test_overlapping_anchors_and_order(self) -> None:
+        engine = RuleEngine((
+            ("LARGA", re.compile(r"\bREU-DAILY\b", re.IGNORECASE)),
+            ("CORTA", re.compile(r"daily", re.IGNORECASE)),
+            ("PREFIJO", re.compile(r"reu")),
+        ))
+
+        self.assertEqual(engine.matches("REU-DAILY reu"), {"LARGA", "CORTA", "PREFIJO"})
+        self.assertEqual(engine.matches("REU-DAILYS"), {"CORTA"})
+        self.assertEqual(engine.first("daily reu"), "CORTA")
+        self.assertIsNone(engine.first("nada"))
+
+    def test_anchors_are_derived_from_patterns(self) -> None:
+        engine = RuleEngine((
+            ("ALTERNATIVAS", re.compile(r"\bAT-2\b|cotizaci[oó]n", re.IGNORECASE)),
+            ("REPETICION", re.compile(r"(?:scope)+\s*of")),
+            ("SIN_ANCLA", re.compile(r"[0-9]{3}")),
+        ))
+
+        self.assertEqual(engine.unanchored_rules, ("SIN_ANCLA",))
+        self.assertEqual(engine.matches("at-2 y 123"), {"ALTERNATIVAS", "SIN_ANCLA"})
+        self.assertEqual(engine.matches("COTIZACIÓN"), {"ALTERNATIVAS"})
+        self.assertEqual(engine.matches("scopescope of"), {"REPETICION"})
+        self.assertEqual(engine.matches("SCOPE of"), frozenset())
+
+    def test_results_are_memoized(self) -> None:
+        engine = RuleEngine((("A", re.compile("x")),))
+        for _ in range(3):
+            engine.matches("xyz")
+
+        self.assertEqual(engine.matches.cache_info().hits, 2)
+
+    def test_reclassify_engine_matches_rule_scan(self) -> None:
+        def scan(description: str) -> str | None:
+            for pattern, target_code in RECLASSIFY_RULES:
+                if re.search(re.escape(pattern), description, re.IGNORECASE):
+                    return target_code
+            return None
+
+        for desc in [
+            "Planeación Colorado y Eenvita",
+            "Microsoft FABRIC moderna",
+            "Station 24 / sesen",
+            "Muebles Cook",
+            "Sin coincidencias",
+            "İ puentes",
+            "ſeſen",
+        ]:
+            with self.subTest(description=desc):
+                self.assertEqual(RECLASSIFY_ENGINE.first(desc), scan(desc))
+
+    def test_external_jira_key(self) -> None:
+        self.assertEqual(external_jira_key("[CAPMX-12]: login"), "CAPMX-12")
+        self.assertIsNone(external_jira_key("[AT-2]: Daily [CAPMX-12]"))
+        self.assertIsNone(external_jira_key("CAPMX-12 sin corchetes"))
@@ -0,0 +1,154 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.finance.models import DailyTimeFact, Project, TimeEntry
+from apps.finance.services import DailyFactService, FinancialRollupService, RollupDelta
+
+
+class DailyFactServiceTest(TestCase):
+    """Tests para DailyTimeFact: rebuild, refresh por delta y lectura del dashboard."""
+
+    def setUp(self) -> None:
+        self.project = Project.objects.create(
+            name="Cliente",
+            code="DF-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        self.internal = Project.objects.create(
+            name="Interno",
+            code="DF-INT",
+            client_name="Appix",
+            budget_hours=Decimal("0.00"),
+            client_invoice_amount=Decimal("0.00"),
+            target_margin=Decimal("0.00"),
+            is_internal=True,
+        )
+
+    def _create_time_entry(
+        self,
+        clockify_id: str,
+        hours: str,
+        entry_date: date,
+        project: Project | None = None,
+        email: str = "dev@test.com",
+        description: str = "Trabajo",
+        name: str | None = None,
+    ) -> TimeEntry:
+        return TimeEntry.objects.create(
+            clockify_id=clockify_id,
+            project=project or self.project,
+            user_name=name or email.split("@")[0],
+            user_email=email,
+            description=description,
+            duration_hours=Decimal(hours),
+            cost=Decimal(hours) * 100,
+            date=entry_date,
+        )
+
+    def _fact_state(self) -> set[tuple]:
+        return set(
+            DailyTimeFact.objects.values_list(
+                "project_id", "user_name", "date", "total_hours",
+                "total_cost", "entry_count", "missing_description_count",
+            )
+        )
+
+    def test_rebuild_groups_by_project_user_and_day(self) -> None:
+        self._create_time_entry("a", "2.00", date(2026, 1, 5))
+        self._create_time_entry("b", "3.00", date(2026, 1, 5), description="  ")
+        self._create_time_entry("c", "1.00", date(2026, 1, 6))
+        self._create_time_entry("d", "4.00", date(2026, 1, 5), email="qa@test.com")
+
+        self.assertEqual(DailyFactService.rebuild(), 3)
+
+        fact = DailyTimeFact.objects.get(
+            project=self.project, user_name="dev", date=date(2026, 1, 5)
+        )
+        self.assertEqual(fact.total_hours, Decimal("5"))
+        self.assertEqual(fact.total_cost, Decimal("500"))
+        self.assertEqual(fact.entry_count, 2)
+        self.assertEqual(fact.missing_description_count, 1)
+
+    def test_apply_delta_refreshes_touched_days(self) -> None:
+        entry = self._create_time_entry("a", "2.00", date(2026, 1, 5))
+        self._create_time_entry("b", "3.00", date(2026, 1, 6))
+        FinancialRollupService.rebuild()
+        DailyFactService.rebuild()
+
+        delta = RollupDelta()
+        delta.remove_entry(entry)
+        entry.date = date(2026, 1, 6)
+        entry.duration_hours = Decimal("1.00")
+        entry.cost = Decimal("100.00")
+        entry.save()
+        delta.add_entry(entry)
+        delta.add_entry(self._create_time_entry("c", "1.00", date(2026, 1, 7)))
+        FinancialRollupService.apply_delta(delta)
+
+        incremental = self._fact_state()
+        DailyFactService.rebuild()
+        self.assertEqual(incremental, self._fact_state())
+        self.assertFalse(DailyTimeFact.objects.filter(date=date(2026, 1, 5)).exists())
+
+    def test_ceo_dashboard_totals_from_facts(self) -> None:
+        cache.clear()  # el dashboard se cachea por conjunto de proyectos
+        self._create_time_entry("a", "2.00", date(2026, 1, 5))
+        self._create_time_entry("b", "3.00", date(2026, 2, 5), email="qa@test.com")
+        self._create_time_entry("c", "1.50", date(2026, 1, 5), project=self.internal, description="")
+        DailyFactService.rebuild()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("ceo", "ceo@test.com", "x"))
+
+        data = client.get("/api/v1/finance/ceo-dashboard/").data
+        self.assertEqual(data["costs"]["total_consumed_hours"], "6.50")
+        self.assertEqual(data["costs"]["total_actual_cost"], "650.00")
+        self.assertEqual(data["development_summary"]["total_client_hours"], "5.00")
+        self.assertEqual(data["development_summary"]["total_internal_hours"], "1.50")
+        self.assertEqual(
+            {m["name"]: m["hours"] for m in data["team"]["members"]},
+            {"dev": "3.50", "qa": "3.00"},
+        )
+
+        filtered = client.get(
+            "/api/v1/finance/ceo-dashboard/", {"date_from": "2026-02-01"}
+        ).data
+        self.assertEqual(filtered["costs"]["total_consumed_hours"], "3.00")
+
+    def test_facts_group_by_the_dashboard_person(self) -> None:
+        """Un email con dos nombres se reporta igual que en TimeEntry: por nombre."""
+        cache.clear()
+        self._create_time_entry("a", "2.00", date(2026, 1, 5))
+        self._create_time_entry("b", "3.00", date(2026, 1, 5), name="Dev Renombrado")
+        entry = self._create_time_entry("c", "1.00", date(2026, 1, 6))
+        DailyFactService.rebuild()
+
+        delta = RollupDelta()
+        delta.remove_entry(entry)
+        entry.user_name = "Dev Renombrado"
+        entry.save()
+        delta.add_entry(entry)
+        FinancialRollupService.apply_delta(delta)
+
+        self.assertEqual(
+            self._fact_state(),
+            {
+                (self.project.id, "dev", date(2026, 1, 5), Decimal("2"), Decimal("200"), 1, 0),
+                (self.project.id, "Dev Renombrado", date(2026, 1, 5), Decimal("3"), Decimal("300"), 1, 0),
+                (self.project.id, "Dev Renombrado", date(2026, 1, 6), Decimal("1"), Decimal("100"), 1, 0),
+            },
+        )
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("ceo", "ceo@test.com", "x"))
+        data = client.get("/api/v1/finance/ceo-dashboard/").data
+        self.assertEqual(
+            {m["name"]: m["hours"] for m in data["team"]["members"]},
+            {"dev": "2.00", "Dev Renombrado": "4.00"},
+        )
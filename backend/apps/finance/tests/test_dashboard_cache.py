@@ -0,0 +1,152 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.finance.admin import ProjectAdmin, TimeEntryAdmin
+from apps.finance.dashboard_cache import CeoDashboardCache
+from apps.finance.models import Phase, Project, TimeEntry
+from apps.finance.services import (
+    DailyFactService,
+    FinancialRollupService,
+    RollupDelta,
+    TimeEntryUpsertService,
+)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+URL = "/api/v1/finance/ceo-dashboard/"
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CeoDashboardCacheTest(TestCase):
+    """Tests del cache de ceo_dashboard: llaves, invalidacion y stale-while-revalidate."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.project = Project.objects.create(
+            name="Cliente",
+            code="CACHE-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        self.phase = Phase.objects.create(
+            project=self.project, name="Dev", estimated_hours=Decimal("50.00")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_superuser("ceo", "ceo@test.com", "x")
+        )
+
+    def _get(self, **params: str) -> tuple[str, dict]:
+        response = self.client.get(URL, params)
+        return response["X-Dashboard-Cache"], response.data
+
+    def test_second_request_is_served_from_cache(self) -> None:
+        first_state, first = self._get()
+        second_state, second = self._get()
+        other_range_state, _ = self._get(date_from="2026-01-01")
+
+        self.assertEqual(
+            (first_state, second_state, other_range_state), ("MISS", "HIT", "MISS")
+        )
+        self.assertEqual(first, second)
+        stats = self.client.get(f"{URL}cache-stats/").data
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["hit_rate"], round(1 / 3, 4))
+        self.assertEqual(stats["compute_count"], 2)
+
+    def test_phase_invoice_change_invalidates(self) -> None:
+        self._get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/v1/finance/phases/{self.phase.id}/",
+                {"invoice_amount": "2500.00"},
+                format="json",
+            )
+        state, data = self._get()
+
+        self.assertEqual(state, "MISS")
+        self.assertEqual(data["revenue"]["total_invoiced"], "2500.00")
+
+    def test_time_entry_writes_invalidate(self) -> None:
+        self._get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delta = RollupDelta()
+            TimeEntryUpsertService.upsert(
+                [
+                    TimeEntry(
+                        clockify_id="cache-1",
+                        project=self.project,
+                        user_name="Dev",
+                        user_email="dev@test.com",
+                        duration_hours=Decimal("2.00"),
+                        cost=Decimal("200.00"),
+                        date=date(2026, 1, 5),
+                    )
+                ],
+                delta,
+            )
+            FinancialRollupService.apply_delta(delta)
+        state, data = self._get()
+
+        self.assertEqual(state, "MISS")
+        self.assertEqual(data["costs"]["total_consumed_hours"], "2.00")
+
+    def test_admin_edits_and_rebuilds_invalidate(self) -> None:
+        entry = TimeEntry.objects.create(
+            clockify_id="cache-admin",
+            project=self.project,
+            user_name="Dev",
+            user_email="dev@test.com",
+            duration_hours=Decimal("2.00"),
+            cost=Decimal("200.00"),
+            date=date(2026, 1, 5),
+        )
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            FinancialRollupService.rebuild([self.project.id])
+            DailyFactService.rebuild([self.project.id])
+        state, data = self._get()
+        self.assertEqual(state, "MISS")
+        self.assertEqual(data["costs"]["total_consumed_hours"], "2.00")
+
+        request = RequestFactory().post("/admin/")
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeEntryAdmin(TimeEntry, admin.site).delete_model(request, entry)
+        state, data = self._get()
+        self.assertEqual(state, "MISS")
+        self.assertEqual(data["costs"]["total_consumed_hours"], "0.00")
+
+        self.phase.invoice_amount = Decimal("1500.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectAdmin(Project, admin.site).save_model(request, self.project, None, True)
+            self.phase.save()
+        state, data = self._get()
+        self.assertEqual(state, "MISS")
+        self.assertEqual(data["revenue"]["total_invoiced"], "1500.00")
+
+    @override_settings(CEO_DASHBOARD_STALE_WHILE_REVALIDATE=True)
+    def test_stale_while_revalidate(self) -> None:
+        _, first = self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            CeoDashboardCache.invalidate("test")
+
+        with patch("apps.integrations.tasks.refresh_ceo_dashboard.delay") as delay:
+            state, stale = self._get()
+            self._get()  # ya hay un recalculo en vuelo
+
+        self.assertEqual(state, "STALE")
+        self.assertEqual(stale, first)
+        delay.assert_called_once_with([self.project.id], None, None)
+
+        CeoDashboardCache.refresh([self.project.id], None, None)
+        self.assertEqual(self._get()[0], "HIT")
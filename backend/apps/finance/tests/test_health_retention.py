@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.finance.models import HealthSnapshot, Project
+from apps.finance.services import HealthSnapshotRetentionService
+from apps.integrations.tasks import compact_health_snapshots
+
+User = get_user_model()
+
+NOW = timezone.make_aware(datetime(2026, 10, 18, 12, 0))
+
+
+class HealthSnapshotRetentionTest(TestCase):
+    """Tests de los niveles de retencion hourly/daily/weekly."""
+
+    def setUp(self) -> None:
+        self.projects = [
+            Project.objects.create(
+                name=f"Retencion {i}",
+                code=f"RET-{i}",
+                client_name="Acme Corp",
+                budget_hours=Decimal("100.00"),
+                client_invoice_amount=Decimal("10000.00"),
+                target_margin=Decimal("30.00"),
+            )
+            for i in range(2)
+        ]
+
+    def _snapshot(self, when: datetime, project: Project | None = None) -> HealthSnapshot:
+        snapshot = HealthSnapshot.objects.create(
+            project=project or self.projects[0],
+            consumption_percent=Decimal("10.00"),
+            progress_percent=Decimal("10.00"),
+            budget_consumed=Decimal("0.00"),
+            earned_value=Decimal("0.00"),
+            health_status="HEALTHY",
+        )
+        # timestamp es auto_now_add: se fija despues de crear
+        HealthSnapshot.objects.filter(pk=snapshot.pk).update(timestamp=when)
+        return snapshot
+
+    def _hours(
+        self, day: datetime, hours: tuple[int, ...], project: Project | None = None
+    ) -> list[HealthSnapshot]:
+        return [self._snapshot(day.replace(hour=h), project) for h in hours]
+
+    def test_compaction_keeps_one_per_tier_bucket(self) -> None:
+        recent = self._hours(NOW - timedelta(days=1), (9, 10, 11))
+        month_ago = self._hours(NOW - timedelta(days=20), (9, 10, 23))
+        other_project = self._hours(NOW - timedelta(days=20), (8, 9), self.projects[1])
+        # Lunes y miercoles de una semana de hace mas de un anio
+        monday = NOW - timedelta(days=400 + (NOW - timedelta(days=400)).weekday())
+        old_week = self._hours(monday, (9, 18))
+        old_week += self._hours(monday + timedelta(days=2), (9, 18))
+
+        # Un DELETE con subquery por nivel, mas el savepoint (2)
+        with self.assertNumQueries(4):
+            deleted = HealthSnapshotRetentionService.compact(now=NOW)
+
+        kept = set(HealthSnapshot.objects.values_list("pk", flat=True))
+        self.assertEqual(
+            kept,
+            {s.pk for s in recent} | {month_ago[-1].pk, other_project[-1].pk, old_week[-1].pk},
+        )
+        self.assertEqual(deleted, 2 + 1 + 3)
+        self.assertEqual(HealthSnapshotRetentionService.compact(now=NOW), 0)
+
+    def test_cutoff_does_not_split_a_day(self) -> None:
+        # Dia del corte de 14 dias: sus snapshots siguen en el nivel hourly
+        boundary = self._hours(NOW - timedelta(days=14), (0, 6, 12))
+        HealthSnapshotRetentionService.compact(now=NOW)
+        self.assertEqual(HealthSnapshot.objects.count(), len(boundary))
+
+    def test_task_runs_compaction(self) -> None:
+        self._hours(timezone.now() - timedelta(days=30), (9, 10))
+        result = compact_health_snapshots.apply().get()
+        self.assertEqual(result["deleted"], 1)
+
+    def test_health_history_resolution(self) -> None:
+        project = self.projects[0]
+        day_one = self._hours(NOW - timedelta(days=3), (9, 10, 11))
+        day_two = self._hours(NOW - timedelta(days=2), (9, 10))
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("ceo", "ceo@test.com", "x"))
+        url = f"/api/v1/finance/projects/{project.id}/health-history/"
+
+        hourly = client.get(url).data
+        daily = client.get(url, {"resolution": "daily"}).data
+        invalid = client.get(url, {"resolution": "monthly"})
+
+        self.assertEqual(len(hourly), 5)
+        self.assertEqual([s["id"] for s in daily], [day_two[-1].pk, day_one[-1].pk])
+        self.assertEqual(invalid.status_code, 400)
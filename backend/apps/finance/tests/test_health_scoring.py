@@ -0,0 +1,102 @@
+from decimal import Decimal
+from io import StringIO
+from itertools import product
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.finance.health_scoring import STATUS_LABELS, evaluate_health_vectorized
+from apps.finance.models import HealthSnapshot, Project
+from apps.finance.services import HealthThresholds, TripleAxisService
+
+
+class VectorizedHealthParityTest(SimpleTestCase):
+    """La version vectorizada debe coincidir exactamente con evaluate_health."""
+
+    def _assert_parity(
+        self, pairs: list[tuple[Decimal, Decimal]], thresholds: HealthThresholds
+    ) -> None:
+        consumption = np.array([float(c) for c, _ in pairs])
+        progress = np.array([float(p) for _, p in pairs])
+
+        status, score = evaluate_health_vectorized(consumption, progress, thresholds)
+
+        for i, (c, p) in enumerate(pairs):
+            expected = TripleAxisService.evaluate_health(c, p, thresholds)
+            self.assertEqual(
+                (STATUS_LABELS[status[i]], int(score[i])),
+                expected,
+                f"consumo={c} progreso={p}",
+            )
+
+    def test_parity_on_grid_and_boundaries(self) -> None:
+        values = [Decimal(v) / 100 for v in range(0, 15001, 137)]
+        # Bordes de cada regla y sus vecinos a 0.01
+        edges = [Decimal(v) for v in ("0", "10", "15", "50", "80", "100", "150")]
+        steps = (Decimal("-0.01"), Decimal("0"), Decimal("0.01"))
+        values += [e + d for e in edges for d in steps if e + d >= 0]
+        progress = [Decimal(v) / 100 for v in range(0, 12001, 251)] + edges
+        pairs = list(product(values, progress))
+        deviations = map(Decimal, ("9.99", "10", "10.01", "14.99", "15", "15.01"))
+        pairs += [(c, c + d) for d in deviations for c in edges]
+
+        self._assert_parity(pairs, HealthThresholds())
+
+    def test_parity_with_alternative_thresholds(self) -> None:
+        rng = np.random.default_rng(42)
+        pairs = [
+            (Decimal(int(c)) / 100, Decimal(int(p)) / 100)
+            for c, p in rng.integers(0, 15000, size=(5000, 2))
+        ]
+        thresholds = HealthThresholds(
+            critical_consumption=Decimal("70.50"),
+            critical_progress=Decimal("40"),
+            warning_deviation=Decimal("12.25"),
+            healthy_deviation=Decimal("20"),  # mayor que warning: la regla WARNING gana
+        )
+
+        self._assert_parity(pairs, thresholds)
+
+
+class RescoreHealthHistoryCommandTest(TestCase):
+    def setUp(self) -> None:
+        project = Project.objects.create(
+            name="Backtest",
+            code="BCK-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        for consumption, progress in (("85.00", "40.00"), ("60.00", "42.00"), ("50.00", "45.00")):
+            status, score = TripleAxisService.evaluate_health(
+                Decimal(consumption), Decimal(progress)
+            )
+            HealthSnapshot.objects.create(
+                project=project,
+                consumption_percent=Decimal(consumption),
+                progress_percent=Decimal(progress),
+                budget_consumed=Decimal("0.00"),
+                earned_value=Decimal("0.00"),
+                health_status=status,
+                health_score=score,
+            )
+
+    def test_reports_status_changes(self) -> None:
+        out = StringIO()
+
+        call_command(
+            "rescore_health_history",
+            "--warning-deviation", "20",
+            "--critical-consumption", "90",
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("Snapshots: 3", output)
+        self.assertIn("Stored status differs from current rules: 0", output)
+        self.assertIn("CRITICAL -> WARNING: 1", output)
+        # Desviacion 18 ya no supera 20 pero cae en la zona intermedia: sigue WARNING
+        self.assertIn("1 snapshots change status", output)
+        self.assertEqual(HealthSnapshot.objects.filter(health_status="CRITICAL").count(), 1)
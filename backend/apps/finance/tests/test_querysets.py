@@ -0,0 +1,205 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.finance.models import (
+    BillingRole,
+    ChangeRequest,
+    ChangeRequestPhaseImpact,
+    HealthSnapshot,
+    Phase,
+    Project,
+    ProjectRoleRate,
+    Sprint,
+    TimeEntry,
+)
+from apps.finance.serializers import (
+    ClientProjectDetailSerializer,
+    PortfolioProjectSerializer,
+    ProjectDetailSerializer,
+    ProjectListSerializer,
+)
+
+
+class ProjectWithFinancialsTest(TestCase):
+    """Tests para Project.objects.with_financials() y los serializers que lo usan."""
+
+    def _create_project(self, code: str) -> Project:
+        project = Project.objects.create(
+            name=f"Proyecto {code}",
+            code=code,
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        for i in range(2):
+            TimeEntry.objects.create(
+                clockify_id=f"{code}-{i}",
+                project=project,
+                user_name="Dev User",
+                user_email="dev@test.com",
+                duration_hours=Decimal("10.00"),
+                cost=Decimal("700.00"),
+                date="2026-01-15",
+            )
+        for progress in ("20.00", "35.00"):
+            HealthSnapshot.objects.create(
+                project=project,
+                consumption_percent=Decimal("20.00"),
+                progress_percent=Decimal(progress),
+                budget_consumed=Decimal("1400.00"),
+                earned_value=Decimal(progress) * 100,
+                health_status="HEALTHY",
+            )
+        return project
+
+    def test_annotations_match_aggregates(self) -> None:
+        self._create_project("P-1")
+        Project.objects.create(
+            name="Vacio",
+            code="P-0",
+            client_name="Acme Corp",
+            budget_hours=Decimal("0.00"),
+            client_invoice_amount=Decimal("0.00"),
+            target_margin=Decimal("0.00"),
+        )
+
+        projects = {p.code: p for p in Project.objects.with_financials()}
+
+        self.assertEqual(projects["P-1"].total_consumed_hours, Decimal("20"))
+        self.assertEqual(projects["P-1"].total_actual_cost, Decimal("1400"))
+        self.assertEqual(projects["P-1"].latest_progress_percent, Decimal("35.00"))
+        self.assertEqual(projects["P-1"].latest_earned_value, Decimal("3500.00"))
+        self.assertEqual(projects["P-0"].total_consumed_hours, Decimal("0"))
+        self.assertIsNone(projects["P-0"].latest_progress_percent)
+
+    def test_serializers_match_unannotated_fallback(self) -> None:
+        self._create_project("P-1")
+
+        annotated = Project.objects.with_financials().get(code="P-1")
+        plain = Project.objects.get(code="P-1")
+
+        for serializer_class in (ProjectListSerializer, PortfolioProjectSerializer):
+            self.assertEqual(
+                serializer_class(annotated).data, serializer_class(plain).data
+            )
+
+    def test_list_query_count_independent_of_project_count(self) -> None:
+        self._create_project("P-1")
+        with CaptureQueriesContext(connection) as one_project:
+            ProjectListSerializer(Project.objects.with_financials(), many=True).data
+
+        for i in range(2, 6):
+            self._create_project(f"P-{i}")
+        with CaptureQueriesContext(connection) as many_projects:
+            data = ProjectListSerializer(
+                Project.objects.with_financials(), many=True
+            ).data
+
+        self.assertEqual(len(data), 5)
+        self.assertEqual(len(one_project), 1)
+        self.assertEqual(len(many_projects), 1)
+
+
+class ProjectDetailPrefetchTest(TestCase):
+    """Tests de with_phase_details(): fases, impactos de CR y tarifa sin N+1."""
+
+    def _create_project(self, code: str, phase_count: int) -> Project:
+        project = Project.objects.create(
+            name=f"Proyecto {code}",
+            code=code,
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        sprint = Sprint.objects.create(project=project, name="Sprint 1")
+        ProjectRoleRate.objects.create(
+            project=project,
+            billing_role=BillingRole.objects.get_or_create(
+                role_name="Dev", defaults={"default_hourly_rate": Decimal("600.00")}
+            )[0],
+            hourly_rate=Decimal("650.00"),
+        )
+        for i in range(phase_count):
+            phase = Phase.objects.create(
+                project=project, name=f"Fase {i}", estimated_hours=Decimal("20.00"), sort_order=i
+            )
+            TimeEntry.objects.create(
+                clockify_id=f"{code}-{i}",
+                project=project,
+                phase=phase,
+                user_name="Dev User",
+                user_email="dev@test.com",
+                duration_hours=Decimal("4.50"),
+                cost=Decimal("2700.00"),
+                date="2026-01-15",
+            )
+            for status, charged in (("accepted", True), ("in_review", False), ("completed", False)):
+                cr = ChangeRequest.objects.create(
+                    sprint=sprint,
+                    description=f"CR {i} {status}",
+                    status=status,
+                    is_charged=charged,
+                    charged_amount=Decimal("1000.00") if charged else None,
+                )
+                ChangeRequestPhaseImpact.objects.create(
+                    change_request=cr, phase=phase, estimated_hours=Decimal("3.00")
+                )
+        return project
+
+    def test_prefetched_detail_matches_fallback(self) -> None:
+        project = self._create_project("P-1", phase_count=3)
+
+        prefetched = Project.objects.with_financials().with_phase_details().get(pk=project.pk)
+        plain = Project.objects.get(pk=project.pk)
+
+        for serializer_class in (ProjectDetailSerializer, ClientProjectDetailSerializer):
+            data = serializer_class(prefetched).data
+            self.assertEqual(data, serializer_class(plain).data)
+        phase = data["phases"][0]
+        self.assertEqual(phase["actual_hours"], "4.50")
+        self.assertEqual(phase["cr_impact"]["count"], 2)
+        # 3h absorbidas a la tarifa efectiva 2700 / 4.5 = 600
+        self.assertEqual(phase["cr_impact"]["total_absorbed"], "1800.00")
+
+    def test_detail_query_count_independent_of_phase_count(self) -> None:
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("ceo", "ceo@test.com", "x"))
+        small = self._create_project("P-1", phase_count=1)
+        large = self._create_project("P-2", phase_count=8)
+        client.get(f"/api/v1/finance/projects/{small.pk}/")  # perfil del usuario en cache
+
+        with CaptureQueriesContext(connection) as small_queries:
+            client.get(f"/api/v1/finance/projects/{small.pk}/")
+        with CaptureQueriesContext(connection) as large_queries:
+            response = client.get(f"/api/v1/finance/projects/{large.pk}/")
+
+        self.assertEqual(len(response.data["phases"]), 8)
+        # proyecto, fases, impactos de CR, tarifas, roles, ultimo snapshot
+        self.assertEqual(len(small_queries), 6)
+        self.assertEqual(len(large_queries), len(small_queries))
+
+    def test_anticipo_response_reflects_recomputed_phases(self) -> None:
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser("ceo", "ceo@test.com", "x"))
+        project = self._create_project("P-1", phase_count=2)
+        project.phases.update(invoice_amount=Decimal("5000.00"))
+
+        response = client.patch(
+            f"/api/v1/finance/projects/{project.pk}/anticipo/",
+            {"anticipo_amount": "5000.00", "anticipo_date": "2026-01-10"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        paid = {p["name"]: p["is_paid"] for p in response.data["phases"]}
+        self.assertEqual(paid, {"Fase 0": True, "Fase 1": False})
+        self.assertEqual(
+            paid, dict(project.phases.values_list("name", "is_paid"))
+        )
@@ -0,0 +1,146 @@
+import json
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.finance.models import (
+    BillingRole,
+    Project,
+    ProjectRoleRate,
+    TimeEntry,
+    UserBillingRole,
+)
+from apps.finance.services import RateCard
+
+
+class RateCardTest(TestCase):
+    """Tests de RateCard: rol por email, tarifas con vigencia y costo."""
+
+    def setUp(self) -> None:
+        self.dev = BillingRole.objects.create(role_name="Dev", default_hourly_rate=Decimal("600.00"))
+        self.pm = BillingRole.objects.create(role_name="PM", default_hourly_rate=Decimal("900.00"))
+        self.project, self.other = (
+            Project.objects.create(
+                name=f"Proyecto {code}",
+                code=code,
+                client_name="Acme Corp",
+                budget_hours=Decimal("100.00"),
+                client_invoice_amount=Decimal("10000.00"),
+                target_margin=Decimal("30.00"),
+            )
+            for code in ("CARD-1", "CARD-2")
+        )
+        UserBillingRole.objects.create(user_email="PM@Test.com", billing_role=self.pm)
+        # PM en CARD-1: 700 desde siempre, 800 desde febrero, 850 desde marzo
+        for effective_from, rate in (
+            (None, "700.00"),
+            (date(2026, 2, 1), "800.00"),
+            (date(2026, 3, 1), "850.00"),
+        ):
+            ProjectRoleRate.objects.create(
+                project=self.project,
+                billing_role=self.pm,
+                hourly_rate=Decimal(rate),
+                effective_from=effective_from,
+            )
+
+    def test_role_by_email_with_default_fallback(self) -> None:
+        card = RateCard.load(default_to_first_role=True)
+
+        self.assertEqual(card.role_for("pm@test.com"), self.pm)
+        self.assertEqual(card.role_for("PM@TEST.COM"), self.pm)
+        # Sin asignacion: el primer rol por nombre, como el sync original
+        self.assertEqual(card.role_for("nuevo@test.com"), self.dev)
+        self.assertEqual(card.role_for(""), self.dev)
+
+    def test_unmapped_user_has_no_role_by_default(self) -> None:
+        card = RateCard.load()
+
+        self.assertEqual(card.role_for("pm@test.com"), self.pm)
+        self.assertIsNone(card.role_for("nuevo@test.com"))
+
+    def test_effective_dated_overrides(self) -> None:
+        card = RateCard.load()
+
+        rates = [
+            card.hourly_rate(self.project.id, self.pm, on_date)
+            for on_date in (date(2025, 12, 31), date(2026, 2, 1), date(2026, 2, 28), date(2026, 6, 1))
+        ]
+        self.assertEqual(rates, [Decimal("700.00"), Decimal("800.00"), Decimal("800.00"), Decimal("850.00")])
+        self.assertEqual(card.hourly_rate(self.other.id, self.pm, date(2026, 6, 1)), Decimal("900.00"))
+        self.assertEqual(card.hourly_rate(self.project.id, self.dev, date(2026, 6, 1)), Decimal("600.00"))
+        self.assertEqual(card.hourly_rate(self.project.id, None, date(2026, 6, 1)), Decimal("0.00"))
+
+    def test_dated_only_override_falls_back_before_first_date(self) -> None:
+        ProjectRoleRate.objects.create(
+            project=self.other,
+            billing_role=self.dev,
+            hourly_rate=Decimal("650.00"),
+            effective_from=date(2026, 2, 1),
+        )
+        card = RateCard.load([self.other.id])
+
+        self.assertEqual(card.hourly_rate(self.other.id, self.dev, date(2026, 1, 31)), Decimal("600.00"))
+        self.assertEqual(card.hourly_rate(self.other.id, self.dev, date(2026, 2, 1)), Decimal("650.00"))
+        # Overrides de otros proyectos no se cargan
+        self.assertEqual(card.hourly_rate(self.project.id, self.pm, date(2026, 6, 1)), Decimal("900.00"))
+
+    def test_cost_prefers_source_amount_and_counts_drift(self) -> None:
+        card = RateCard.load()
+
+        self.assertEqual(
+            card.cost(self.project.id, self.pm, Decimal("1.5000"), date(2026, 2, 10)),
+            Decimal("1200.00"),
+        )
+        self.assertEqual(
+            card.cost(self.project.id, self.pm, Decimal("1.5"), date(2026, 2, 10), amount=Decimal("1200.00")),
+            Decimal("1200.00"),
+        )
+        self.assertEqual(
+            card.cost(self.project.id, self.pm, Decimal("1.5"), date(2026, 2, 10), amount=Decimal("1000.00")),
+            Decimal("1000.00"),
+        )
+        self.assertEqual(card.drift, 1)
+
+    def test_load_is_three_queries(self) -> None:
+        with self.assertNumQueries(3):
+            card = RateCard.load([self.project.id, self.other.id])
+        with self.assertNumQueries(0):
+            card.cost(self.project.id, card.role_for("pm@test.com"), Decimal("2"), date(2026, 3, 2))
+
+
+class LoadCleanDataRoleTest(TestCase):
+    """load_clean_data resuelve roles con el RateCard sin asignar rol a desconocidos."""
+
+    def test_unmapped_user_keeps_no_role(self) -> None:
+        entry = {"hours": "2.00", "amount": "1000.00", "date": "2026-01-05", "description": "x"}
+        data = {
+            "stats": {"total_entries": 2, "total_projects": 1, "total_people": 2},
+            "projects": {
+                "Nespresso": {
+                    "is_internal": False,
+                    "total_hours": "4.00",
+                    "total_amount": "2000.00",
+                    "entries": [
+                        {**entry, "user": "Camila Veliz"},
+                        {**entry, "user": "Persona Nueva"},
+                    ],
+                }
+            },
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "clean.json"
+            path.write_text(json.dumps(data), encoding="utf-8")
+            call_command("load_clean_data", json_file=str(path), stdout=StringIO())
+
+        roles = dict(TimeEntry.objects.values_list("user_name", "billing_role__role_name"))
+        self.assertEqual(roles, {"Camila Veliz": "Disenador UX/UI", "Persona Nueva": None})
+        self.assertEqual(
+            UserBillingRole.objects.get(user_email="camila@appix.mx").billing_role.role_name,
+            "Disenador UX/UI",
+        )
@@ -0,0 +1,107 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.finance.models import BillingRole, Project, TimeEntry
+from apps.finance.services import (
+    FinancialRollupService,
+    RateService,
+    RollupDelta,
+    TimeEntryUpsertService,
+)
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RateServiceTest(TestCase):
+    """Tests de RateService: definicion unica, lote, cache versionado y roles."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.dev = BillingRole.objects.create(role_name="Dev", default_hourly_rate=Decimal("600.00"))
+        self.pm = BillingRole.objects.create(role_name="PM", default_hourly_rate=Decimal("900.00"))
+        self.projects = [
+            Project.objects.create(
+                name=f"Proyecto {i}",
+                code=f"RATE-{i}",
+                client_name="Acme Corp",
+                budget_hours=Decimal("100.00"),
+                client_invoice_amount=Decimal("10000.00"),
+                target_margin=Decimal("30.00"),
+            )
+            for i in range(3)
+        ]
+        # Proyecto 0: 10h Dev a 600 + 5h PM a 900; proyecto 1: 4h sin rol a 250
+        self._load([
+            self._entry("r-1", self.projects[0], "10.00", "6000.00", self.dev),
+            self._entry("r-2", self.projects[0], "5.00", "4500.00", self.pm),
+            self._entry("r-3", self.projects[1], "4.00", "1000.00", None),
+        ])
+
+    @staticmethod
+    def _entry(
+        clockify_id: str, project: Project, hours: str, cost: str, role: BillingRole | None
+    ) -> TimeEntry:
+        return TimeEntry(
+            clockify_id=clockify_id,
+            project=project,
+            billing_role=role,
+            user_name="Dev",
+            user_email="dev@test.com",
+            duration_hours=Decimal(hours),
+            cost=Decimal(cost),
+            date=date(2026, 1, 5),
+        )
+
+    def _load(self, entries: list[TimeEntry]) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            delta = RollupDelta()
+            TimeEntryUpsertService.upsert(entries, delta)
+            FinancialRollupService.apply_delta(delta)
+
+    def test_bulk_rates_in_one_query_then_cached(self) -> None:
+        ids = [p.id for p in self.projects]
+
+        with self.assertNumQueries(1):
+            rates = RateService().for_projects(ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(RateService().for_projects(ids), rates)
+
+        self.assertEqual(rates[ids[0]], Decimal("10500") / Decimal("15"))
+        self.assertEqual(rates[ids[1]], Decimal("250"))
+        self.assertEqual(rates[ids[2]], RateService.DEFAULT_RATE)
+
+    def test_annotated_projects_need_no_query(self) -> None:
+        annotated = list(Project.objects.with_financials())
+
+        with self.assertNumQueries(0):
+            rates = RateService().for_projects(annotated)
+
+        self.assertEqual(rates, RateService().for_projects([p.id for p in self.projects]))
+
+    def test_sync_invalidates_cached_rates(self) -> None:
+        project_id = self.projects[1].id
+        self.assertEqual(RateService().for_project(project_id), Decimal("250"))
+
+        self._load([self._entry("r-4", self.projects[1], "4.00", "3000.00", None)])
+
+        self.assertEqual(RateService().for_project(project_id), Decimal("500"))
+
+    def test_role_and_portfolio_rates(self) -> None:
+        service = RateService()
+
+        self.assertEqual(
+            service.for_roles(self.projects[0]),
+            {self.dev.id: Decimal("600"), self.pm.id: Decimal("900")},
+        )
+        self.assertEqual(
+            service.for_roles(),
+            {self.dev.id: Decimal("600"), self.pm.id: Decimal("900"), None: Decimal("250")},
+        )
+        self.assertEqual(service.portfolio(), Decimal("11500") / Decimal("19"))
+        with self.assertNumQueries(0):
+            service.portfolio()
+            service.for_roles()
@@ -0,0 +1,203 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.finance.models import (
+    BillingRole,
+    Phase,
+    Project,
+    ProjectFinancialRollup,
+    TimeEntry,
+)
+from apps.finance.services import (
+    FinancialRollupService,
+    RollupDelta,
+    TimeEntryUpsertService,
+    TripleAxisService,
+)
+
+
+class FinancialRollupServiceTest(TestCase):
+    """Tests para ProjectFinancialRollup: rebuild completo y deltas incrementales."""
+
+    def setUp(self) -> None:
+        self.project = Project.objects.create(
+            name="Rollup",
+            code="RLP-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        self.other = Project.objects.create(
+            name="Otro",
+            code="RLP-002",
+            client_name="Acme Corp",
+            budget_hours=Decimal("50.00"),
+            client_invoice_amount=Decimal("5000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        self.phase = Phase.objects.create(
+            project=self.project, name="Dev", estimated_hours=Decimal("40.00")
+        )
+        self.role = BillingRole.objects.create(
+            role_name="Backend Dev", default_hourly_rate=Decimal("70.00")
+        )
+
+    def _create_time_entry(
+        self, clockify_id: str, hours: str, entry_date: date, phase: Phase | None = None
+    ) -> TimeEntry:
+        return TimeEntry.objects.create(
+            clockify_id=clockify_id,
+            project=self.project,
+            phase=phase,
+            billing_role=self.role,
+            user_name="Dev User",
+            user_email="dev@test.com",
+            duration_hours=Decimal(hours),
+            cost=Decimal(hours) * self.role.default_hourly_rate,
+            date=entry_date,
+        )
+
+    def _rollup_state(self, project: Project) -> tuple:
+        rollup = ProjectFinancialRollup.objects.get(project=project)
+        return (
+            rollup.consumed_hours,
+            rollup.actual_cost,
+            rollup.entry_count,
+            rollup.first_entry_date,
+            rollup.last_entry_date,
+            {k: Decimal(v["hours"]) for k, v in rollup.phase_subtotals.items()},
+            {k: Decimal(v["hours"]) for k, v in rollup.role_subtotals.items()},
+        )
+
+    def test_rebuild_totals_and_subtotals(self) -> None:
+        self._create_time_entry("a", "10.00", date(2026, 1, 5), self.phase)
+        self._create_time_entry("b", "5.00", date(2026, 1, 9))
+
+        self.assertEqual(FinancialRollupService.rebuild(), 2)
+
+        hours, cost, count, first, last, phases, roles = self._rollup_state(self.project)
+        self.assertEqual(hours, Decimal("15"))
+        self.assertEqual(cost, Decimal("1050"))
+        self.assertEqual(count, 2)
+        self.assertEqual((first, last), (date(2026, 1, 5), date(2026, 1, 9)))
+        self.assertEqual(phases, {str(self.phase.id): Decimal("10"), "none": Decimal("5")})
+        self.assertEqual(roles, {str(self.role.id): Decimal("15")})
+        self.assertEqual(self._rollup_state(self.other)[2], 0)
+
+    def test_delta_matches_rebuild_after_update_and_move(self) -> None:
+        entry = self._create_time_entry("a", "10.00", date(2026, 1, 5), self.phase)
+        self._create_time_entry("b", "5.00", date(2026, 1, 9))
+        FinancialRollupService.rebuild()
+
+        delta = RollupDelta()
+        # Cambia horas y fecha (frontera inferior) de "a"
+        delta.remove_entry(entry)
+        entry.duration_hours = Decimal("4.00")
+        entry.cost = Decimal("280.00")
+        entry.date = date(2026, 1, 7)
+        entry.phase = None
+        entry.save()
+        delta.add_entry(entry)
+        # Nueva entry en el otro proyecto
+        new_entry = TimeEntry.objects.create(
+            clockify_id="c",
+            project=self.other,
+            user_name="Dev User",
+            user_email="dev@test.com",
+            duration_hours=Decimal("2.00"),
+            cost=Decimal("140.00"),
+            date=date(2026, 2, 1),
+        )
+        delta.add_entry(new_entry)
+        FinancialRollupService.apply_delta(delta)
+
+        incremental = (self._rollup_state(self.project), self._rollup_state(self.other))
+        FinancialRollupService.rebuild()
+        rebuilt = (self._rollup_state(self.project), self._rollup_state(self.other))
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(incremental[0][3], date(2026, 1, 7))
+
+    def test_delta_without_rollup_rebuilds_project(self) -> None:
+        self._create_time_entry("a", "10.00", date(2026, 1, 5))
+        entry = self._create_time_entry("b", "5.00", date(2026, 1, 9))
+
+        delta = RollupDelta()
+        delta.add_entry(entry)
+        FinancialRollupService.apply_delta(delta)
+
+        self.assertEqual(self._rollup_state(self.project)[0], Decimal("15"))
+
+    def test_triple_axis_reads_rollup(self) -> None:
+        self._create_time_entry("a", "10.00", date(2026, 1, 5))
+        FinancialRollupService.rebuild([self.project.id])
+
+        with self.assertNumQueries(1):
+            consumed = TripleAxisService.calculate_consumed_hours(self.project)
+        self.assertEqual(consumed, Decimal("10"))
+        self.assertEqual(
+            TripleAxisService.calculate_consumption_percent(self.project),
+            Decimal("10.00"),
+        )
+
+    def test_rebuild_rollups_command(self) -> None:
+        self._create_time_entry("a", "10.00", date(2026, 1, 5))
+        out = StringIO()
+
+        call_command("rebuild_rollups", "--project", "RLP-001", stdout=out)
+
+        self.assertIn("1 rollups rebuilt", out.getvalue())
+        self.assertFalse(ProjectFinancialRollup.objects.filter(project=self.other).exists())
+        self.assertEqual(self._rollup_state(self.project)[0], Decimal("10"))
+
+    def test_upsert_skips_unchanged_and_deletes_stale(self) -> None:
+        def build(clockify_id: str, hours: str, day: int) -> TimeEntry:
+            return TimeEntry(
+                clockify_id=clockify_id,
+                project=self.project,
+                billing_role=self.role,
+                user_name="Dev User",
+                user_email="dev@test.com",
+                duration_hours=Decimal(hours),
+                cost=Decimal(hours) * 70,
+                date=date(2026, 1, day),
+            )
+
+        delta = RollupDelta()
+        TimeEntryUpsertService.upsert(
+            [build("csv-a", "1.00", 5), build("csv-b", "2.00", 6), build("csv-c", "3.00", 7)],
+            delta,
+        )
+        FinancialRollupService.apply_delta(delta)
+
+        delta = RollupDelta()
+        result = TimeEntryUpsertService.upsert(
+            [build("csv-a", "1.00", 5), build("csv-b", "4.00", 6)],
+            delta,
+            stale_scope=TimeEntry.objects.filter(clockify_id__startswith="csv-"),
+        )
+        FinancialRollupService.apply_delta(delta)
+
+        self.assertEqual(
+            result, {"inserted": 0, "updated": 1, "skipped": 1, "deleted": 1}
+        )
+        incremental = self._rollup_state(self.project)
+        FinancialRollupService.rebuild([self.project.id])
+        self.assertEqual(incremental, self._rollup_state(self.project))
+        self.assertEqual(incremental[0], Decimal("5"))
+
+    def test_save_keeps_content_hash_current(self) -> None:
+        entry = self._create_time_entry("a", "10.00", date(2026, 1, 5))
+        original = entry.content_hash
+
+        entry.description = "Otro"
+        entry.save(update_fields=["description"])
+
+        entry.refresh_from_db()
+        self.assertNotEqual(entry.content_hash, original)
+        self.assertEqual(entry.content_hash, entry.compute_content_hash())
@@ -1,6 +1,8 @@
+from datetime import date, datetime
 from decimal import Decimal
 
 from django.test import TestCase
+from django.utils import timezone
 
 from apps.finance.models import (
     BillingRole,
@@ -9,7 +11,7 @@ from apps.finance.models import (
     ProjectHealthAlert,
     TimeEntry,
 )
-from apps.finance.services import TripleAxisService
+from apps.finance.services import BurndownService, TripleAxisService
 
 
 class TripleAxisServiceTest(TestCase):
@@ -151,3 +153,239 @@ class TripleAxisServiceTest(TestCase):
 
         snapshots = HealthSnapshot.objects.filter(project=self.project)
         self.assertEqual(snapshots.count(), 2)
+
+    def test_dedupe_extends_unchanged_snapshot(self) -> None:
+        """En modo dedupe una evaluacion repetida extiende valid_until."""
+        self._create_time_entry("50.00")
+
+        first = TripleAxisService.run_evaluation(
+            self.project, Decimal("45.00"), dedupe=True
+        )
+        again = TripleAxisService.run_evaluation(
+            self.project, Decimal("45.05"), dedupe=True, epsilon=Decimal("0.10")
+        )
+
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(HealthSnapshot.objects.filter(project=self.project).count(), 1)
+        first.refresh_from_db()
+        self.assertGreater(first.valid_until, first.timestamp)
+        self.assertEqual(first.progress_percent, Decimal("45.00"))
+
+    def test_dedupe_writes_on_movement_or_status_change(self) -> None:
+        self._create_time_entry("50.00")
+        TripleAxisService.run_evaluation(self.project, Decimal("45.00"), dedupe=True)
+
+        moved = TripleAxisService.run_evaluation(
+            self.project, Decimal("45.50"), dedupe=True, epsilon=Decimal("0.10")
+        )
+        status_changed = TripleAxisService.run_evaluation(
+            self.project, Decimal("20.00"), dedupe=True, epsilon=Decimal("100")
+        )
+
+        self.assertEqual(moved.progress_percent, Decimal("45.50"))
+        self.assertEqual(status_changed.health_status, "WARNING")
+        self.assertEqual(HealthSnapshot.objects.filter(project=self.project).count(), 3)
+        self.assertEqual(ProjectHealthAlert.objects.count(), 1)
+
+    def test_dedupe_writes_on_cost_change(self) -> None:
+        """Un cambio de tarifa mueve el costo real sin mover las horas."""
+        entry = self._create_time_entry("50.00")
+        first = TripleAxisService.run_evaluation(self.project, Decimal("45.00"), dedupe=True)
+
+        entry.cost = Decimal("50.00") * Decimal("90.00")
+        entry.save()
+        repriced = TripleAxisService.run_evaluation(
+            self.project, Decimal("45.00"), dedupe=True, epsilon=Decimal("0.10")
+        )
+
+        self.assertNotEqual(repriced.pk, first.pk)
+        self.assertEqual(repriced.consumption_percent, first.consumption_percent)
+        self.assertEqual(repriced.budget_consumed, Decimal("4500.00"))
+
+
+class EvaluatePortfolioTest(TestCase):
+    """Tests de TripleAxisService.evaluate_portfolio."""
+
+    def setUp(self) -> None:
+        self.role = BillingRole.objects.create(
+            role_name="Backend Dev",
+            default_hourly_rate=Decimal("70.00"),
+        )
+
+    def _create_project(self, code: str, hours: str | None = None) -> Project:
+        project = Project.objects.create(
+            name=f"Proyecto {code}",
+            code=code,
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("50000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        if hours is not None:
+            TimeEntry.objects.create(
+                clockify_id=f"clk-{code}",
+                project=project,
+                billing_role=self.role,
+                user_name="Dev User",
+                user_email="dev@test.com",
+                duration_hours=Decimal(hours),
+                cost=Decimal(hours) * self.role.default_hourly_rate,
+                date="2026-01-15",
+            )
+        return project
+
+    def test_matches_run_evaluation(self) -> None:
+        cases = [("85.00", "40.00"), ("60.00", "40.00"), ("55.00", "50.00"), (None, "0.00")]
+        portfolio = [self._create_project(f"PF-{i}", h) for i, (h, _) in enumerate(cases)]
+        single = [self._create_project(f"SG-{i}", h) for i, (h, _) in enumerate(cases)]
+        progress = {p.id: Decimal(c[1]) for p, c in zip(portfolio, cases)}
+
+        snapshots = TripleAxisService.evaluate_portfolio(portfolio, progress)
+        expected = [
+            TripleAxisService.run_evaluation(p, Decimal(c[1])) for p, c in zip(single, cases)
+        ]
+
+        fields = ("consumption_percent", "progress_percent", "budget_consumed",
+                  "earned_value", "health_status", "health_score")
+        for got, want in zip(snapshots, expected):
+            got.refresh_from_db()
+            self.assertEqual(
+                [getattr(got, f) for f in fields], [getattr(want, f) for f in fields]
+            )
+        self.assertEqual(
+            list(Project.objects.filter(code__startswith="PF-")
+                 .order_by("code").values_list("current_health_status", flat=True)),
+            ["CRITICAL", "WARNING", "HEALTHY", "HEALTHY"],
+        )
+        self.assertEqual(
+            sorted(ProjectHealthAlert.objects.filter(project__in=portfolio)
+                   .values_list("alert_type", flat=True)),
+            sorted(ProjectHealthAlert.objects.filter(project__in=single)
+                   .values_list("alert_type", flat=True)),
+        )
+
+    def test_projects_without_progress_are_skipped(self) -> None:
+        evaluated = self._create_project("PF-1", "10.00")
+        skipped = self._create_project("PF-2", "10.00")
+
+        snapshots = TripleAxisService.evaluate_portfolio(
+            [evaluated, skipped], {evaluated.id: Decimal("10.00")}
+        )
+
+        self.assertEqual([s.project_id for s in snapshots], [evaluated.id])
+        self.assertFalse(HealthSnapshot.objects.filter(project=skipped).exists())
+
+    def test_constant_query_count(self) -> None:
+        def evaluate(count: int, offset: int) -> None:
+            projects = [self._create_project(f"Q-{offset + i}", "85.00") for i in range(count)]
+            progress = {p.id: Decimal("40.00") for p in projects}
+            # agregado, snapshots, alertas, bulk_update y el savepoint (2)
+            with self.assertNumQueries(6):
+                TripleAxisService.evaluate_portfolio(projects, progress)
+
+        evaluate(2, 0)
+        evaluate(8, 100)
+
+    def test_dedupe_extends_unchanged_projects(self) -> None:
+        steady = self._create_project("PF-1", "50.00")
+        moving = self._create_project("PF-2", "50.00")
+        TripleAxisService.evaluate_portfolio(
+            [steady, moving], {steady.id: Decimal("45.00"), moving.id: Decimal("45.00")}
+        )
+        first = {s.project_id: s.pk for s in HealthSnapshot.objects.all()}
+
+        # agregado, ultimos snapshots, insert, dos bulk_update y el savepoint (2)
+        with self.assertNumQueries(7):
+            result = TripleAxisService.evaluate_portfolio(
+                [steady, moving],
+                {steady.id: Decimal("45.00"), moving.id: Decimal("47.00")},
+                dedupe=True,
+            )
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(HealthSnapshot.objects.filter(project=steady).count(), 1)
+        self.assertEqual(HealthSnapshot.objects.filter(project=moving).count(), 2)
+        extended = HealthSnapshot.objects.get(pk=first[steady.id])
+        self.assertGreater(extended.valid_until, extended.timestamp)
+
+
+class BurndownServiceTest(TestCase):
+    """Tests para la serie del Financial Burndown Chart."""
+
+    def setUp(self) -> None:
+        self.project = Project.objects.create(
+            name="Burndown",
+            code="BRN-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("1000.00"),
+            target_margin=Decimal("30.00"),
+        )
+
+    def _create_time_entry(self, cost: str, entry_date: date) -> TimeEntry:
+        return TimeEntry.objects.create(
+            clockify_id=f"brn-{TimeEntry.objects.count() + 1}",
+            project=self.project,
+            user_name="Dev User",
+            user_email="dev@test.com",
+            duration_hours=Decimal("1.00"),
+            cost=Decimal(cost),
+            date=entry_date,
+        )
+
+    def _create_snapshot(self, earned_value: str, when: datetime) -> None:
+        snapshot = HealthSnapshot.objects.create(
+            project=self.project,
+            consumption_percent=Decimal("0.00"),
+            progress_percent=Decimal("0.00"),
+            budget_consumed=Decimal("0.00"),
+            earned_value=Decimal(earned_value),
+            health_status="HEALTHY",
+        )
+        # timestamp es auto_now_add: se fija despues de crear
+        HealthSnapshot.objects.filter(pk=snapshot.pk).update(timestamp=when)
+
+    def test_no_entries_returns_empty_series(self) -> None:
+        self.assertEqual(BurndownService.build_series(self.project), [])
+
+    def test_cumulative_cost_and_earned_value(self) -> None:
+        self._create_time_entry("100.00", date(2026, 1, 1))
+        self._create_time_entry("50.00", date(2026, 1, 1))
+        self._create_time_entry("25.00", date(2026, 1, 3))
+        tz = timezone.get_current_timezone()
+        self._create_snapshot("200.00", datetime(2026, 1, 2, 9, 0, tzinfo=tz))
+        self._create_snapshot("300.00", datetime(2026, 1, 2, 18, 0, tzinfo=tz))
+
+        points = BurndownService.build_series(self.project, end_date=date(2026, 1, 5))
+
+        self.assertEqual([p["date"] for p in points], [
+            date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 3),
+            date(2026, 1, 4), date(2026, 1, 5),
+        ])
+        self.assertEqual(
+            [p["actual_cost_cumulative"] for p in points],
+            [Decimal("150.00"), Decimal("150.00"), Decimal("175.00"),
+             Decimal("175.00"), Decimal("175.00")],
+        )
+        self.assertEqual(
+            [p["earned_value_cumulative"] for p in points],
+            [Decimal("0.00"), Decimal("300.00"), Decimal("300.00"),
+             Decimal("300.00"), Decimal("300.00")],
+        )
+        # 1000 / 4 dias transcurridos
+        self.assertEqual(points[0]["budget_line"], Decimal("250.00"))
+        self.assertEqual(points[-1]["budget_line"], Decimal("1250.00"))
+
+    def test_query_count_independent_of_history_length(self) -> None:
+        """Regresion: 2 queries sin importar cuantos dias cubra la serie."""
+        self._create_time_entry("10.00", date(2025, 1, 1))
+        self._create_time_entry("10.00", date(2026, 1, 1))
+        tz = timezone.get_current_timezone()
+        self._create_snapshot("100.00", datetime(2025, 6, 1, 12, 0, tzinfo=tz))
+
+        with self.assertNumQueries(2):
+            points = BurndownService.build_series(
+                self.project, end_date=date(2026, 1, 1)
+            )
+
+        self.assertEqual(len(points), 366)
@@ -17,6 +17,11 @@ router.register("change-requests", views.ChangeRequestViewSet, basename="change-
 urlpatterns = [
     path("portfolio/", views.portfolio_view, name="portfolio"),
     path("ceo-dashboard/", views.ceo_dashboard, name="ceo-dashboard"),
+    path(
+        "ceo-dashboard/cache-stats/",
+        views.ceo_dashboard_cache_stats,
+        name="ceo-dashboard-cache-stats",
+    ),
     path("personal/", views.personal_dashboard, name="personal-dashboard"),
     path("", include(router.urls)),
 ]
@@ -1,9 +1,9 @@
-from datetime import timedelta
+import logging
+from datetime import date
 from decimal import Decimal
 
-from django.db.models import Count, Q, Sum
-from django.db.models.functions import TruncMonth
-from django.utils import timezone
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models.functions import Coalesce, TruncMonth
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
@@ -21,11 +21,13 @@ from apps.accounts.permissions import (
 )
 from apps.accounts.querysets import get_alerts_for_user, get_projects_for_user
 
+from .dashboard_cache import CeoDashboardCache
 from .models import (
     Advance,
     BillingRole,
     ChangeRequest,
     ChangeRequestPhaseImpact,
+    DailyTimeFact,
     HealthSnapshot,
     Phase,
     Project,
@@ -52,7 +54,15 @@ from .serializers import (
     SimpleChangeRequestSerializer,
     SprintDetailSerializer,
 )
-from .services import AnticipoCoverageService
+from .services import (
+    AnticipoCoverageService,
+    BurndownService,
+    HealthSnapshotRetentionService,
+    RateService,
+    TimeEntryClassificationService,
+)
+
+logger = logging.getLogger(__name__)
 
 QUANTIZE = Decimal("0.01")
 
@@ -73,7 +83,13 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ["name", "code", "updated_at"]
 
     def get_queryset(self):  # type: ignore[no-untyped-def]
-        return get_projects_for_user(self.request.user)
+        projects = get_projects_for_user(self.request.user)
+        if self.action == "retrieve":
+            return projects.with_phase_details()
+        return projects
+
+    def get_serializer_context(self):  # type: ignore[no-untyped-def]
+        return {**super().get_serializer_context(), "rates": RateService()}
 
     def get_serializer_class(self):  # type: ignore[no-untyped-def]
         if _is_client(self.request.user):
@@ -98,51 +114,7 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
         project = self.get_object()
-
-        first_entry = project.time_entries.order_by("date").first()
-        if not first_entry:
-            return Response([])
-
-        start_date = first_entry.date
-        end_date = timezone.now().date()
-        total_days = (end_date - start_date).days or 1
-
-        daily_budget = project.client_invoice_amount / total_days
-
-        points = []
-        current_date = start_date
-        cumulative_cost = Decimal("0.00")
-
-        while current_date <= end_date:
-            day_cost = (
-                project.time_entries.filter(date=current_date).aggregate(
-                    total=Sum("cost")
-                )["total"]
-                or Decimal("0.00")
-            )
-            cumulative_cost += day_cost
-
-            days_elapsed = (current_date - start_date).days + 1
-            budget_line = (daily_budget * days_elapsed).quantize(QUANTIZE)
-
-            snapshot = (
-                project.health_snapshots.filter(
-                    timestamp__date__lte=current_date
-                )
-                .order_by("-timestamp")
-                .first()
-            )
-            ev = snapshot.earned_value if snapshot else Decimal("0.00")
-
-            points.append(
-                {
-                    "date": current_date,
-                    "budget_line": budget_line,
-                    "actual_cost_cumulative": cumulative_cost.quantize(QUANTIZE),
-                    "earned_value_cumulative": ev,
-                }
-            )
-            current_date += timedelta(days=1)
+        points = BurndownService.build_series(project)
 
         serializer = BurndownPointSerializer(points, many=True)
         return Response(serializer.data)
@@ -182,8 +154,9 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=["get"], url_path="health-history")
     def health_history(self, request: Request, pk: int | None = None) -> Response:
         """
-        GET /api/v1/finance/projects/{id}/health-history/
-        Historial de snapshots de salud.
+        GET /api/v1/finance/projects/{id}/health-history/?resolution=daily
+        Historial de snapshots de salud. resolution: hourly (default, todo
+        lo retenido), daily o weekly (ultimo snapshot de cada dia/semana).
         """
         if _is_client(request.user):
             return Response(
@@ -191,8 +164,17 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        resolution = request.query_params.get("resolution", "hourly")
+        if resolution not in HealthSnapshotRetentionService.RESOLUTIONS:
+            return Response(
+                {"detail": "Resolucion invalida."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         project = self.get_object()
-        snapshots = project.health_snapshots.all()
+        snapshots = HealthSnapshotRetentionService.downsample(
+            project.health_snapshots.all(), resolution
+        )
         serializer = HealthSnapshotSerializer(snapshots, many=True)
         return Response(serializer.data)
 
@@ -245,6 +227,7 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         cr = serializer.save()
+        CeoDashboardCache.invalidate("change request")
         return Response(
             ChangeRequestSerializer(cr).data, status=status.HTTP_201_CREATED
         )
@@ -278,9 +261,12 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
         project.save()
 
         AnticipoCoverageService.recompute(project)
+        CeoDashboardCache.invalidate("anticipo")
 
+        # recompute() cambia is_paid de las fases: se leen ya actualizadas
+        project = self.get_queryset().with_phase_details().get(pk=project.pk)
         return Response(
-            ProjectDetailSerializer(project, context={"request": request}).data
+            ProjectDetailSerializer(project, context=self.get_serializer_context()).data
         )
 
 
@@ -346,6 +332,7 @@ class ChangeRequestViewSet(viewsets.GenericViewSet):
         serializer = ChangeRequestWriteSerializer(cr, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        CeoDashboardCache.invalidate("change request")
         return Response(ChangeRequestSerializer(cr).data)
 
 
@@ -365,6 +352,7 @@ class PhaseViewSet(viewsets.GenericViewSet):
         serializer = PhaseUpdateSerializer(phase, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        CeoDashboardCache.invalidate("phase invoice")
         return Response(PhaseSerializer(phase, context={"request": request}).data)
 
 
@@ -414,6 +402,10 @@ def ceo_dashboard(request: Request) -> Response:
     Query params:
         date_from: YYYY-MM-DD — filter time entries from this date
         date_to:   YYYY-MM-DD — filter time entries up to this date
+
+    The payload is cached per (visible project set, date_from, date_to) and
+    invalidated by CeoDashboardCache.invalidate(); the X-Dashboard-Cache
+    header reports HIT, MISS or STALE.
     """
     from datetime import date as date_type
 
@@ -432,6 +424,28 @@ def ceo_dashboard(request: Request) -> Response:
     except ValueError:
         pass
 
+    payload, cache_state = CeoDashboardCache.get_or_compute(
+        list(projects.values_list("id", flat=True)),
+        date_from,
+        date_to,
+        lambda: build_ceo_dashboard(projects, date_from, date_to),
+    )
+    response = Response(payload)
+    response["X-Dashboard-Cache"] = cache_state
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([CanSeePortfolio])
+def ceo_dashboard_cache_stats(request: Request) -> Response:
+    """GET /api/v1/finance/ceo-dashboard/cache-stats/ - Hit rate y tiempo de calculo."""
+    return Response(CeoDashboardCache.stats())
+
+
+def build_ceo_dashboard(
+    projects: QuerySet[Project], date_from: date | None, date_to: date | None
+) -> dict:
+    """Payload de ceo_dashboard sin cache, para el queryset y rango dados."""
     # --- Revenue ---
     total_contracted = projects.aggregate(
         total=Sum("client_invoice_amount")
@@ -456,20 +470,22 @@ def ceo_dashboard(request: Request) -> Response:
     )
 
     # --- Costs ---
+    # Aggregates come from the daily fact table; raw entries are only
+    # grouped by their stored classification (development goals).
     entries = TimeEntry.objects.filter(project__in=projects)
+    facts = DailyTimeFact.objects.filter(project__in=projects)
     if date_from:
         entries = entries.filter(date__gte=date_from)
+        facts = facts.filter(date__gte=date_from)
     if date_to:
         entries = entries.filter(date__lte=date_to)
-    total_actual_cost = entries.aggregate(
-        total=Sum("cost")
-    )["total"] or Decimal("0")
+        facts = facts.filter(date__lte=date_to)
+    fact_totals = facts.aggregate(cost=Sum("total_cost"), hours=Sum("total_hours"))
+    total_actual_cost = fact_totals["cost"] or Decimal("0")
     total_budget_hours = projects.aggregate(
         total=Sum("budget_hours")
     )["total"] or Decimal("0")
-    total_consumed_hours = entries.aggregate(
-        total=Sum("duration_hours")
-    )["total"] or Decimal("0")
+    total_consumed_hours = fact_totals["hours"] or Decimal("0")
     overall_margin = (
         ((total_contracted - total_actual_cost) / total_contracted * 100)
         if total_contracted > 0 else Decimal("0")
@@ -494,10 +510,7 @@ def ceo_dashboard(request: Request) -> Response:
     cr_absorbed_hours = absorbed_impacts.aggregate(
         total=Sum("estimated_hours")
     )["total"] or Decimal("0")
-    effective_rate = (
-        (total_actual_cost / total_consumed_hours) if total_consumed_hours > 0
-        else Decimal("500")
-    )
+    effective_rate = RateService.effective_rate(total_actual_cost, total_consumed_hours)
     cr_absorbed_cost = cr_absorbed_hours * effective_rate
 
     # --- Health ---
@@ -508,15 +521,15 @@ def ceo_dashboard(request: Request) -> Response:
 
     at_risk_projects = []
     for p in projects.filter(current_health_status__in=["CRITICAL", "WARNING"]):
-        consumed = p.time_entries.aggregate(
-            total=Sum("duration_hours")
-        )["total"] or Decimal("0")
+        consumed = p.total_consumed_hours
         consumption_pct = (
             (consumed / p.budget_hours * 100) if p.budget_hours > 0
             else Decimal("0")
         )
-        latest = p.health_snapshots.order_by("-timestamp").first()
-        progress = latest.progress_percent if latest else Decimal("0")
+        progress = (
+            p.latest_progress_percent.quantize(QUANTIZE)
+            if p.latest_progress_percent is not None else Decimal("0")
+        )
         at_risk_projects.append({
             "id": p.id,
             "name": p.name,
@@ -529,10 +542,10 @@ def ceo_dashboard(request: Request) -> Response:
 
     # --- Team utilization ---
     team_data = (
-        entries.values("user_name")
+        facts.values("user_name")
         .annotate(
-            hours=Sum("duration_hours"),
-            cost=Sum("cost"),
+            hours=Sum("total_hours"),
+            cost=Sum("total_cost"),
             project_count=Count("project", distinct=True),
         )
         .order_by("-hours")
@@ -540,8 +553,8 @@ def ceo_dashboard(request: Request) -> Response:
 
     # --- Team utilization split (internal vs client) ---
     team_split_qs = (
-        entries.values("user_name", "project__is_internal")
-        .annotate(hours=Sum("duration_hours"))
+        facts.values("user_name", "project__is_internal")
+        .annotate(hours=Sum("total_hours"))
         .order_by("user_name")
     )
     utilization_map: dict[str, dict[str, Decimal]] = {}
@@ -567,8 +580,8 @@ def ceo_dashboard(request: Request) -> Response:
 
     # --- Team flow (person -> project, for Sankey) ---
     team_flow_qs = (
-        entries.values("user_name", "project__name", "project__is_internal")
-        .annotate(hours=Sum("duration_hours"))
+        facts.values("user_name", "project__name", "project__is_internal")
+        .annotate(hours=Sum("total_hours"))
         .order_by("-hours")
     )
     team_flow = [
@@ -585,14 +598,10 @@ def ceo_dashboard(request: Request) -> Response:
     # --- Top overbudget ---
     overbudget = []
     for p in projects.filter(budget_hours__gt=0):
-        consumed = p.time_entries.aggregate(
-            total=Sum("duration_hours")
-        )["total"] or Decimal("0")
+        consumed = p.total_consumed_hours
         if consumed > p.budget_hours:
             overage_pct = ((consumed - p.budget_hours) / p.budget_hours * 100)
-            actual_cost = p.time_entries.aggregate(
-                total=Sum("cost")
-            )["total"] or Decimal("0")
+            actual_cost = p.total_actual_cost
             overbudget.append({
                 "id": p.id,
                 "name": p.name,
@@ -622,15 +631,15 @@ def ceo_dashboard(request: Request) -> Response:
 
     # --- Hour compliance heatmap (person x month) ---
     # Use date-filtered entries; if no filter, default to 2026-01+ (real data)
-    compliance_entries = entries
+    compliance_facts = facts
     if not date_from and not date_to:
         from datetime import date as date_cls
-        compliance_entries = entries.filter(date__gte=date_cls(2026, 1, 1))
+        compliance_facts = facts.filter(date__gte=date_cls(2026, 1, 1))
     compliance_qs = (
-        compliance_entries
+        compliance_facts
         .annotate(month=TruncMonth("date"))
         .values("user_name", "month")
-        .annotate(hours=Sum("duration_hours"))
+        .annotate(hours=Sum("total_hours"))
         .order_by("user_name", "month")
     )
     hour_compliance = [
@@ -643,40 +652,74 @@ def ceo_dashboard(request: Request) -> Response:
     ]
 
     # --- Development goals (task-level classification) ---
+    # La clasificacion se guarda en cada TimeEntry al ingerirla (la migracion
+    # 0014 clasifico las filas existentes). El dashboard no escribe: las filas
+    # de una version anterior de las reglas se clasifican en memoria hasta que
+    # se corra reclassify_time_entries.
     from .classifiers import (
-        classify_time_entry, is_hr_no_laboral, SUSPICIOUS_TASKS_RE,
-        ALL_GOAL_CATEGORIES, GOAL_CATEGORY_LABELS,
+        ALL_GOAL_CATEGORIES,
+        CLASSIFIER_VERSION,
+        GOAL_CATEGORY_LABELS,
+        classify_entry,
     )
 
-    internal_entries_raw = (
-        entries.filter(project__is_internal=True)
-        .values_list("description", "project__name", "duration_hours", "user_name")
-    )
+    internal_entries = entries.filter(project__is_internal=True)
+    stale_entries = TimeEntryClassificationService.stale(internal_entries)
+    internal_entries = internal_entries.filter(classification_version=CLASSIFIER_VERSION)
 
     goal_hours: dict[str, Decimal] = {}
-    general_by_person: dict[str, Decimal] = {}
     data_quality_alerts: list[dict] = []
     hr_no_laboral_h = Decimal("0")
-    no_desc_count = 0
+    no_desc_count = facts.filter(project__is_internal=True).aggregate(
+        total=Sum("missing_description_count")
+    )["total"] or 0
     suspicious_h = Decimal("0")
 
-    for desc, proj_name, hours, user_name in internal_entries_raw:
-        desc = desc or ""
-        if not desc.strip():
-            no_desc_count += 1
-        if is_hr_no_laboral(desc):
+    goal_rows = (
+        internal_entries.order_by()
+        .values("goal_category")
+        .annotate(
+            hours=Sum("duration_hours"),
+            hr=Sum("duration_hours", filter=Q(is_hr_no_laboral=True)),
+            suspicious=Sum(
+                "duration_hours", filter=Q(is_suspicious=True, is_hr_no_laboral=False)
+            ),
+        )
+    )
+    for row in goal_rows:
+        hr_no_laboral_h += row["hr"] or Decimal("0")
+        suspicious_h += row["suspicious"] or Decimal("0")
+        if row["goal_category"]:
+            goal_hours[row["goal_category"]] = row["hours"]
+
+    general_by_person = {
+        row["user_name"]: row["hours"]
+        for row in internal_entries.filter(goal_category="APPIX_GENERAL")
+        .order_by()
+        .values("user_name")
+        .annotate(hours=Sum("duration_hours"))
+    }
+
+    stale_count = 0
+    for description, project_name, user_name, hours in stale_entries.values_list(
+        "description", "project__name", "user_name", "duration_hours"
+    ).iterator():
+        stale_count += 1
+        category, is_hr, is_suspicious = classify_entry(description, project_name)
+        if is_hr:
             hr_no_laboral_h += hours
-            continue
-        if SUSPICIOUS_TASKS_RE.search(desc):
+        elif is_suspicious:
             suspicious_h += hours
-        cat = classify_time_entry(desc, proj_name)
-        if cat is None:
-            continue
-        goal_hours[cat] = goal_hours.get(cat, Decimal("0")) + hours
-        if cat == "APPIX_GENERAL":
-            general_by_person[user_name] = (
-                general_by_person.get(user_name, Decimal("0")) + hours
-            )
+        if category:
+            goal_hours[category] = goal_hours.get(category, Decimal("0")) + hours
+        if category == "APPIX_GENERAL":
+            general_by_person[user_name] = general_by_person.get(user_name, Decimal("0")) + hours
+    if stale_count:
+        logger.warning(
+            "ceo_dashboard: %d internal time entries with a stale classification; "
+            "run manage.py reclassify_time_entries",
+            stale_count,
+        )
 
     # Build alerts
     if hr_no_laboral_h > 0:
@@ -721,14 +764,12 @@ def ceo_dashboard(request: Request) -> Response:
         development_goals.append(item)
 
     # Total client / internal hours for summary
-    total_client_hours = (
-        entries.filter(project__is_internal=False)
-        .aggregate(total=Sum("duration_hours"))["total"] or Decimal("0")
-    )
-    total_internal_hours = (
-        entries.filter(project__is_internal=True)
-        .aggregate(total=Sum("duration_hours"))["total"] or Decimal("0")
+    split_totals = facts.aggregate(
+        client=Sum("total_hours", filter=Q(project__is_internal=False)),
+        internal=Sum("total_hours", filter=Q(project__is_internal=True)),
     )
+    total_client_hours = split_totals["client"] or Decimal("0")
+    total_internal_hours = split_totals["internal"] or Decimal("0")
 
     # --- Overdue invoices (pending payment with past date) ---
     from datetime import date as date_cls_import
@@ -743,7 +784,7 @@ def ceo_dashboard(request: Request) -> Response:
         total=Sum("invoice_amount")
     )["total"] or Decimal("0")
 
-    return Response({
+    return {
         "date_range": {
             "date_from": str(date_from) if date_from else None,
             "date_to": str(date_to) if date_to else None,
@@ -798,7 +839,7 @@ def ceo_dashboard(request: Request) -> Response:
             "count": overdue_count,
             "total_amount": str(overdue_amount.quantize(QUANTIZE)),
         },
-    })
+    }
 
 
 @api_view(["GET"])
@@ -814,23 +855,27 @@ def personal_dashboard(request: Request) -> Response:
 
     projects = get_projects_for_user(request.user)
     entries = TimeEntry.objects.filter(project__in=projects)
+    facts = DailyTimeFact.objects.filter(project__in=projects)
     if date_from:
         entries = entries.filter(date__gte=date_from)
+        facts = facts.filter(date__gte=date_from)
     if date_to:
         entries = entries.filter(date__lte=date_to)
+        facts = facts.filter(date__lte=date_to)
 
     # Default: only 2026+ data if no filter
     if not date_from and not date_to:
         from datetime import date as date_cls
         entries = entries.filter(date__gte=date_cls(2026, 1, 1))
+        facts = facts.filter(date__gte=date_cls(2026, 1, 1))
 
     CATEGORY_LABELS = dict(Project.INTERNAL_CATEGORY_CHOICES)
 
     # --- Per-person aggregation ---
     # Hours by person + internal/client
     person_split_qs = (
-        entries.values("user_name", "project__is_internal")
-        .annotate(hours=Sum("duration_hours"))
+        facts.values("user_name", "project__is_internal")
+        .annotate(hours=Sum("total_hours"))
         .order_by("user_name")
     )
     person_hours: dict[str, dict[str, Decimal]] = {}
@@ -843,9 +888,9 @@ def personal_dashboard(request: Request) -> Response:
 
     # Internal breakdown by category per person
     cat_qs = (
-        entries.filter(project__is_internal=True, project__internal_category__gt="")
+        facts.filter(project__is_internal=True, project__internal_category__gt="")
         .values("user_name", "project__internal_category")
-        .annotate(hours=Sum("duration_hours"))
+        .annotate(hours=Sum("total_hours"))
         .order_by("user_name", "-hours")
     )
     person_categories: dict[str, list] = {}
@@ -864,9 +909,9 @@ def personal_dashboard(request: Request) -> Response:
 
     # Client projects per person
     client_proj_qs = (
-        entries.filter(project__is_internal=False)
+        facts.filter(project__is_internal=False)
         .values("user_name", "project__id", "project__name", "project__code", "project__jira_project_key")
-        .annotate(hours=Sum("duration_hours"))
+        .annotate(hours=Sum("total_hours"))
         .order_by("user_name", "-hours")
     )
     person_client_projects: dict[str, list] = {}
@@ -884,13 +929,16 @@ def personal_dashboard(request: Request) -> Response:
 
     # Data quality per person
     dq_qs = (
-        entries.values("user_name")
+        facts.values("user_name")
         .annotate(
-            total_entries=Count("id"),
-            missing_description=Count("id", filter=Q(description="")),
-            client_no_jira=Count(
-                "id",
-                filter=Q(project__is_internal=False, project__jira_project_key=""),
+            total_entries=Sum("entry_count"),
+            missing_description=Sum("missing_description_count"),
+            client_no_jira=Coalesce(
+                Sum(
+                    "entry_count",
+                    filter=Q(project__is_internal=False, project__jira_project_key=""),
+                ),
+                0,
             ),
         )
         .order_by("user_name")
@@ -899,39 +947,33 @@ def personal_dashboard(request: Request) -> Response:
 
     # Non-productive hours (DAILYS category)
     nonprod_qs = (
-        entries.filter(project__internal_category="DAILYS")
+        facts.filter(project__internal_category="DAILYS")
         .values("user_name")
-        .annotate(hours=Sum("duration_hours"))
+        .annotate(hours=Sum("total_hours"))
     )
     person_nonprod = {row["user_name"]: row["hours"] for row in nonprod_qs}
 
     # Suspicious entries: internal entries with Jira keys in description
     # (may indicate misclassified work)
-    import re
-    jira_re = re.compile(r"\[([A-Z]+-\d+)\]")
-    # Known internal Jira prefixes (legitimate internal boards)
-    INTERNAL_JIRA_PREFIXES = {"AT", "AP", "DA", "VA", "DD", "HR"}
+    from .classifiers import external_jira_key
+
     suspicious_by_person: dict[str, list] = {}
     internal_with_desc = (
-        entries.filter(project__is_internal=True)
-        .exclude(description="")
+        entries.filter(project__is_internal=True, description__contains="[")
         .values_list("user_name", "description", "duration_hours", "project__code")
     )
     for user_name, description, hours, proj_code in internal_with_desc:
-        match = jira_re.search(description)
-        if match:
-            jira_key = match.group(1)
-            prefix = jira_key.split("-")[0]
-            if prefix not in INTERNAL_JIRA_PREFIXES:
-                # Non-internal Jira prefix → suspicious
-                if user_name not in suspicious_by_person:
-                    suspicious_by_person[user_name] = []
-                suspicious_by_person[user_name].append({
-                    "jira_key": jira_key,
-                    "description": description[:100],
-                    "hours": str(hours.quantize(QUANTIZE)),
-                    "project_code": proj_code,
-                })
+        jira_key = external_jira_key(description)
+        if jira_key:
+            # Non-internal Jira prefix → suspicious
+            if user_name not in suspicious_by_person:
+                suspicious_by_person[user_name] = []
+            suspicious_by_person[user_name].append({
+                "jira_key": jira_key,
+                "description": description[:100],
+                "hours": str(hours.quantize(QUANTIZE)),
+                "project_code": proj_code,
+            })
 
     # Build members list
     all_names = sorted(
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import SyncLog
+from .models import ClockifySyncCursor, JiraIssue, JiraProgressSnapshot, SyncLog
 
 
 @admin.register(SyncLog)
@@ -13,5 +13,31 @@ class SyncLogAdmin(admin.ModelAdmin):
         "finished_at",
         "status",
         "entries_synced",
+        "entries_inserted",
+        "entries_updated",
+        "entries_skipped",
+        "chunks_written",
         "error_message",
     ]
+
+
+@admin.register(ClockifySyncCursor)
+class ClockifySyncCursorAdmin(admin.ModelAdmin):
+    list_display = ["user_email", "clockify_user_id", "last_entry_end", "updated_at"]
+    search_fields = ["user_email", "clockify_user_id"]
+
+
+@admin.register(JiraProgressSnapshot)
+class JiraProgressSnapshotAdmin(admin.ModelAdmin):
+    list_display = ["project", "jira_project_key", "progress_percent", "fetched_at"]
+    search_fields = ["jira_project_key", "project__code"]
+
+
+@admin.register(JiraIssue)
+class JiraIssueAdmin(admin.ModelAdmin):
+    list_display = [
+        "jira_key", "jira_project_key", "status_category", "story_points",
+        "sprint_name", "updated",
+    ]
+    list_filter = ["jira_project_key", "status_category", "sprint_state"]
+    search_fields = ["jira_key", "summary"]
@@ -1,4 +1,11 @@
 import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
 from typing import Any
 
 import requests
@@ -6,28 +13,115 @@ from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Base del backoff exponencial ante HTTP 429 (segundos)
+BACKOFF_BASE_SECONDS = 1.0
+
+# Detailed reports: tamanio de pagina, maximo de entries por ventana
+# (limite de paginacion del API) y rango maximo por request
+REPORTS_PAGE_SIZE = 1000
+REPORTS_MAX_ENTRIES = 10000
+REPORTS_MAX_RANGE = timedelta(days=365)
+
+
+def format_clockify_datetime(value: datetime) -> str:
+    """Formatear un datetime aware como ISO 8601 UTC que acepta Clockify."""
+    utc_value = value.astimezone(dt_timezone.utc)
+    return utc_value.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class TokenBucket:
+    """
+    Rate limiter token-bucket seguro entre hilos.
+
+    Se recargan `rate` tokens por segundo hasta `capacity`; cada request
+    consume uno y espera si no hay tokens disponibles.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloquear hasta obtener un token."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+
 
 class ClockifyClient:
-    """Cliente HTTP para la API de Clockify."""
+    """
+    Cliente HTTP para la API de Clockify.
+
+    Puede usarse desde varios hilos: cada hilo tiene su propia
+    requests.Session y todas las llamadas pasan por el mismo TokenBucket.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, rate_limiter: TokenBucket | None = None) -> None:
         self.base_url = settings.CLOCKIFY_BASE_URL
         self.workspace_id = settings.CLOCKIFY_WORKSPACE_ID
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "X-Api-Key": settings.CLOCKIFY_API_KEY,
-                "Content-Type": "application/json",
-            }
+        self.max_retries = settings.CLOCKIFY_MAX_RETRIES
+        self.rate_limiter = rate_limiter or TokenBucket(
+            settings.CLOCKIFY_REQUESTS_PER_SECOND
         )
+        self._local = threading.local()
 
-    def _get(self, endpoint: str, params: dict[str, Any] | None = None) -> Any:
-        """GET request with error handling."""
-        url = f"{self.base_url}{endpoint}"
-        response = self.session.get(url, params=params, timeout=30)
+    @property
+    def session(self) -> requests.Session:
+        """Session del hilo actual (requests.Session no es thread-safe)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(
+                {
+                    "X-Api-Key": settings.CLOCKIFY_API_KEY,
+                    "Content-Type": "application/json",
+                }
+            )
+            self._local.session = session
+        return session
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Request with rate limiting, 429 backoff and error handling."""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            response = self.session.request(method, url, timeout=30, **kwargs)
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            retry_after = response.headers.get("Retry-After", "")
+            delay = (
+                float(retry_after)
+                if retry_after.replace(".", "", 1).isdigit()
+                else BACKOFF_BASE_SECONDS * 2**attempt
+            )
+            logger.warning("Clockify 429 on %s, retrying in %.1fs", url, delay)
+            time.sleep(delay)
         response.raise_for_status()
         return response.json()
 
+    def _get(self, endpoint: str, params: dict[str, Any] | None = None) -> Any:
+        """GET request against the main API."""
+        return self._request("GET", f"{self.base_url}{endpoint}", params=params)
+
     def fetch_projects(self) -> list[dict[str, Any]]:
         """Obtener lista de proyectos del workspace."""
         return self._get(
@@ -71,20 +165,24 @@ class ClockifyClient:
             params=params,
         )
 
-    def fetch_all_time_entries(
+    def iter_time_entry_pages(
         self,
         user_id: str,
         start: str | None = None,
         end: str | None = None,
         project_id: str | None = None,
-    ) -> list[dict[str, Any]]:
-        """Obtener TODAS las time entries paginando automaticamente."""
-        all_entries: list[dict[str, Any]] = []
-        page = 1
-        page_size = 200
+        page_size: int = 200,
+        prefetch: bool = False,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Iterar las paginas de time entries de un usuario conforme llegan.
 
-        while True:
-            entries = self.fetch_time_entries(
+        Con prefetch=True la pagina siguiente se descarga en un hilo mientras
+        el consumidor procesa la actual (a lo mas dos paginas en memoria).
+        """
+
+        def fetch(page: int) -> list[dict[str, Any]]:
+            return self.fetch_time_entries(
                 user_id=user_id,
                 start=start,
                 end=end,
@@ -92,13 +190,134 @@ class ClockifyClient:
                 page=page,
                 page_size=page_size,
             )
-            all_entries.extend(entries)
 
-            if len(entries) < page_size:
-                break
-            page += 1
+        with ThreadPoolExecutor(max_workers=1) if prefetch else nullcontext() as pool:
+            page = 1
+            pending = pool.submit(fetch, page) if pool else None
+            while True:
+                entries = pending.result() if pool else fetch(page)
+                has_more = len(entries) >= page_size
+                if pool and has_more:
+                    pending = pool.submit(fetch, page + 1)
+                if entries:
+                    yield entries
+                if not has_more:
+                    break
+                page += 1
+
+    def iter_time_entries(
+        self,
+        user_id: str,
+        start: str | None = None,
+        end: str | None = None,
+        project_id: str | None = None,
+        prefetch: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """Iterar las time entries de un usuario una a una, pagina por pagina."""
+        for entries in self.iter_time_entry_pages(
+            user_id=user_id,
+            start=start,
+            end=end,
+            project_id=project_id,
+            prefetch=prefetch,
+        ):
+            yield from entries
+
+    def fetch_all_time_entries(
+        self,
+        user_id: str,
+        start: str | None = None,
+        end: str | None = None,
+        project_id: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Obtener TODAS las time entries en una lista (preferir iter_time_entries)."""
+        return list(
+            self.iter_time_entries(
+                user_id=user_id, start=start, end=end, project_id=project_id
+            )
+        )
+
+    def fetch_detailed_report(
+        self, start: datetime, end: datetime, page: int = 1,
+        page_size: int = REPORTS_PAGE_SIZE,
+    ) -> dict[str, Any]:
+        """Obtener una pagina del reporte detallado de todo el workspace."""
+        return self._request(
+            "POST",
+            f"{settings.CLOCKIFY_REPORTS_URL}/workspaces/{self.workspace_id}/reports/detailed",
+            json={
+                "dateRangeStart": format_clockify_datetime(start),
+                "dateRangeEnd": format_clockify_datetime(end),
+                "detailedFilter": {
+                    "page": page,
+                    "pageSize": page_size,
+                    "sortColumn": "DATE",
+                },
+                "exportType": "JSON",
+            },
+        )
+
+    @staticmethod
+    def _normalize_report_entry(entry: dict[str, Any]) -> dict[str, Any]:
+        """Adaptar una entry del reporte al formato de /time-entries (+ usuario)."""
+        interval = entry.get("timeInterval") or {}
+        seconds = interval.get("duration") or 0
+        return {
+            "id": entry.get("_id") or entry.get("id"),
+            "projectId": entry.get("projectId") or "",
+            "description": entry.get("description") or "",
+            "tags": entry.get("tags") or [],
+            "timeInterval": {
+                "start": interval.get("start", ""),
+                "end": interval.get("end", ""),
+                "duration": f"PT{int(seconds)}S",
+            },
+            "userId": entry.get("userId", ""),
+            "userName": entry.get("userName", ""),
+            "userEmail": entry.get("userEmail", ""),
+        }
+
+    def iter_workspace_time_entries(
+        self, start: datetime, end: datetime, page_size: int = REPORTS_PAGE_SIZE
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Iterar las time entries de todos los usuarios entre start y end.
+
+        La ventana se parte en tramos de REPORTS_MAX_RANGE y cada tramo se
+        biseca mientras supere REPORTS_MAX_ENTRIES, para no rebasar el
+        limite de paginacion del API.
+        """
+        # El rango del API es inclusivo: cada tramo termina 1 ms antes del siguiente
+        windows: list[tuple[datetime, datetime]] = []
+        window_start = start
+        while window_start + REPORTS_MAX_RANGE < end:
+            next_start = window_start + REPORTS_MAX_RANGE
+            windows.append((window_start, next_start - timedelta(milliseconds=1)))
+            window_start = next_start
+        windows.append((window_start, end))
+
+        while windows:
+            window_start, window_end = windows.pop(0)
+            report = self.fetch_detailed_report(window_start, window_end, 1, page_size)
+            totals = report.get("totals") or []
+            entry_count = totals[0].get("entriesCount", 0) if totals and totals[0] else 0
+            if entry_count > REPORTS_MAX_ENTRIES and window_end - window_start > timedelta(days=1):
+                middle = window_start + (window_end - window_start) / 2
+                windows[0:0] = [
+                    (window_start, middle - timedelta(milliseconds=1)),
+                    (middle, window_end),
+                ]
+                continue
 
-        return all_entries
+            page = 1
+            while True:
+                entries = report.get("timeentries") or []
+                for entry in entries:
+                    yield self._normalize_report_entry(entry)
+                if len(entries) < page_size:
+                    break
+                page += 1
+                report = self.fetch_detailed_report(window_start, window_end, page, page_size)
 
     def fetch_users(self) -> list[dict[str, Any]]:
         """Obtener lista de usuarios del workspace."""
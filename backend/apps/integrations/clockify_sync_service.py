@@ -1,23 +1,30 @@
 import logging
+import queue
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from apps.finance.models import (
-    BillingRole,
-    Phase,
-    Project,
-    ProjectRoleRate,
-    TimeEntry,
+from apps.finance.models import Phase, Project, TimeEntry
+from apps.finance.services import (
+    FinancialRollupService,
+    RateCard,
+    RollupDelta,
+    TimeEntryUpsertService,
 )
 
-from .clockify_client import ClockifyClient
-from .models import SyncLog
+from .clockify_client import ClockifyClient, format_clockify_datetime
+from .models import ClockifySyncCursor, SyncLog
 
 logger = logging.getLogger(__name__)
 
-QUANTIZE = Decimal("0.01")
+# Entries buffered before each bulk upsert
+SYNC_CHUNK_SIZE = 500
 
 
 class ClockifySyncService:
@@ -25,55 +32,79 @@ class ClockifySyncService:
     Servicio de sincronizacion Clockify -> Base de datos local.
 
     Flujo:
-    1. Obtiene time entries desde la ultima sync exitosa
-    2. Para cada entry: mapea proyecto, fase, rol, calcula costo
-    3. Upsert por clockify_id (crear o actualizar)
+    1. Precarga fases y el RateCard (roles por usuario, overrides de tarifa
+       con vigencia y defaults de rol) en diccionarios
+    2. Obtiene time entries desde la ultima sync (exitosa o parcial). En
+       backfills usa el reporte detallado del workspace; si no, requests por
+       usuario (en paralelo con max_workers > 1, rate limit compartido en el
+       cliente). En todos los modos las entries se consumen en streaming
+    3. Mapea cada entry (proyecto, fase, rol, costo) sin consultar la BD
+    4. Escribe por chunks: bulk upsert por clockify_id de las filas nuevas o
+       con content_hash distinto + delta de ProjectFinancialRollup, cada
+       chunk en una sola transaccion
+    5. Cada usuario tiene un ClockifySyncCursor (mayor timeInterval.end visto)
+       que se guarda en la transaccion del chunk donde terminan sus filas;
+       si la descarga de un usuario falla su cursor no avanza (o se fija en
+       el inicio de su ventana si no tenia) y la sync queda "partial"; la
+       ventana global y el modo backfill no dependen de ese usuario
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self, chunk_size: int = SYNC_CHUNK_SIZE, max_workers: int | None = None
+    ) -> None:
         self.client = ClockifyClient()
+        self.chunk_size = chunk_size
+        self.max_workers = (
+            max_workers if max_workers is not None else settings.CLOCKIFY_SYNC_WORKERS
+        )
+        self.phase_map: dict[tuple[int, str], int] = {}
+        self.rate_card: RateCard | None = None
+        self.stats = {"inserted": 0, "updated": 0, "skipped": 0, "chunks": 0}
+        self.cursors: dict[str, datetime] = {}
+        self._open_cursors: dict[str, dict] = {}
+        self._ready_cursors: dict[str, dict] = {}
+        self.failed_users: list[str] = []
 
     def get_last_sync_time(self) -> datetime | None:
-        """Obtener timestamp de la ultima sync exitosa."""
-        last_log = (
-            SyncLog.objects.filter(sync_type="clockify", status="success")
-            .order_by("-started_at")
+        """
+        Obtener timestamp de la ultima sync completa o parcial. En una sync
+        parcial los usuarios que fallaron conservan su cursor y se reintentan
+        desde ahi, asi que no detienen la ventana de los demas. El log de la
+        sync en curso (sin finished_at) no cuenta.
+        """
+        return (
+            SyncLog.objects.filter(
+                sync_type="clockify",
+                status__in=("success", "partial"),
+                finished_at__isnull=False,
+            )
+            .order_by("-finished_at")
+            .values_list("finished_at", flat=True)
             .first()
         )
-        if last_log and last_log.finished_at:
-            return last_log.finished_at
-        return None
 
-    def _get_hourly_rate(self, project: Project, role: BillingRole | None) -> Decimal:
-        """Obtener tarifa horaria: override de proyecto o default del rol."""
-        if role is None:
-            return Decimal("0.00")
+    def _load_lookups(self, project_ids: list[int]) -> None:
+        """Precargar fases por (project_id, tag) y el RateCard de los proyectos."""
+        self.phase_map = {}
+        for phase_id, project_id, name in Phase.objects.filter(
+            project_id__in=project_ids
+        ).values_list("id", "project_id", "name"):
+            # Respeta el orden de Phase.Meta: gana la primera fase con ese nombre
+            self.phase_map.setdefault((project_id, name.lower()), phase_id)
 
-        project_rate = ProjectRoleRate.objects.filter(
-            project=project, billing_role=role
-        ).first()
-
-        if project_rate:
-            return project_rate.hourly_rate
-        return role.default_hourly_rate
+        # Usuarios sin UserBillingRole: primer BillingRole, como antes del RateCard
+        self.rate_card = RateCard.load(project_ids, default_to_first_role=True)
 
     def _map_tags_to_phase(
-        self, tags: list[dict[str, str]], project: Project
-    ) -> Phase | None:
+        self, tags: list[dict[str, str]], project_id: int
+    ) -> int | None:
         """Mapear Clockify Tags a una Phase del proyecto."""
         for tag in tags:
-            tag_name = tag.get("name", "")
-            phase = Phase.objects.filter(project=project, name__iexact=tag_name).first()
-            if phase:
-                return phase
+            phase_id = self.phase_map.get((project_id, tag.get("name", "").lower()))
+            if phase_id:
+                return phase_id
         return None
 
-    def _map_user_to_role(self, user_email: str) -> BillingRole | None:
-        """Mapear usuario a un BillingRole (por convencion o mapping futuro)."""
-        # Default: retorna el primer BillingRole disponible
-        # En produccion, esto se extendera con un mapping user -> role
-        return BillingRole.objects.first()
-
     def _parse_duration_to_hours(self, duration_str: str) -> Decimal:
         """Convertir duracion ISO 8601 (PT1H30M) a horas decimales."""
         if not duration_str:
@@ -96,79 +127,291 @@ class ClockifySyncService:
 
         return hours.quantize(Decimal("0.0001"))
 
-    def sync_all_projects(self) -> int:
+    def _build_time_entry(
+        self, entry: dict, project: Project, user_name: str, user_email: str
+    ) -> TimeEntry:
+        """Mapear una entry de Clockify a un TimeEntry sin guardar."""
+        duration_str = entry.get("timeInterval", {}).get("duration", "")
+        duration_hours = self._parse_duration_to_hours(duration_str)
+
+        start_str = entry.get("timeInterval", {}).get("start", "")
+        entry_date = (
+            datetime.fromisoformat(start_str.replace("Z", "+00:00")).date()
+            if start_str
+            else timezone.now().date()
+        )
+
+        role = self.rate_card.role_for(user_email)
+        cost = self.rate_card.cost(project.id, role, duration_hours, entry_date)
+
+        return TimeEntry(
+            clockify_id=entry["id"],
+            project=project,
+            phase_id=self._map_tags_to_phase(entry.get("tags", []), project.id),
+            billing_role=role,
+            user_name=user_name,
+            user_email=user_email,
+            description=entry.get("description", ""),
+            duration_hours=duration_hours,
+            cost=cost,
+            date=entry_date,
+        )
+
+    def _track_cursor(self, user: dict, entry: dict) -> None:
+        """Registrar el mayor timeInterval.end visto para el usuario."""
+        cursor = self._open_cursors.setdefault(
+            user["id"], {"email": user.get("email", ""), "end": None}
+        )
+        end_str = (entry.get("timeInterval") or {}).get("end")
+        if not end_str:
+            # Timer en curso: no hay fin, el cursor no debe rebasar su inicio
+            return
+        end = datetime.fromisoformat(end_str.replace("Z", "+00:00"))
+        if cursor["end"] is None or end > cursor["end"]:
+            cursor["end"] = end
+
+    def _finish_user(self, user: dict) -> None:
+        """El usuario ya no producira entries: su cursor se guarda con el siguiente chunk."""
+        cursor = self._open_cursors.pop(user["id"], None)
+        if cursor and cursor["end"]:
+            self._ready_cursors[user["id"]] = cursor
+
+    def _save_ready_cursors(self) -> None:
+        """Avanzar (nunca retroceder) los cursores de usuarios terminados."""
+        advanced = [
+            ClockifySyncCursor(
+                clockify_user_id=user_id,
+                user_email=cursor["email"],
+                last_entry_end=cursor["end"],
+            )
+            for user_id, cursor in self._ready_cursors.items()
+            if user_id not in self.cursors or cursor["end"] > self.cursors[user_id]
+        ]
+        ClockifySyncCursor.objects.bulk_create(
+            advanced,
+            update_conflicts=True,
+            unique_fields=["clockify_user_id"],
+            update_fields=["user_email", "last_entry_end", "updated_at"],
+        )
+        for cursor in advanced:
+            self.cursors[cursor.clockify_user_id] = cursor.last_entry_end
+        self._ready_cursors.clear()
+
+    def _write_chunk(self, chunk: dict[str, TimeEntry]) -> None:
+        """
+        Upsert de un chunk de TimeEntry por clockify_id en una transaccion,
+        omitiendo filas sin cambios (content_hash), aplicando el delta a los
+        rollups y guardando los cursores de los usuarios ya terminados.
+        """
+        if not chunk and not self._ready_cursors:
+            return
+
+        with transaction.atomic():
+            self._save_ready_cursors()
+            if not chunk:
+                return
+
+            rollup_delta = RollupDelta()
+            result = TimeEntryUpsertService.upsert(chunk.values(), rollup_delta)
+            FinancialRollupService.apply_delta(rollup_delta)
+
+        for key in ("inserted", "updated", "skipped"):
+            self.stats[key] += result[key]
+        self.stats["chunks"] += 1
+        chunk.clear()
+
+    def _user_start(self, user: dict, default_start: datetime | None) -> str | None:
+        """Inicio de la ventana del usuario: su cursor o, si no tiene, el global."""
+        start = self.cursors.get(user["id"], default_start)
+        return format_clockify_datetime(start) if start else None
+
+    def _fetch_failed(self, user: dict, exc: Exception, default_start: datetime | None) -> None:
+        logger.error("Clockify fetch failed for %s: %s", user.get("email") or user["id"], exc)
+        self.failed_users.append(user.get("email") or user["id"])
+        self._open_cursors.pop(user["id"], None)
+        if user["id"] not in self.cursors and default_start is not None:
+            # Sin cursor usaria la ventana global, que sigue avanzando: se fija
+            # en el inicio de esta ventana para reintentarlo desde ahi
+            self._ready_cursors[user["id"]] = {
+                "email": user.get("email", ""), "end": default_start,
+            }
+
+    def _iter_user_entries(
+        self, users: list[dict], default_start: datetime | None
+    ) -> Iterator[tuple[dict, dict | None]]:
+        """
+        Producir (usuario, entry) en streaming y (usuario, None) cuando un
+        usuario termina sin errores. Los hilos solo hacen HTTP; las escrituras
+        a BD ocurren en el hilo que consume el generador. En memoria quedan
+        a lo mas unas pocas paginas por worker.
+        """
+        if self.max_workers <= 1 or len(users) <= 1:
+            for user in users:
+                try:
+                    for entry in self.client.iter_time_entries(
+                        user_id=user["id"],
+                        start=self._user_start(user, default_start),
+                        prefetch=True,
+                    ):
+                        yield user, entry
+                except Exception as exc:
+                    self._fetch_failed(user, exc, default_start)
+                    continue
+                yield user, None
+            return
+
+        pages: queue.Queue = queue.Queue(maxsize=self.max_workers * 2)
+        stop = threading.Event()
+        done = object()
+
+        def put(item: tuple) -> bool:
+            # put con timeout para no bloquear al worker si el consumidor se detuvo
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch_user(user: dict, start: str | None) -> None:
+            try:
+                for page in self.client.iter_time_entry_pages(
+                    user_id=user["id"], start=start
+                ):
+                    if not put((user, page)):
+                        return
+            except Exception as exc:
+                put((user, exc))
+            finally:
+                put((user, done))
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="clockify-fetch"
+        ) as pool:
+            for user in users:
+                pool.submit(fetch_user, user, self._user_start(user, default_start))
+            try:
+                failed: set[str] = set()
+                pending = len(users)
+                while pending:
+                    user, page = pages.get()
+                    if page is done:
+                        pending -= 1
+                        if user["id"] not in failed:
+                            yield user, None
+                    elif isinstance(page, Exception):
+                        failed.add(user["id"])
+                        self._fetch_failed(user, page, default_start)
+                    else:
+                        for entry in page:
+                            yield user, entry
+            finally:
+                stop.set()
+
+    def _iter_workspace_entries(
+        self, start: datetime, end: datetime
+    ) -> Iterator[tuple[dict, dict | None]]:
+        """
+        Producir (usuario, entry) desde el reporte detallado del workspace.
+        El reporte viene ordenado por fecha, asi que los usuarios se dan por
+        terminados hasta el final.
+        """
+        users: dict[str, dict] = {}
+        for entry in self.client.iter_workspace_time_entries(start, end):
+            user = users.setdefault(entry["userId"], {
+                "id": entry["userId"],
+                "name": entry["userName"] or "Unknown",
+                "email": entry["userEmail"],
+            })
+            yield user, entry
+        for user in users.values():
+            yield user, None
+
+    @staticmethod
+    def _is_backfill(last_sync: datetime | None, now: datetime) -> bool:
+        """Sin sync previa o con un hueco largo conviene el modo workspace."""
+        if last_sync is None:
+            return True
+        return now - last_sync > timedelta(days=settings.CLOCKIFY_BACKFILL_AFTER_DAYS)
+
+    def sync_all_projects(self, workspace_mode: bool | None = None) -> int:
         """
         Sincronizar time entries de todos los proyectos vinculados.
 
+        Args:
+            workspace_mode: True usa el reporte detallado de todo el workspace,
+                False las requests por usuario; None elige segun _is_backfill.
+
         Returns:
             Numero total de entries sincronizadas.
         """
         sync_log = SyncLog.objects.create(sync_type="clockify")
+        self.stats = {"inserted": 0, "updated": 0, "skipped": 0, "chunks": 0}
+        self.cursors = dict(
+            ClockifySyncCursor.objects.values_list("clockify_user_id", "last_entry_end")
+        )
+        self._open_cursors, self._ready_cursors = {}, {}
+        self.failed_users = []
         total_synced = 0
 
         try:
             last_sync = self.get_last_sync_time()
-            start_date = None
-            if last_sync:
-                start_date = (last_sync - timedelta(hours=2)).isoformat() + "Z"
+            now = timezone.now()
+            start = last_sync - timedelta(hours=2) if last_sync else None
+            if workspace_mode is None:
+                workspace_mode = self._is_backfill(last_sync, now)
+
+            if workspace_mode:
+                if start is None:
+                    start = timezone.make_aware(
+                        datetime.fromisoformat(settings.CLOCKIFY_BACKFILL_START)
+                    )
+                logger.info("Clockify sync in workspace mode from %s", start)
+                entry_stream = self._iter_workspace_entries(start, now)
+            else:
+                users = self.client.fetch_users()
+                entry_stream = self._iter_user_entries(users, start)
 
-            users = self.client.fetch_users()
             projects_with_clockify = Project.objects.exclude(clockify_project_id="")
 
             project_map = {
                 p.clockify_project_id: p for p in projects_with_clockify
             }
-
-            for user in users:
-                user_id = user["id"]
-                user_name = user.get("name", "Unknown")
-                user_email = user.get("email", "")
-
-                entries = self.client.fetch_all_time_entries(
-                    user_id=user_id,
-                    start=start_date,
+            self._load_lookups([p.id for p in project_map.values()])
+
+            # Keyed by clockify_id: a repeated id inside one chunk would hit
+            # the same row twice in a single ON CONFLICT statement
+            chunk: dict[str, TimeEntry] = {}
+
+            for user, entry in entry_stream:
+                if entry is None:
+                    self._finish_user(user)
+                    continue
+
+                self._track_cursor(user, entry)
+                project_id = entry.get("projectId", "")
+                if project_id not in project_map:
+                    continue
+
+                chunk[entry["id"]] = self._build_time_entry(
+                    entry,
+                    project_map[project_id],
+                    user.get("name", "Unknown"),
+                    user.get("email", ""),
                 )
+                total_synced += 1
+                if len(chunk) >= self.chunk_size:
+                    self._write_chunk(chunk)
 
-                for entry in entries:
-                    project_id = entry.get("projectId", "")
-                    if project_id not in project_map:
-                        continue
-
-                    project = project_map[project_id]
-                    tags = entry.get("tags", [])
-                    phase = self._map_tags_to_phase(tags, project)
-                    role = self._map_user_to_role(user_email)
-                    hourly_rate = self._get_hourly_rate(project, role)
-
-                    duration_str = entry.get("timeInterval", {}).get("duration", "")
-                    duration_hours = self._parse_duration_to_hours(duration_str)
-                    cost = (duration_hours * hourly_rate).quantize(QUANTIZE)
-
-                    start_str = entry.get("timeInterval", {}).get("start", "")
-                    entry_date = (
-                        datetime.fromisoformat(start_str.replace("Z", "+00:00")).date()
-                        if start_str
-                        else timezone.now().date()
-                    )
-
-                    TimeEntry.objects.update_or_create(
-                        clockify_id=entry["id"],
-                        defaults={
-                            "project": project,
-                            "phase": phase,
-                            "billing_role": role,
-                            "user_name": user_name,
-                            "user_email": user_email,
-                            "description": entry.get("description", ""),
-                            "duration_hours": duration_hours,
-                            "cost": cost,
-                            "date": entry_date,
-                        },
-                    )
-                    total_synced += 1
+            self._write_chunk(chunk)
 
-            sync_log.status = "success"
             sync_log.entries_synced = total_synced
+            if self.failed_users:
+                sync_log.status = "partial"
+                sync_log.error_message = "Fetch failed for: " + ", ".join(self.failed_users)
+            else:
+                sync_log.status = "success"
 
         except Exception as e:
             logger.exception("Error syncing Clockify: %s", e)
@@ -176,6 +419,10 @@ class ClockifySyncService:
             sync_log.error_message = str(e)
 
         finally:
+            sync_log.entries_inserted = self.stats["inserted"]
+            sync_log.entries_updated = self.stats["updated"]
+            sync_log.entries_skipped = self.stats["skipped"]
+            sync_log.chunks_written = self.stats["chunks"]
             sync_log.finished_at = timezone.now()
             sync_log.save()
 
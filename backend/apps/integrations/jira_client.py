@@ -1,28 +1,52 @@
 import logging
+import math
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from decimal import Decimal
 from typing import Any
 
 import requests
 from django.conf import settings
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
 QUANTIZE = Decimal("0.01")
 
+STORY_POINTS_FIELD = "customfield_10016"
+SPRINT_FIELD = "customfield_10020"
+SEARCH_PAGE_SIZE = 100
+# Campos que guarda el espejo JiraIssue
+MIRROR_FIELDS = f"summary,assignee,status,updated,{STORY_POINTS_FIELD},{SPRINT_FIELD}"
+# Margen sobre el watermark incremental (relojes y redondeo a minutos)
+WATERMARK_OVERLAP_MINUTES = 5
+
 
 class JiraClient:
-    """Cliente para la API de Jira."""
+    """Cliente para la API de Jira. Seguro entre hilos (una Session por hilo)."""
 
-    def __init__(self) -> None:
+    def __init__(self, max_workers: int | None = None) -> None:
         self.base_url = settings.JIRA_BASE_URL.rstrip("/")
-        self.session = requests.Session()
-        self.session.auth = (settings.JIRA_USER_EMAIL, settings.JIRA_API_TOKEN)
-        self.session.headers.update(
-            {
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-            }
-        )
+        self.max_workers = max_workers or settings.JIRA_MAX_WORKERS
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Session del hilo actual (requests.Session no es thread-safe)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.auth = (settings.JIRA_USER_EMAIL, settings.JIRA_API_TOKEN)
+            session.headers.update(
+                {
+                    "Accept": "application/json",
+                    "Content-Type": "application/json",
+                }
+            )
+            self._local.session = session
+        return session
 
     def _get(self, endpoint: str, params: dict[str, Any] | None = None) -> Any:
         """GET request with error handling."""
@@ -31,56 +55,95 @@ class JiraClient:
         response.raise_for_status()
         return response.json()
 
-    def fetch_project_progress(self, jira_project_key: str) -> Decimal:
+    def _search_page(self, jql: str, fields: str, start_at: int) -> dict[str, Any]:
+        """Una pagina de /search solo con los campos pedidos."""
+        return self._get(
+            "/rest/api/3/search",
+            params={
+                "jql": jql,
+                "startAt": start_at,
+                "maxResults": SEARCH_PAGE_SIZE,
+                "fields": fields,
+            },
+        )
+
+    def _search_projects(
+        self,
+        jql_by_key: dict[str, str],
+        fields: str,
+        on_page: Callable[[str, list[dict[str, Any]]], None],
+    ) -> set[str]:
         """
-        Calcular progreso del proyecto basado en Story Points.
+        Ejecutar una busqueda por proyecto en paralelo, llamando on_page(key, issues)
+        en el hilo que invoca por cada pagina recibida.
 
-        progress_percent = (story_points_done / story_points_total) * 100
+        Primero se pide la pagina inicial de todos los proyectos a la vez y
+        luego todas las paginas restantes, asi el tiempo total depende del
+        proyecto mas lento y no de la suma.
 
-        Busca todos los issues del proyecto y suma story points por status.
+        Returns:
+            Keys de proyectos cuya busqueda fallo (registrados en el log).
         """
-        jql = f"project = {jira_project_key}"
-
-        total_points = Decimal("0")
-        done_points = Decimal("0")
-        start_at = 0
-        max_results = 100
-
-        while True:
-            result = self._get(
-                "/rest/api/3/search",
-                params={
-                    "jql": jql,
-                    "startAt": start_at,
-                    "maxResults": max_results,
-                    "fields": "status,customfield_10016",  # story points
-                },
-            )
+        failed: set[str] = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            first_pages = {
+                pool.submit(self._search_page, jql, fields, 0): key
+                for key, jql in jql_by_key.items()
+            }
+            remaining = {}
+            for future in as_completed(first_pages):
+                key = first_pages[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    logger.exception("Jira search failed for %s", key)
+                    failed.add(key)
+                    continue
+                on_page(key, result.get("issues", []))
+                for start_at in range(SEARCH_PAGE_SIZE, result.get("total", 0), SEARCH_PAGE_SIZE):
+                    future = pool.submit(self._search_page, jql_by_key[key], fields, start_at)
+                    remaining[future] = key
+
+            for future in as_completed(remaining):
+                key = remaining[future]
+                try:
+                    on_page(key, future.result().get("issues", []))
+                except Exception:
+                    logger.exception("Jira search failed for %s", key)
+                    failed.add(key)
+        return failed
+
+    def fetch_issues_updated_since(
+        self, since_by_key: dict[str, datetime | None]
+    ) -> tuple[dict[str, list[dict[str, Any]]], set[str]]:
+        """
+        Issues de varios proyectos actualizados desde su watermark (None = todos),
+        con los campos del espejo JiraIssue.
 
-            issues = result.get("issues", [])
-            for issue in issues:
-                fields = issue.get("fields", {})
-                story_points = fields.get("customfield_10016")
-                if story_points is not None:
-                    sp = Decimal(str(story_points))
-                    total_points += sp
-
-                    status_category = (
-                        fields.get("status", {})
-                        .get("statusCategory", {})
-                        .get("key", "")
-                    )
-                    if status_category == "done":
-                        done_points += sp
-
-            if start_at + max_results >= result.get("total", 0):
-                break
-            start_at += max_results
-
-        if total_points == 0:
-            return Decimal("0")
-
-        return (done_points / total_points * 100).quantize(QUANTIZE)
+        El filtro usa minutos relativos (`updated >= -Nm`) con un margen, para
+        no depender de la zona horaria del usuario de Jira al interpretar fechas.
+
+        Returns:
+            (issues por key, keys que fallaron)
+        """
+        now = timezone.now()
+        jql_by_key = {}
+        for key, since in since_by_key.items():
+            jql = f"project = {key}"
+            if since is not None:
+                minutes = math.ceil((now - since).total_seconds() / 60) + WATERMARK_OVERLAP_MINUTES
+                jql += f' AND updated >= "-{minutes}m"'
+            jql_by_key[key] = jql + " ORDER BY updated ASC"
+
+        issues_by_key: dict[str, list[dict[str, Any]]] = {key: [] for key in since_by_key}
+        failed = self._search_projects(
+            jql_by_key,
+            MIRROR_FIELDS,
+            lambda key, issues: issues_by_key[key].extend(issues),
+        )
+        for key in failed:
+            issues_by_key.pop(key, None)
+        return issues_by_key, failed
 
     def fetch_sprint_data(self, jira_project_key: str) -> dict[str, Any]:
         """Obtener datos del sprint activo del proyecto."""
@@ -0,0 +1,216 @@
+import logging
+from collections.abc import Iterable
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.finance.models import Project
+
+from .jira_client import QUANTIZE, SPRINT_FIELD, STORY_POINTS_FIELD, JiraClient
+from .models import JiraIssue, JiraProgressSnapshot
+
+logger = logging.getLogger(__name__)
+
+MIRROR_UPDATE_FIELDS = [
+    "jira_project_key",
+    "summary",
+    "assignee",
+    "status_name",
+    "status_category",
+    "story_points",
+    "sprint_id",
+    "sprint_name",
+    "sprint_state",
+    "updated",
+    "synced_at",
+]
+
+
+class JiraIssueMirrorService:
+    """
+    Mantiene el espejo JiraIssue. Cada refresh pide por proyecto solo los
+    issues con `updated` posterior al mayor `updated` ya guardado; con
+    full=True trae todo y borra los issues que ya no existen en Jira.
+    """
+
+    def __init__(self, client: JiraClient | None = None) -> None:
+        self.client = client or JiraClient()
+
+    @staticmethod
+    def _pick_sprint(sprints: Any) -> dict[str, Any]:
+        """Sprint activo del issue o, si no hay, el mas reciente."""
+        sprints = [s for s in sprints or [] if isinstance(s, dict)]
+        if not sprints:
+            return {}
+        active = [s for s in sprints if s.get("state") == "active"]
+        return (active or sprints)[-1]
+
+    @classmethod
+    def _issue_row(cls, jira_project_key: str, issue: dict[str, Any]) -> JiraIssue:
+        fields = issue.get("fields", {})
+        status = fields.get("status") or {}
+        sprint = cls._pick_sprint(fields.get(SPRINT_FIELD))
+        story_points = fields.get(STORY_POINTS_FIELD)
+        return JiraIssue(
+            jira_key=issue["key"],
+            jira_project_key=jira_project_key,
+            summary=(fields.get("summary") or "")[:500],
+            assignee=(fields.get("assignee") or {}).get("displayName", ""),
+            status_name=status.get("name", ""),
+            status_category=(status.get("statusCategory") or {}).get("key", ""),
+            story_points=(
+                Decimal(str(story_points)).quantize(QUANTIZE)
+                if story_points is not None
+                else None
+            ),
+            sprint_id=sprint.get("id"),
+            sprint_name=sprint.get("name", ""),
+            sprint_state=sprint.get("state", ""),
+            updated=parse_datetime(fields["updated"]),
+        )
+
+    def refresh(self, jira_project_keys: Iterable[str], full: bool = False) -> set[str]:
+        """
+        Traer de Jira los issues nuevos o modificados de cada proyecto.
+
+        Returns:
+            Keys refrescadas con exito (las fallidas se registran en el log).
+        """
+        keys = list(dict.fromkeys(k for k in jira_project_keys if k))
+        if not keys:
+            return set()
+
+        watermarks = {}
+        if not full:
+            watermarks = dict(
+                JiraIssue.objects.filter(jira_project_key__in=keys)
+                .order_by()
+                .values("jira_project_key")
+                .annotate(last=Max("updated"))
+                .values_list("jira_project_key", "last")
+            )
+        issues_by_key, _failed = self.client.fetch_issues_updated_since(
+            {key: watermarks.get(key) for key in keys}
+        )
+
+        with transaction.atomic():
+            for key, issues in issues_by_key.items():
+                rows = {issue["key"]: self._issue_row(key, issue) for issue in issues}
+                JiraIssue.objects.bulk_create(
+                    list(rows.values()),
+                    update_conflicts=True,
+                    unique_fields=["jira_key"],
+                    update_fields=MIRROR_UPDATE_FIELDS,
+                    batch_size=1000,
+                )
+                if full:
+                    JiraIssue.objects.filter(jira_project_key=key).exclude(
+                        jira_key__in=rows
+                    ).delete()
+        return set(issues_by_key)
+
+    @staticmethod
+    def progress(jira_project_keys: Iterable[str]) -> dict[str, Decimal]:
+        """Progreso por Story Points de cada proyecto como agregado SQL sobre el espejo."""
+        keys = list(jira_project_keys)
+        rows = (
+            JiraIssue.objects.filter(jira_project_key__in=keys, story_points__isnull=False)
+            .order_by()
+            .values("jira_project_key")
+            .annotate(
+                total=Sum("story_points"),
+                done=Sum("story_points", filter=Q(status_category="done")),
+            )
+        )
+        progress = {key: Decimal("0") for key in keys}
+        for row in rows:
+            if row["total"]:
+                progress[row["jira_project_key"]] = (
+                    (row["done"] or Decimal("0")) / row["total"] * 100
+                ).quantize(QUANTIZE)
+        return progress
+
+
+class JiraProgressService:
+    """
+    Cache de progreso Jira por proyecto (JiraProgressSnapshot).
+
+    sync_jira_progress llama refresh(); la evaluacion de salud llama
+    get_progress(), que solo refresca proyectos sin snapshot, con snapshot
+    mas viejo que el TTL o cuyo jira_project_key cambio. El progreso se
+    calcula sobre el espejo JiraIssue, refrescado incrementalmente.
+    """
+
+    def __init__(self, client: JiraClient | None = None) -> None:
+        self.client = client or JiraClient()
+        self.mirror = JiraIssueMirrorService(self.client)
+
+    def refresh(self, projects: Iterable[Project]) -> dict[int, Decimal]:
+        """Refrescar el espejo en lote y guardar snapshots. Omite proyectos que fallan."""
+        projects = [p for p in projects if p.jira_project_key]
+        if not projects:
+            return {}
+
+        refreshed = self.mirror.refresh(p.jira_project_key for p in projects)
+        progress_by_key = self.mirror.progress(refreshed)
+        now = timezone.now()
+        snapshots = [
+            JiraProgressSnapshot(
+                project=project,
+                jira_project_key=project.jira_project_key,
+                progress_percent=progress_by_key[project.jira_project_key],
+                fetched_at=now,
+            )
+            for project in projects
+            if project.jira_project_key in progress_by_key
+        ]
+        JiraProgressSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=["project"],
+            update_fields=["jira_project_key", "progress_percent", "fetched_at"],
+        )
+        return {s.project_id: s.progress_percent for s in snapshots}
+
+    def get_progress(
+        self, projects: Iterable[Project], max_age: timedelta | None = None
+    ) -> dict[int, Decimal]:
+        """
+        Progreso por project_id desde la cache, refrescando solo lo viejo.
+
+        Returns:
+            {project_id: progress_percent}; los proyectos que no se pudieron
+            leer de Jira no aparecen.
+        """
+        if max_age is None:
+            max_age = timedelta(seconds=settings.JIRA_PROGRESS_TTL_SECONDS)
+        projects = [p for p in projects if p.jira_project_key]
+        cutoff = timezone.now() - max_age
+
+        cached = {
+            s.project_id: s
+            for s in JiraProgressSnapshot.objects.filter(project__in=projects)
+        }
+        progress: dict[int, Decimal] = {}
+        stale: list[Project] = []
+        for project in projects:
+            snapshot = cached.get(project.id)
+            if (
+                snapshot
+                and snapshot.fetched_at >= cutoff
+                and snapshot.jira_project_key == project.jira_project_key
+            ):
+                progress[project.id] = snapshot.progress_percent
+            else:
+                stale.append(project)
+
+        if stale:
+            logger.info("Jira progress cache miss for %d projects", len(stale))
+            progress.update(self.refresh(stale))
+        return progress
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='chunks_written',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='entries_inserted',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='entries_updated',
+            field=models.IntegerField(default=0),
+        ),
+    ]
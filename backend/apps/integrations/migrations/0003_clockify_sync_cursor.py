@@ -0,0 +1,26 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0002_sync_log_chunk_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClockifySyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clockify_user_id', models.CharField(max_length=100, unique=True)),
+                ('user_email', models.EmailField(blank=True, default='', max_length=254)),
+                ('last_entry_end', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['user_email'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0003_clockify_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='entries_skipped',
+            field=models.IntegerField(default=0),
+        ),
+    ]
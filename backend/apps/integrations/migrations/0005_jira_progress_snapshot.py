@@ -0,0 +1,28 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0012_time_entry_content_hash'),
+        ('integrations', '0004_sync_log_entries_skipped'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JiraProgressSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jira_project_key', models.CharField(max_length=20)),
+                ('progress_percent', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('fetched_at', models.DateTimeField()),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='jira_progress', to='finance.project')),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.9 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0005_jira_progress_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JiraIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jira_key', models.CharField(max_length=50, unique=True)),
+                ('jira_project_key', models.CharField(max_length=20)),
+                ('summary', models.CharField(blank=True, default='', max_length=500)),
+                ('assignee', models.CharField(blank=True, default='', max_length=255)),
+                ('status_name', models.CharField(blank=True, default='', max_length=100)),
+                ('status_category', models.CharField(blank=True, default='', max_length=20)),
+                ('story_points', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('sprint_id', models.IntegerField(blank=True, null=True)),
+                ('sprint_name', models.CharField(blank=True, default='', max_length=255)),
+                ('sprint_state', models.CharField(blank=True, default='', max_length=20)),
+                ('updated', models.DateTimeField()),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['jira_key'],
+                'indexes': [models.Index(fields=['jira_project_key', 'updated'], name='integration_jira_pr_2f736b_idx')],
+            },
+        ),
+    ]
@@ -19,6 +19,10 @@ class SyncLog(models.Model):
     finished_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="success")
     entries_synced = models.IntegerField(default=0)
+    entries_inserted = models.IntegerField(default=0)
+    entries_updated = models.IntegerField(default=0)
+    entries_skipped = models.IntegerField(default=0)
+    chunks_written = models.IntegerField(default=0)
     error_message = models.TextField(blank=True, default="")
 
     class Meta:
@@ -26,3 +30,70 @@ class SyncLog(models.Model):
 
     def __str__(self) -> str:
         return f"{self.sync_type} | {self.started_at:%Y-%m-%d %H:%M} | {self.status}"
+
+
+class ClockifySyncCursor(models.Model):
+    """
+    Cursor incremental por usuario de Clockify: la siguiente sync pide
+    entries desde el mayor timeInterval.end ya guardado para ese usuario.
+    """
+
+    clockify_user_id = models.CharField(max_length=100, unique=True)
+    user_email = models.EmailField(blank=True, default="")
+    last_entry_end = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["user_email"]
+
+    def __str__(self) -> str:
+        return f"{self.user_email or self.clockify_user_id} @ {self.last_entry_end:%Y-%m-%d %H:%M}"
+
+
+class JiraProgressSnapshot(models.Model):
+    """
+    Ultimo progreso por Story Points leido de Jira para un proyecto.
+    La evaluacion de salud lo reutiliza mientras no exceda JIRA_PROGRESS_TTL_SECONDS.
+    """
+
+    project = models.OneToOneField(
+        "finance.Project", on_delete=models.CASCADE, related_name="jira_progress"
+    )
+    jira_project_key = models.CharField(max_length=20)
+    progress_percent = models.DecimalField(max_digits=5, decimal_places=2)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-fetched_at"]
+
+    def __str__(self) -> str:
+        return f"{self.jira_project_key}: {self.progress_percent}% @ {self.fetched_at:%Y-%m-%d %H:%M}"
+
+
+class JiraIssue(models.Model):
+    """
+    Espejo local de issues de Jira con los campos que usan progreso y sprints.
+    Se refresca incrementalmente con JQL `updated >= watermark` por proyecto.
+    """
+
+    jira_key = models.CharField(max_length=50, unique=True)
+    jira_project_key = models.CharField(max_length=20)
+    summary = models.CharField(max_length=500, blank=True, default="")
+    assignee = models.CharField(max_length=255, blank=True, default="")
+    status_name = models.CharField(max_length=100, blank=True, default="")
+    status_category = models.CharField(max_length=20, blank=True, default="")
+    story_points = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    sprint_id = models.IntegerField(null=True, blank=True)
+    sprint_name = models.CharField(max_length=255, blank=True, default="")
+    sprint_state = models.CharField(max_length=20, blank=True, default="")
+    updated = models.DateTimeField()
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["jira_key"]
+        indexes = [
+            models.Index(fields=["jira_project_key", "updated"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.jira_key} [{self.status_category}] {self.story_points or '-'} SP"
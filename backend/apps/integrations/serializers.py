@@ -13,6 +13,10 @@ class SyncLogSerializer(serializers.ModelSerializer):
             "finished_at",
             "status",
             "entries_synced",
+            "entries_inserted",
+            "entries_updated",
+            "entries_skipped",
+            "chunks_written",
             "error_message",
         ]
         read_only_fields = fields
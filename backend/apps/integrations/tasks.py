@@ -26,35 +26,30 @@ def sync_clockify_time_entries(self):  # type: ignore[no-untyped-def]
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)
 def sync_jira_progress(self):  # type: ignore[no-untyped-def]
     """
-    Obtener progreso de Jira para todos los proyectos vinculados.
-    Se ejecuta 5 min despues de sync de Clockify.
+    Obtener progreso de Jira para todos los proyectos vinculados y guardarlo
+    en JiraProgressSnapshot. Se ejecuta 5 min despues de sync de Clockify.
     """
-    from decimal import Decimal
-
     from django.utils import timezone
 
     from apps.finance.models import Project
 
-    from .jira_client import JiraClient
+    from .jira_progress_service import JiraProgressService
     from .models import SyncLog
 
     sync_log = SyncLog.objects.create(sync_type="jira")
 
     try:
-        client = JiraClient()
-        projects = Project.objects.exclude(jira_project_key="")
-        synced = 0
+        projects = list(Project.objects.exclude(jira_project_key=""))
+        progress_map = JiraProgressService().refresh(projects)
+        synced = len(progress_map)
 
         for project in projects:
-            progress = client.fetch_project_progress(project.jira_project_key)
-            # Store progress temporarily as a tag on the sync log
-            # The evaluate task will use HealthSnapshot for actual storage
-            logger.info(
-                "Jira progress for %s: %s%%", project.code, progress
-            )
-            synced += 1
-
-        sync_log.status = "success"
+            if project.id in progress_map:
+                logger.info(
+                    "Jira progress for %s: %s%%", project.code, progress_map[project.id]
+                )
+
+        sync_log.status = "success" if synced == len(projects) else "partial"
         sync_log.entries_synced = synced
         sync_log.finished_at = timezone.now()
         sync_log.save()
@@ -73,31 +68,80 @@ def sync_jira_progress(self):  # type: ignore[no-untyped-def]
 @shared_task
 def evaluate_all_projects_health():  # type: ignore[no-untyped-def]
     """
-    Combina datos de Clockify (consumo) y Jira (progreso) para
-    ejecutar TripleAxisService.run_evaluation() en cada proyecto activo.
+    Combina datos de Clockify (consumo) y Jira (progreso) para evaluar
+    todos los proyectos con TripleAxisService.evaluate_portfolio(), con un
+    numero constante de queries. El progreso sale de JiraProgressSnapshot;
+    solo se consulta Jira para los proyectos cuyo snapshot expiro. Con
+    HEALTH_SNAPSHOT_DEDUPE las evaluaciones sin cambios solo extienden el
+    snapshot anterior.
     """
-    from decimal import Decimal
+    from django.conf import settings
 
+    from apps.finance.dashboard_cache import CeoDashboardCache
     from apps.finance.models import Project
     from apps.finance.services import TripleAxisService
 
-    from .jira_client import JiraClient
+    from .jira_progress_service import JiraProgressService
 
-    client = JiraClient()
-    projects = Project.objects.exclude(jira_project_key="")
-    evaluated = 0
+    projects = list(Project.objects.exclude(jira_project_key=""))
+    progress_map = JiraProgressService().get_progress(projects)
 
     for project in projects:
-        try:
-            progress = client.fetch_project_progress(project.jira_project_key)
-            TripleAxisService.run_evaluation(project, progress)
-            evaluated += 1
-            logger.info(
-                "Health evaluated for %s: %s",
-                project.code,
-                project.current_health_status,
-            )
-        except Exception:
-            logger.exception("Failed to evaluate health for %s", project.code)
-
-    return {"status": "success", "projects_evaluated": evaluated}
+        if project.id not in progress_map:
+            logger.warning("No Jira progress for %s, skipping evaluation", project.code)
+
+    snapshots = TripleAxisService.evaluate_portfolio(
+        projects, progress_map, dedupe=settings.HEALTH_SNAPSHOT_DEDUPE
+    )
+    CeoDashboardCache.invalidate("health evaluation")
+    for snapshot in snapshots:
+        logger.info(
+            "Health evaluated for %s: %s",
+            snapshot.project.code,
+            snapshot.health_status,
+        )
+
+    return {"status": "success", "projects_evaluated": len(snapshots)}
+
+
+@shared_task
+def compact_health_snapshots():  # type: ignore[no-untyped-def]
+    """Aplicar los niveles de retencion de HealthSnapshot (hourly/daily/weekly)."""
+    from apps.finance.services import HealthSnapshotRetentionService
+
+    deleted = HealthSnapshotRetentionService.compact()
+    logger.info("Health snapshot compaction removed %d snapshots", deleted)
+    return {"status": "success", "deleted": deleted}
+
+
+@shared_task
+def refresh_jira_issue_mirror(full: bool = False):  # type: ignore[no-untyped-def]
+    """
+    Refrescar el espejo JiraIssue. Las corridas horarias lo hacen de forma
+    incremental via sync_jira_progress; la corrida diaria con full=True
+    elimina issues borrados o movidos de proyecto.
+    """
+    from apps.finance.models import Project
+
+    from .jira_progress_service import JiraIssueMirrorService
+
+    keys = Project.objects.exclude(jira_project_key="").values_list(
+        "jira_project_key", flat=True
+    )
+    refreshed = JiraIssueMirrorService().refresh(keys, full=full)
+    return {"status": "success", "projects_refreshed": len(refreshed)}
+
+
+@shared_task
+def refresh_ceo_dashboard(project_ids, date_from=None, date_to=None):  # type: ignore[no-untyped-def]
+    """Revalidar en segundo plano una entrada vieja del cache de ceo_dashboard."""
+    from datetime import date
+
+    from apps.finance.dashboard_cache import CeoDashboardCache
+
+    CeoDashboardCache.refresh(
+        project_ids,
+        date.fromisoformat(date_from) if date_from else None,
+        date.fromisoformat(date_to) if date_to else None,
+    )
+    return {"status": "success"}
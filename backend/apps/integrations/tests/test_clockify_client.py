@@ -0,0 +1,286 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.finance.models import BillingRole, Project, TimeEntry
+from apps.integrations.clockify_client import ClockifyClient, TokenBucket
+from apps.integrations.clockify_sync_service import ClockifySyncService
+from apps.integrations.models import ClockifySyncCursor
+
+PAGE_SIZE = 200
+
+
+class StubClockifyHandler(BaseHTTPRequestHandler):
+    """Stub de la API de Clockify: usuarios, paginas de entries y 429 opcionales."""
+
+    def do_GET(self) -> None:  # noqa: N802
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.request_times.append(time.monotonic())
+            throttle = server.throttle_remaining > 0
+            if throttle:
+                server.throttle_remaining -= 1
+        try:
+            time.sleep(server.latency)
+            if throttle:
+                self._send(429, {"message": "Too many requests"}, {"Retry-After": "0"})
+                return
+
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if parts[-1] == "users":
+                self._send(200, [
+                    {"id": f"u{i}", "name": f"User {i}", "email": f"u{i}@test.com"}
+                    for i in range(server.user_count)
+                ])
+                return
+
+            user_id = parts[-2]
+            page = int(parse_qs(url.query)["page"][0])
+            # Dos paginas por usuario: una llena y una parcial
+            count = PAGE_SIZE if page == 1 else 3 if page == 2 else 0
+            self._send(200, [
+                {
+                    "id": f"{user_id}-{page}-{i}",
+                    "projectId": "clk-proj-1",
+                    "description": "Trabajo",
+                    "tags": [],
+                    "timeInterval": {
+                        "start": "2026-01-05T15:00:00Z",
+                        "end": "2026-01-05T16:00:00Z",
+                        "duration": "PT1H",
+                    },
+                }
+                for i in range(count)
+            ])
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Reporte detallado: filtra server.report_entries por rango y pagina."""
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        start = datetime.fromisoformat(body["dateRangeStart"].replace("Z", "+00:00"))
+        end = datetime.fromisoformat(body["dateRangeEnd"].replace("Z", "+00:00"))
+        page = body["detailedFilter"]["page"]
+        page_size = body["detailedFilter"]["pageSize"]
+        with server.lock:
+            server.report_requests.append((start, end, page))
+
+        matching = [
+            entry for entry in server.report_entries
+            if start <= datetime.fromisoformat(entry["timeInterval"]["start"]) <= end
+        ]
+        self._send(200, {
+            "totals": [{"entriesCount": len(matching)}] if matching else [],
+            "timeentries": matching[(page - 1) * page_size:page * page_size],
+        })
+
+    def _send(self, status: int, body: object, headers: dict | None = None) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args) -> None:  # silenciar salida del servidor
+        pass
+
+
+class StubClockifyServerMixin:
+    """Levanta el stub en un puerto libre y apunta CLOCKIFY_BASE_URL a el."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubClockifyHandler)
+        self.server.lock = threading.Lock()
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.request_times = []
+        self.server.throttle_remaining = 0
+        self.server.latency = 0.0
+        self.server.user_count = 1
+        self.server.report_entries = []
+        self.server.report_requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            CLOCKIFY_BASE_URL=f"http://127.0.0.1:{self.server.server_port}",
+            CLOCKIFY_REPORTS_URL=f"http://127.0.0.1:{self.server.server_port}/reports",
+            CLOCKIFY_WORKSPACE_ID="ws",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class TokenBucketTest(SimpleTestCase):
+    def test_waits_when_bucket_is_empty(self) -> None:
+        now = [0.0]
+        sleeps: list[float] = []
+
+        def fake_sleep(seconds: float) -> None:
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=fake_sleep)
+        for _ in range(4):
+            bucket.acquire()
+
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+
+class ClockifyClientTest(StubClockifyServerMixin, SimpleTestCase):
+    def test_retries_after_429(self) -> None:
+        self.server.throttle_remaining = 2
+
+        users = ClockifyClient().fetch_users()
+
+        self.assertEqual(len(users), 1)
+        self.assertEqual(len(self.server.request_times), 3)
+
+    def test_rate_limiter_spaces_requests(self) -> None:
+        client = ClockifyClient(rate_limiter=TokenBucket(rate=20, capacity=1))
+
+        started = time.monotonic()
+        for _ in range(5):
+            client.fetch_users()
+
+        # 1 token inicial + 4 recargas a 20/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+
+class ClockifyStreamingTest(StubClockifyServerMixin, SimpleTestCase):
+    def test_iter_time_entries_streams_pages(self) -> None:
+        for prefetch in (False, True):
+            self.server.request_times.clear()
+            entries = ClockifyClient().iter_time_entries(user_id="u0", prefetch=prefetch)
+
+            first = next(entries)
+            time.sleep(0.05)  # deja terminar el prefetch en curso
+            # Sin prefetch solo se pidio la pagina 1; con prefetch tambien la 2
+            self.assertEqual(len(self.server.request_times), 2 if prefetch else 1)
+
+            remaining = list(entries)
+            self.assertEqual(first["id"], "u0-1-0")
+            self.assertEqual(len(remaining), PAGE_SIZE + 3 - 1)
+            self.assertEqual(remaining[-1]["id"], "u0-2-2")
+
+
+def _report_entry(entry_id: str, start: datetime, user: int = 0) -> dict:
+    return {
+        "_id": entry_id,
+        "projectId": "clk-proj-1",
+        "description": "Reporte",
+        "tags": [{"id": "t1", "name": "Dev"}],
+        "timeInterval": {
+            "start": start.isoformat(),
+            "end": (start + timedelta(hours=1)).isoformat(),
+            "duration": 5400,
+        },
+        "userId": f"u{user}",
+        "userName": f"User {user}",
+        "userEmail": f"u{user}@test.com",
+    }
+
+
+class WorkspaceReportTest(StubClockifyServerMixin, SimpleTestCase):
+    def test_window_bisected_under_entry_cap(self) -> None:
+        jan = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.server.report_entries = [
+            _report_entry(f"r{day}-{i}", jan + timedelta(days=day, hours=i + 10))
+            for day in range(20)
+            for i in range(3)
+        ]
+
+        with mock.patch("apps.integrations.clockify_client.REPORTS_MAX_ENTRIES", 20):
+            entries = list(
+                ClockifyClient().iter_workspace_time_entries(
+                    jan, jan + timedelta(days=20), page_size=5
+                )
+            )
+
+        self.assertEqual(sorted(e["id"] for e in entries),
+                         sorted(e["_id"] for e in self.server.report_entries))
+        self.assertEqual(entries[0]["timeInterval"]["duration"], "PT5400S")
+        self.assertEqual(entries[0]["userEmail"], "u0@test.com")
+        # Ningun tramo paginado supera el limite
+        paged_windows = {(s, e) for s, e, page in self.server.report_requests if page > 1}
+        for window_start, window_end in paged_windows:
+            in_window = [
+                e for e in self.server.report_entries
+                if window_start <= datetime.fromisoformat(e["timeInterval"]["start"]) <= window_end
+            ]
+            self.assertLessEqual(len(in_window), 20)
+
+
+class ConcurrentClockifySyncTest(StubClockifyServerMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.project = Project.objects.create(
+            name="Sync",
+            code="SYN-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+            clockify_project_id="clk-proj-1",
+        )
+        BillingRole.objects.create(
+            role_name="Backend Dev", default_hourly_rate=Decimal("100.00")
+        )
+
+    def test_users_fetched_in_parallel(self) -> None:
+        self.server.user_count = 4
+        self.server.latency = 0.05
+        self.server.throttle_remaining = 1
+
+        synced = ClockifySyncService(max_workers=4).sync_all_projects(workspace_mode=False)
+
+        expected = 4 * (PAGE_SIZE + 3)
+        self.assertEqual(synced, expected)
+        self.assertEqual(TimeEntry.objects.count(), expected)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertEqual(self.project.financial_rollup.entry_count, expected)
+        self.assertEqual(ClockifySyncCursor.objects.count(), 4)
+
+    def test_sequential_mode_matches(self) -> None:
+        self.server.user_count = 2
+
+        synced = ClockifySyncService(max_workers=1).sync_all_projects(
+            workspace_mode=False
+        )
+
+        self.assertEqual(synced, 2 * (PAGE_SIZE + 3))
+        self.assertEqual(self.server.max_in_flight, 1)
+
+    @override_settings(CLOCKIFY_BACKFILL_START="2026-01-01")
+    def test_first_sync_uses_workspace_report(self) -> None:
+        jan = datetime(2026, 1, 5, 15, tzinfo=dt_timezone.utc)
+        self.server.report_entries = [
+            _report_entry(f"r{i}", jan + timedelta(days=i), user=i % 2) for i in range(5)
+        ]
+
+        synced = ClockifySyncService().sync_all_projects()
+
+        self.assertEqual(synced, 5)
+        self.assertEqual(self.server.request_times, [])  # ningun GET por usuario
+        entry = TimeEntry.objects.get(clockify_id="r1")
+        self.assertEqual(entry.user_email, "u1@test.com")
+        self.assertEqual(entry.duration_hours, Decimal("1.5"))
+        self.assertEqual(entry.cost, Decimal("150.00"))
@@ -0,0 +1,294 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.finance.models import (
+    BillingRole,
+    Phase,
+    Project,
+    ProjectFinancialRollup,
+    ProjectRoleRate,
+    TimeEntry,
+    UserBillingRole,
+)
+from apps.integrations.clockify_client import format_clockify_datetime
+from apps.integrations.clockify_sync_service import ClockifySyncService
+from apps.integrations.models import ClockifySyncCursor, SyncLog
+
+
+def _clockify_entry(
+    entry_id: str,
+    duration: str,
+    start: str,
+    tags: list[str] | None = None,
+    end: str | None = None,
+) -> dict:
+    return {
+        "id": entry_id,
+        "projectId": "clk-proj-1",
+        "description": "Trabajo",
+        "tags": [{"name": tag} for tag in tags or []],
+        "timeInterval": {"start": start, "end": end or start, "duration": duration},
+    }
+
+
+class ClockifySyncServiceTest(TestCase):
+    """Tests del sync Clockify -> TimeEntry con cliente HTTP simulado."""
+
+    def setUp(self) -> None:
+        self.project = Project.objects.create(
+            name="Sync",
+            code="SYN-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+            clockify_project_id="clk-proj-1",
+        )
+        self.role = BillingRole.objects.create(
+            role_name="Backend Dev", default_hourly_rate=Decimal("100.00")
+        )
+        self.service = ClockifySyncService(max_workers=1)
+        self.service.client = MagicMock()
+        self.service.client.fetch_users.return_value = [
+            {"id": "u1", "name": "Dev User", "email": "dev@test.com"},
+        ]
+
+    def _sync(self, entries: list[dict]) -> int:
+        self.service.client.iter_time_entries.side_effect = lambda **kwargs: iter(entries)
+        return self.service.sync_all_projects(workspace_mode=False)
+
+    def test_sync_creates_entries_and_rollup(self) -> None:
+        synced = self._sync([
+            _clockify_entry("e1", "PT1H30M", "2026-01-05T15:00:00Z"),
+            _clockify_entry("e2", "PT2H", "2026-01-06T15:00:00Z"),
+        ])
+
+        self.assertEqual(synced, 2)
+        self.assertEqual(TimeEntry.objects.count(), 2)
+        rollup = ProjectFinancialRollup.objects.get(project=self.project)
+        self.assertEqual(rollup.consumed_hours, Decimal("3.5"))
+        self.assertEqual(rollup.actual_cost, Decimal("350.00"))
+        self.assertEqual(rollup.entry_count, 2)
+        self.assertEqual(SyncLog.objects.get().status, "success")
+
+    def test_resync_applies_deltas_for_updated_entries(self) -> None:
+        self._sync([
+            _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z"),
+            _clockify_entry("e2", "PT2H", "2026-01-06T15:00:00Z"),
+        ])
+        self._sync([
+            _clockify_entry("e2", "PT3H", "2026-01-06T15:00:00Z"),
+            _clockify_entry("e3", "PT1H", "2026-01-07T15:00:00Z"),
+        ])
+
+        rollup = ProjectFinancialRollup.objects.get(project=self.project)
+        self.assertEqual(rollup.consumed_hours, Decimal("5"))
+        self.assertEqual(rollup.entry_count, 3)
+        self.assertEqual(str(rollup.last_entry_date), "2026-01-07")
+
+    def test_chunked_upsert_records_inserted_and_updated(self) -> None:
+        self.service.chunk_size = 2
+        self._sync([
+            _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z"),
+            _clockify_entry("e2", "PT1H", "2026-01-06T15:00:00Z"),
+        ])
+        self._sync([
+            _clockify_entry("e1", "PT2H", "2026-01-05T15:00:00Z"),
+            _clockify_entry("e2", "PT1H", "2026-01-06T15:00:00Z"),
+            _clockify_entry("e3", "PT1H", "2026-01-07T15:00:00Z"),
+        ])
+
+        log = SyncLog.objects.order_by("-id").first()
+        self.assertEqual(
+            (log.entries_synced, log.entries_inserted, log.entries_updated,
+             log.entries_skipped, log.chunks_written),
+            (3, 1, 1, 1, 2),
+        )
+        self.assertEqual(TimeEntry.objects.get(clockify_id="e1").duration_hours, Decimal("2"))
+        rollup = ProjectFinancialRollup.objects.get(project=self.project)
+        self.assertEqual(rollup.consumed_hours, Decimal("4"))
+        self.assertEqual(rollup.entry_count, 3)
+
+    def test_phase_and_rate_override_from_preloaded_maps(self) -> None:
+        phase = Phase.objects.create(
+            project=self.project, name="Desarrollo", estimated_hours=Decimal("40.00")
+        )
+        ProjectRoleRate.objects.create(
+            project=self.project, billing_role=self.role, hourly_rate=Decimal("80.00")
+        )
+
+        self._sync([
+            _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z", tags=["otro", "DESARROLLO"]),
+        ])
+
+        entry = TimeEntry.objects.get(clockify_id="e1")
+        self.assertEqual(entry.phase, phase)
+        self.assertEqual(entry.billing_role, self.role)
+        self.assertEqual(entry.cost, Decimal("80.00"))
+
+    def test_user_role_mapping_and_dated_rate(self) -> None:
+        pm = BillingRole.objects.create(role_name="PM", default_hourly_rate=Decimal("300.00"))
+        UserBillingRole.objects.create(user_email="dev@test.com", billing_role=pm)
+        ProjectRoleRate.objects.create(
+            project=self.project,
+            billing_role=pm,
+            hourly_rate=Decimal("350.00"),
+            effective_from=date(2026, 1, 6),
+        )
+
+        self._sync([
+            _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z"),
+            _clockify_entry("e2", "PT1H", "2026-01-06T15:00:00Z"),
+        ])
+
+        entries = TimeEntry.objects.order_by("clockify_id")
+        self.assertEqual({e.billing_role for e in entries}, {pm})
+        self.assertEqual([e.cost for e in entries], [Decimal("300.00"), Decimal("350.00")])
+
+    def test_query_count_independent_of_entry_count(self) -> None:
+        def run(prefix: str, count: int) -> int:
+            entries = [
+                _clockify_entry(f"{prefix}{i}", "PT1H", "2026-01-05T15:00:00Z", tags=["dev"])
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self._sync(entries)
+            return len(queries)
+
+        run("warmup", 1)  # primera sync crea el rollup del proyecto
+        self.assertEqual(run("a", 2), run("b", 40))
+
+    def test_cursor_per_user_advances_and_sets_next_start(self) -> None:
+        self.service.client.fetch_users.return_value = [
+            {"id": "u1", "name": "Dev User", "email": "dev@test.com"},
+            {"id": "u2", "name": "QA User", "email": "qa@test.com"},
+        ]
+        by_user = {
+            "u1": [
+                _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z", end="2026-01-05T16:00:00Z"),
+                _clockify_entry("e2", "PT1H", "2026-01-06T15:00:00Z", end="2026-01-06T16:00:00Z"),
+            ],
+            "u2": [],
+        }
+        client = self.service.client
+        client.iter_time_entries.side_effect = lambda **kw: iter(by_user[kw["user_id"]])
+
+        self.service.sync_all_projects(workspace_mode=False)
+
+        cursor = ClockifySyncCursor.objects.get(clockify_user_id="u1")
+        self.assertEqual(cursor.last_entry_end.isoformat(), "2026-01-06T16:00:00+00:00")
+        self.assertFalse(ClockifySyncCursor.objects.filter(clockify_user_id="u2").exists())
+
+        client.iter_time_entries.reset_mock()
+        self.service.sync_all_projects(workspace_mode=False)
+        starts = {
+            call.kwargs["user_id"]: call.kwargs["start"]
+            for call in client.iter_time_entries.call_args_list
+        }
+        self.assertEqual(starts["u1"], "2026-01-06T16:00:00.000Z")
+        # u2 sin cursor usa la ventana global (ultima sync exitosa - 2h)
+        self.assertNotEqual(starts["u2"], starts["u1"])
+
+    def test_failed_user_keeps_cursor_and_marks_partial(self) -> None:
+        self.service.client.fetch_users.return_value = [
+            {"id": "u1", "name": "Dev User", "email": "dev@test.com"},
+            {"id": "u2", "name": "QA User", "email": "qa@test.com"},
+        ]
+        ClockifySyncCursor.objects.create(
+            clockify_user_id="u2",
+            user_email="qa@test.com",
+            last_entry_end="2026-01-01T00:00:00Z",
+        )
+
+        def entries_for(**kwargs):
+            if kwargs["user_id"] == "u2":
+                yield _clockify_entry("q1", "PT1H", "2026-01-02T15:00:00Z", end="2026-01-02T16:00:00Z")
+                raise ConnectionError("timeout")
+            yield _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z", end="2026-01-05T16:00:00Z")
+
+        self.service.client.iter_time_entries.side_effect = entries_for
+
+        synced = self.service.sync_all_projects(workspace_mode=False)
+
+        log = SyncLog.objects.get()
+        self.assertEqual(log.status, "partial")
+        self.assertIn("qa@test.com", log.error_message)
+        self.assertEqual(synced, 2)
+        cursors = dict(
+            ClockifySyncCursor.objects.values_list("clockify_user_id", "last_entry_end")
+        )
+        self.assertEqual(cursors["u2"].isoformat(), "2026-01-01T00:00:00+00:00")
+        self.assertEqual(cursors["u1"].isoformat(), "2026-01-05T16:00:00+00:00")
+
+    def test_repeatedly_failing_user_does_not_trigger_backfill(self) -> None:
+        self.service.client.fetch_users.return_value = [
+            {"id": "u1", "name": "Dev User", "email": "dev@test.com"},
+            {"id": "u2", "name": "QA User", "email": "qa@test.com"},
+        ]
+        now = timezone.now()
+        SyncLog.objects.create(sync_type="clockify", status="success", finished_at=now)
+
+        def entries_for(**kwargs):
+            if kwargs["user_id"] == "u2":
+                raise ConnectionError("timeout")
+            yield _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z", end="2026-01-05T16:00:00Z")
+
+        client = self.service.client
+        client.iter_time_entries.side_effect = entries_for
+        starts = []
+        for _run in range(4):
+            # Cada sync corre 3 dias despues de la anterior
+            SyncLog.objects.update(
+                started_at=F("started_at") - timedelta(days=3),
+                finished_at=F("finished_at") - timedelta(days=3),
+            )
+            client.iter_time_entries.reset_mock()
+            with self.assertLogs("apps.integrations.clockify_sync_service", "ERROR"):
+                self.service.sync_all_projects()
+            starts.append({
+                call.kwargs["user_id"]: call.kwargs["start"]
+                for call in client.iter_time_entries.call_args_list
+            })
+
+        client.iter_workspace_time_entries.assert_not_called()
+        self.assertEqual(
+            list(SyncLog.objects.order_by("id").values_list("status", flat=True)),
+            ["success"] + ["partial"] * 4,
+        )
+        # u2 se reintenta siempre desde el inicio de la ventana en que fallo
+        first_window = format_clockify_datetime(now - timedelta(days=3, hours=2))
+        self.assertEqual({run["u2"] for run in starts}, {first_window})
+        self.assertEqual(
+            ClockifySyncCursor.objects.get(clockify_user_id="u2").last_entry_end,
+            now - timedelta(days=3, hours=2),
+        )
+        self.assertEqual(starts[-1]["u1"], "2026-01-05T16:00:00.000Z")
+
+    def test_unchanged_entries_are_skipped(self) -> None:
+        entries = [
+            _clockify_entry("e1", "PT1H", "2026-01-05T15:00:00Z"),
+            _clockify_entry("e2", "PT2H", "2026-01-06T15:00:00Z"),
+        ]
+        self._sync(entries)
+        first_hash = TimeEntry.objects.get(clockify_id="e1").content_hash
+
+        with CaptureQueriesContext(connection) as queries:
+            self._sync(entries)
+
+        log = SyncLog.objects.order_by("-id").first()
+        self.assertEqual((log.entries_skipped, log.entries_updated, log.entries_inserted), (2, 0, 0))
+        self.assertFalse(
+            [q for q in queries if "INSERT INTO \"finance_timeentry\"" in q["sql"]]
+        )
+        self.assertEqual(TimeEntry.objects.get(clockify_id="e1").content_hash, first_hash)
+        self.assertEqual(
+            ProjectFinancialRollup.objects.get(project=self.project).consumed_hours,
+            Decimal("3"),
+        )
@@ -0,0 +1,133 @@
+import json
+import re
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from apps.integrations.jira_client import MIRROR_FIELDS, JiraClient
+
+
+class StubJiraHandler(BaseHTTPRequestHandler):
+    """Stub de /rest/api/3/search: issues por proyecto con story points y status."""
+
+    def do_GET(self) -> None:  # noqa: N802
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            query = parse_qs(urlparse(self.path).query)
+            with server.lock:
+                server.requests.append(query)
+            key = re.match(r"project = (\w+)", query["jql"][0]).group(1)
+            if key in server.failing:
+                self._send(500, {"errorMessages": ["boom"]})
+                return
+
+            issues = [
+                {
+                    "key": f"{key}-{i}",
+                    "fields": {
+                        "customfield_10016": points,
+                        "status": {"statusCategory": {"key": "done" if done else "indeterminate"}},
+                        "updated": "2026-01-05T10:00:00.000-0600",
+                    },
+                }
+                for i, (points, done) in enumerate(server.projects[key])
+            ]
+            start_at = int(query["startAt"][0])
+            max_results = int(query["maxResults"][0])
+            self._send(200, {
+                "total": len(issues),
+                "issues": issues[start_at:start_at + max_results],
+            })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send(self, status: int, body: object) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args) -> None:  # silenciar salida del servidor
+        pass
+
+
+class JiraProgressBatchTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubJiraHandler)
+        self.server.lock = threading.Lock()
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.requests = []
+        self.server.latency = 0.0
+        self.server.failing = set()
+        self.server.projects = {
+            # 250 issues -> 3 paginas; 100 de 250 hechos
+            "BIG": [(2, i < 100) for i in range(250)],
+            "SMALL": [(3, True), (1, False)],
+            "EMPTY": [],
+        }
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            JIRA_BASE_URL=f"http://127.0.0.1:{self.server.server_port}"
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_search_pages_projects_in_parallel(self) -> None:
+        self.server.latency = 0.05
+
+        issues_by_key, failed = JiraClient(max_workers=4).fetch_issues_updated_since(
+            {"BIG": None, "SMALL": None, "EMPTY": None}
+        )
+
+        self.assertEqual(failed, set())
+        self.assertEqual(
+            {key: len(issues) for key, issues in issues_by_key.items()},
+            {"BIG": 250, "SMALL": 2, "EMPTY": 0},
+        )
+        self.assertEqual(len(self.server.requests), 5)  # 3 + 1 + 1
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertEqual(self.server.requests[0]["fields"], [MIRROR_FIELDS])
+
+    def test_failed_project_is_left_out(self) -> None:
+        self.server.failing = {"SMALL"}
+
+        with self.assertLogs("apps.integrations.jira_client", level="ERROR"):
+            issues_by_key, failed = JiraClient().fetch_issues_updated_since(
+                {"BIG": None, "SMALL": None}
+            )
+
+        self.assertEqual(failed, {"SMALL"})
+        self.assertEqual(set(issues_by_key), {"BIG"})
+
+    def test_issues_updated_since_filters_by_watermark(self) -> None:
+        since = timezone.now() - timedelta(hours=1)
+
+        issues_by_key, failed = JiraClient(max_workers=4).fetch_issues_updated_since(
+            {"BIG": None, "SMALL": since}
+        )
+
+        self.assertEqual(failed, set())
+        self.assertEqual(len(issues_by_key["BIG"]), 250)
+        self.assertEqual(len(issues_by_key["SMALL"]), 2)
+        jql = {q["jql"][0].split()[2]: q["jql"][0] for q in self.server.requests}
+        self.assertEqual(jql["BIG"], "project = BIG ORDER BY updated ASC")
+        # 60 minutos (redondeado hacia arriba) + 5 de margen
+        self.assertEqual(
+            jql["SMALL"], 'project = SMALL AND updated >= "-66m" ORDER BY updated ASC'
+        )
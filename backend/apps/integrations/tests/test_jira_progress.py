@@ -0,0 +1,212 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.finance.models import HealthSnapshot, Project
+from apps.integrations.jira_progress_service import (
+    JiraIssueMirrorService,
+    JiraProgressService,
+)
+from apps.integrations.models import JiraIssue, JiraProgressSnapshot
+from apps.integrations.tasks import (
+    evaluate_all_projects_health,
+    refresh_jira_issue_mirror,
+    sync_jira_progress,
+)
+
+
+def _issue(
+    key: str,
+    points: float | None,
+    done: bool,
+    updated: str = "2026-01-05T10:00:00.000-0600",
+    sprints: list | None = None,
+) -> dict:
+    return {
+        "key": key,
+        "fields": {
+            "summary": f"Issue {key}",
+            "assignee": {"displayName": "Ana Martinez"},
+            "status": {
+                "name": "Done" if done else "In Progress",
+                "statusCategory": {"key": "done" if done else "indeterminate"},
+            },
+            "updated": updated,
+            "customfield_10016": points,
+            "customfield_10020": sprints,
+        },
+    }
+
+
+class JiraProgressCacheTest(TestCase):
+    """Tests de JiraProgressSnapshot: refresh desde sync y lectura con TTL."""
+
+    def setUp(self) -> None:
+        self.projects = [
+            Project.objects.create(
+                name=f"Proyecto {key}",
+                code=f"P-{key}",
+                client_name="Acme Corp",
+                budget_hours=Decimal("100.00"),
+                client_invoice_amount=Decimal("10000.00"),
+                target_margin=Decimal("30.00"),
+                jira_project_key=key,
+            )
+            for key in ("AAA", "BBB")
+        ]
+        self.client = MagicMock()
+        # 2 de 5 puntos hechos -> 40%
+        self.client.fetch_issues_updated_since.side_effect = lambda since_by_key: (
+            {
+                key: [_issue(f"{key}-1", 2, True), _issue(f"{key}-2", 3, False)]
+                for key in since_by_key
+            },
+            set(),
+        )
+
+    def test_fresh_snapshots_skip_jira(self) -> None:
+        service = JiraProgressService(self.client)
+        service.refresh(self.projects)
+        self.client.fetch_issues_updated_since.reset_mock()
+
+        progress = service.get_progress(self.projects)
+
+        self.assertEqual(set(progress.values()), {Decimal("40.00")})
+        self.client.fetch_issues_updated_since.assert_not_called()
+
+    def test_stale_or_rekeyed_snapshots_are_refetched(self) -> None:
+        service = JiraProgressService(self.client)
+        service.refresh(self.projects)
+        JiraProgressSnapshot.objects.filter(project=self.projects[0]).update(
+            fetched_at=timezone.now() - timedelta(hours=2)
+        )
+        self.projects[1].jira_project_key = "CCC"
+        self.projects[1].save()
+
+        service.get_progress(self.projects)
+
+        since_by_key = self.client.fetch_issues_updated_since.call_args.args[0]
+        self.assertEqual(list(since_by_key), ["AAA", "CCC"])
+        self.assertIsNotNone(since_by_key["AAA"])  # watermark del espejo
+        self.assertIsNone(since_by_key["CCC"])
+        self.assertEqual(
+            JiraProgressSnapshot.objects.get(project=self.projects[1]).jira_project_key,
+            "CCC",
+        )
+
+    def test_evaluation_task_reads_snapshots_from_sync_task(self) -> None:
+        with patch("apps.integrations.jira_progress_service.JiraClient", return_value=self.client):
+            sync_jira_progress.apply()
+            self.client.fetch_issues_updated_since.reset_mock()
+            result = evaluate_all_projects_health.apply().get()
+
+        self.client.fetch_issues_updated_since.assert_not_called()
+        self.assertEqual(result["projects_evaluated"], 2)
+        self.assertEqual(
+            set(HealthSnapshot.objects.values_list("progress_percent", flat=True)),
+            {Decimal("40.00")},
+        )
+
+
+class JiraIssueMirrorTest(TestCase):
+    """Tests del espejo JiraIssue: watermark, upsert, borrado y agregados."""
+
+    def setUp(self) -> None:
+        self.client = MagicMock()
+        self.service = JiraIssueMirrorService(self.client)
+
+    def _respond(self, issues_by_key: dict, failed: set | None = None) -> None:
+        self.client.fetch_issues_updated_since.side_effect = None
+        self.client.fetch_issues_updated_since.return_value = (issues_by_key, failed or set())
+
+    def test_incremental_refresh_upserts_from_watermark(self) -> None:
+        self._respond({"AAA": [
+            _issue("AAA-1", 2, True, "2026-01-05T10:00:00.000-0600"),
+            _issue("AAA-2", 3, False, "2026-01-06T10:00:00.000-0600"),
+        ]})
+        self.service.refresh(["AAA"])
+        self._respond({"AAA": [_issue("AAA-2", 3, True, "2026-01-07T09:30:00.000-0600")]})
+
+        refreshed = self.service.refresh(["AAA"])
+
+        since = self.client.fetch_issues_updated_since.call_args.args[0]["AAA"]
+        self.assertEqual(since.isoformat(), "2026-01-06T16:00:00+00:00")
+        self.assertEqual(refreshed, {"AAA"})
+        self.assertEqual(JiraIssue.objects.count(), 2)
+        self.assertEqual(JiraIssue.objects.get(jira_key="AAA-2").status_category, "done")
+        self.assertEqual(self.service.progress(["AAA"]), {"AAA": Decimal("100.00")})
+
+    def test_full_refresh_removes_missing_issues(self) -> None:
+        self._respond({"AAA": [_issue("AAA-1", 2, True), _issue("AAA-2", 3, False)]})
+        self.service.refresh(["AAA"])
+        self._respond({"AAA": [_issue("AAA-2", 3, False)]})
+
+        self.service.refresh(["AAA"], full=True)
+
+        self.assertIsNone(self.client.fetch_issues_updated_since.call_args.args[0]["AAA"])
+        self.assertEqual(list(JiraIssue.objects.values_list("jira_key", flat=True)), ["AAA-2"])
+
+    def test_failed_project_keeps_mirror(self) -> None:
+        self._respond({"AAA": [_issue("AAA-1", 2, True)]})
+        self.service.refresh(["AAA"])
+        self._respond({}, failed={"AAA"})
+
+        self.assertEqual(self.service.refresh(["AAA"], full=True), set())
+        self.assertEqual(JiraIssue.objects.count(), 1)
+
+    def test_progress_aggregate_ignores_unestimated(self) -> None:
+        self._respond({
+            "AAA": [_issue("AAA-1", 1.5, True), _issue("AAA-2", 4.5, False),
+                    _issue("AAA-3", None, True)],
+            "BBB": [_issue("BBB-1", None, False)],
+        })
+        self.service.refresh(["AAA", "BBB"])
+
+        self.assertEqual(
+            self.service.progress(["AAA", "BBB", "ZZZ"]),
+            {"AAA": Decimal("25.00"), "BBB": Decimal("0"), "ZZZ": Decimal("0")},
+        )
+
+    def test_mirror_keeps_active_sprint(self) -> None:
+        closed = {"id": 7, "name": "Sprint 7", "state": "closed"}
+        active = {"id": 8, "name": "Sprint 8", "state": "active"}
+        self._respond({"AAA": [
+            _issue("AAA-1", 2, True, sprints=[closed, active]),
+            _issue("AAA-2", 3, False, sprints=[active]),
+            _issue("AAA-3", 5, True, sprints=[closed]),
+            _issue("AAA-4", 1, False),
+        ]})
+        self.service.refresh(["AAA"])
+
+        self.assertEqual(
+            list(JiraIssue.objects.order_by("jira_key").values_list(
+                "jira_key", "sprint_id", "sprint_name", "sprint_state"
+            )),
+            [
+                ("AAA-1", 8, "Sprint 8", "active"),
+                ("AAA-2", 8, "Sprint 8", "active"),
+                ("AAA-3", 7, "Sprint 7", "closed"),
+                ("AAA-4", None, "", ""),
+            ],
+        )
+
+    def test_refresh_task_runs_full_refresh(self) -> None:
+        Project.objects.create(
+            name="Proyecto AAA",
+            code="P-AAA",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+            jira_project_key="AAA",
+        )
+        self._respond({"AAA": [_issue("AAA-1", 2, True)]})
+
+        with patch("apps.integrations.jira_progress_service.JiraClient", return_value=self.client):
+            result = refresh_jira_issue_mirror.apply(kwargs={"full": True}).get()
+
+        self.assertEqual(result["projects_refreshed"], 1)
+        self.assertEqual(self.client.fetch_issues_updated_since.call_args.args[0], {"AAA": None})
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+from datetime import timedelta
+from tempfile import SpooledTemporaryFile
+from typing import IO
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Max, QuerySet
+from django.utils import timezone
+
+from apps.finance.models import Project, ProjectFinancialRollup
+
+from .excel_generator import XLSX_CONTENT_TYPE, write_project_excel
+from .models import ReportArtifact
+from .pdf_generator import generate_project_pdf
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT = ("pending", "running")
+
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "xlsx": XLSX_CONTENT_TYPE,
+}
+
+# Subir al cambiar el contenido de los reportes: invalida todo lo cacheado
+GENERATOR_VERSION = 1
+
+# Reportes mas chicos se generan en memoria; los grandes pasan a disco
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class ReportArtifactService:
+    """
+    Jobs de reportes con cache de artefactos.
+
+    request() calcula el fingerprint de los datos del proyecto y reutiliza
+    el artefacto listo con ese fingerprint, o encola generate_report en
+    Celery. build() (en el worker) genera el archivo en MEDIA_ROOT/reports,
+    borra las versiones anteriores del mismo proyecto y formato y aplica
+    evict(): se borran primero los artefactos descargados hace mas tiempo
+    hasta cumplir REPORT_CACHE_MAX_BYTES y REPORT_CACHE_MAX_FILES.
+    """
+
+    @staticmethod
+    def fingerprint(project: Project, report_format: str) -> str:
+        """
+        Version de los datos que muestra el reporte. Las time entries se
+        representan por el rollup, que el sync, los loaders y el admin
+        actualizan en cada escritura (updated_at cambia siempre).
+        """
+        rollup = (
+            ProjectFinancialRollup.objects.filter(project=project)
+            .values_list("updated_at", "entry_count", "consumed_hours", "actual_cost")
+            .first()
+        )
+        phases = list(
+            project.phases.order_by("pk").values_list(
+                "pk", "name", "estimated_hours", "sort_order", "status", "progress_percent"
+            )
+        )
+        snapshots = project.health_snapshots.aggregate(
+            count=Count("pk"), last=Max("timestamp"), valid=Max("valid_until")
+        )
+        raw = repr((
+            GENERATOR_VERSION,
+            report_format,
+            project.pk,
+            project.updated_at,
+            rollup,
+            phases,
+            sorted(snapshots.items()),
+        ))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @classmethod
+    def request(cls, project: Project, report_format: str) -> ReportArtifact:
+        """
+        Artefacto para el estado actual del proyecto. Si no esta listo (o el
+        job anterior fallo o se perdio) queda en pending y se encola.
+        """
+        fingerprint = cls.fingerprint(project, report_format)
+        now = timezone.now()
+        with transaction.atomic():
+            artifact, created = ReportArtifact.objects.select_for_update().get_or_create(
+                project=project, report_format=report_format, fingerprint=fingerprint
+            )
+            if artifact.status == "ready" and artifact.file and artifact.file.storage.exists(
+                artifact.file.name
+            ):
+                return artifact
+
+            lost = artifact.status in IN_FLIGHT and artifact.requested_at < now - timedelta(
+                seconds=settings.REPORT_JOB_TIMEOUT_SECONDS
+            )
+            if created or lost or artifact.status not in IN_FLIGHT:
+                artifact.status = "pending"
+                artifact.error_message = ""
+                artifact.requested_at = now
+                artifact.save(update_fields=["status", "error_message", "requested_at"])
+                transaction.on_commit(lambda: cls._enqueue(artifact.pk))
+        return artifact
+
+    @staticmethod
+    def _enqueue(artifact_id: int) -> None:
+        from .tasks import generate_report
+
+        generate_report.delay(artifact_id)
+
+    @classmethod
+    def build(cls, artifact_id: int) -> ReportArtifact:
+        """Generar el archivo de un artefacto pendiente (corre en el worker)."""
+        artifact = ReportArtifact.objects.select_related("project").get(pk=artifact_id)
+        if artifact.status == "ready":
+            return artifact
+
+        artifact.status = "running"
+        artifact.save(update_fields=["status"])
+        project = artifact.project
+        try:
+            with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as output:
+                if artifact.report_format == "xlsx":
+                    write_project_excel(project, output)
+                else:
+                    output.write(generate_project_pdf(project))
+                output.seek(0)
+                artifact.file.save(
+                    f"reporte-{project.code}-{artifact.fingerprint[:12]}.{artifact.report_format}",
+                    File(output),
+                    save=False,
+                )
+        except Exception as exc:
+            logger.exception("Report %s failed: %s", artifact.pk, exc)
+            artifact.status = "failed"
+            artifact.error_message = str(exc)[:1000]
+            artifact.finished_at = timezone.now()
+            artifact.save(update_fields=["status", "error_message", "finished_at"])
+            return artifact
+
+        artifact.status = "ready"
+        artifact.size_bytes = artifact.file.size
+        artifact.finished_at = artifact.last_accessed_at = timezone.now()
+        artifact.save()
+        logger.info(
+            "Report %s built: %s %s (%d bytes)",
+            artifact.pk, project.code, artifact.report_format, artifact.size_bytes,
+        )
+
+        # El fingerprint cambio: las versiones anteriores no se volveran a pedir
+        cls._delete(
+            ReportArtifact.objects.filter(
+                project=project, report_format=artifact.report_format
+            )
+            .exclude(pk=artifact.pk)
+            .exclude(status__in=IN_FLIGHT)
+        )
+        cls.evict(keep=artifact.pk)
+        return artifact
+
+    @staticmethod
+    def open(artifact: ReportArtifact) -> IO[bytes]:
+        """Abrir el archivo para descarga y marcar el acceso (LRU)."""
+        ReportArtifact.objects.filter(pk=artifact.pk).update(last_accessed_at=timezone.now())
+        return artifact.file.open("rb")
+
+    @classmethod
+    def evict(cls, keep: int | None = None) -> int:
+        """
+        Borrar los artefactos listos menos recientemente descargados que
+        excedan los limites de tamano total o de cantidad (keep: el recien
+        generado, que nunca se borra).
+
+        Returns:
+            Artefactos borrados.
+        """
+        total = 0
+        evicted: list[int] = []
+        ready = (
+            ReportArtifact.objects.filter(status="ready")
+            .order_by("-last_accessed_at", "-pk")
+            .values_list("pk", "size_bytes")
+        )
+        for position, (pk, size) in enumerate(ready, 1):
+            total += size
+            over = total > settings.REPORT_CACHE_MAX_BYTES or position > settings.REPORT_CACHE_MAX_FILES
+            if over and pk != keep:
+                evicted.append(pk)
+        if evicted:
+            logger.info("Evicting %d cached reports", len(evicted))
+        return cls._delete(ReportArtifact.objects.filter(pk__in=evicted))
+
+    @staticmethod
+    def _delete(artifacts: QuerySet[ReportArtifact]) -> int:
+        count = 0
+        for artifact in artifacts:
+            if artifact.file:
+                artifact.file.delete(save=False)
+            artifact.delete()
+            count += 1
+        return count
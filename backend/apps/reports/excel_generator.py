@@ -1,33 +1,70 @@
 import io
 from decimal import Decimal
+from typing import IO, Any
 
 from django.db.models import Sum
 from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
 
 from apps.finance.models import Project
-from apps.finance.services import TripleAxisService
+from apps.finance.services import FinancialRollupService, TripleAxisService
 
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
-def generate_project_excel(project: Project) -> bytes:
-    """
-    Genera un reporte Excel del proyecto con 4 hojas.
+# Time entries leidas de la BD por vuelta del cursor
+ENTRY_CHUNK_SIZE = 2000
 
-    Returns:
-        bytes del archivo XLSX generado.
+
+def _named_styles() -> list[NamedStyle]:
+    """Estilos compartidos: cada celda guarda el nombre, no una copia del estilo."""
+    return [
+        NamedStyle(
+            name="header",
+            font=Font(bold=True, size=11),
+            fill=PatternFill(start_color="F8FAFC", end_color="F8FAFC", fill_type="solid"),
+            alignment=Alignment(horizontal="center", vertical="center"),
+        ),
+        NamedStyle(name="label", font=Font(bold=True)),
+        NamedStyle(name="number", number_format="#,##0.00"),
+    ]
+
+
+def _styled(ws: WriteOnlyWorksheet, value: Any, style: str) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _create_sheet(
+    wb: Workbook, title: str, widths: list[int], headers: list[str] | None = None
+) -> WriteOnlyWorksheet:
+    """Hoja write-only; los anchos de columna deben fijarse antes de la primera fila."""
+    ws = wb.create_sheet(title)
+    for col, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    if headers:
+        ws.append([_styled(ws, header, "header") for header in headers])
+    return ws
+
+
+def write_project_excel(project: Project, output: str | IO[bytes]) -> None:
     """
-    wb = Workbook()
+    Escribe el reporte Excel del proyecto (4 hojas) en output, una ruta o
+    un archivo binario con seek.
 
-    # Styles
-    header_font = Font(bold=True, size=11)
-    header_fill = PatternFill(start_color="F8FAFC", end_color="F8FAFC", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    number_format = '#,##0.00'
+    Usa un Workbook write-only: las filas se vuelcan a disco al agregarse y
+    las time entries se leen con iterator(), asi la memoria no crece con el
+    tamano del proyecto.
+    """
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
 
     # --- Hoja 1: Resumen ---
-    ws = wb.active
-    ws.title = "Resumen"
+    ws = _create_sheet(wb, "Resumen", [22, 25])
 
     consumed_hours = TripleAxisService.calculate_consumed_hours(project)
     consumption_pct = TripleAxisService.calculate_consumption_percent(project)
@@ -54,94 +91,99 @@ def generate_project_excel(project: Project) -> bytes:
         ["Valor Ganado", float(earned_value)],
     ]
 
-    for row_idx, row_data in enumerate(summary_data, 1):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            if col_idx == 1:
-                cell.font = Font(bold=True)
-
-    ws.column_dimensions["A"].width = 22
-    ws.column_dimensions["B"].width = 25
+    for row_data in summary_data:
+        ws.append([_styled(ws, row_data[0], "label"), *row_data[1:]])
 
     # --- Hoja 2: Time Entries ---
-    ws2 = wb.create_sheet("Time Entries")
-    headers_te = ["Fecha", "Fase", "Rol", "Usuario", "Horas", "Costo"]
-
-    for col, header in enumerate(headers_te, 1):
-        cell = ws2.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-
-    entries = project.time_entries.order_by("-date").select_related("phase", "billing_role")
-
-    for row_idx, entry in enumerate(entries, 2):
-        ws2.cell(row=row_idx, column=1, value=entry.date)
-        ws2.cell(row=row_idx, column=2, value=entry.phase.name if entry.phase else "-")
-        ws2.cell(row=row_idx, column=3, value=entry.billing_role.role_name if entry.billing_role else "-")
-        ws2.cell(row=row_idx, column=4, value=entry.user_name)
-        cell_h = ws2.cell(row=row_idx, column=5, value=float(entry.duration_hours))
-        cell_h.number_format = number_format
-        cell_c = ws2.cell(row=row_idx, column=6, value=float(entry.cost))
-        cell_c.number_format = number_format
-
-    for col in range(1, 7):
-        ws2.column_dimensions[get_column_letter(col)].width = 18
+    ws2 = _create_sheet(
+        wb, "Time Entries", [18] * 6, ["Fecha", "Fase", "Rol", "Usuario", "Horas", "Costo"]
+    )
+
+    entries = (
+        project.time_entries.order_by("-date")
+        .values_list(
+            "date", "phase__name", "billing_role__role_name", "user_name", "duration_hours", "cost"
+        )
+        .iterator(chunk_size=ENTRY_CHUNK_SIZE)
+    )
+
+    for entry_date, phase_name, role_name, user_name, hours, cost in entries:
+        ws2.append([
+            entry_date,
+            phase_name or "-",
+            role_name or "-",
+            user_name,
+            _styled(ws2, float(hours), "number"),
+            _styled(ws2, float(cost), "number"),
+        ])
 
     # --- Hoja 3: Por Fase ---
-    ws3 = wb.create_sheet("Por Fase")
-    headers_phase = ["Fase", "Estimado (h)", "Real (h)", "Desviacion (h)", "Desviacion (%)"]
-
-    for col, header in enumerate(headers_phase, 1):
-        cell = ws3.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-
-    for row_idx, phase in enumerate(project.phases.all(), 2):
-        actual = (
-            phase.time_entries.aggregate(total=Sum("duration_hours"))["total"]
-            or Decimal("0")
-        )
+    ws3 = _create_sheet(
+        wb,
+        "Por Fase",
+        [18] * 5,
+        ["Fase", "Estimado (h)", "Real (h)", "Desviacion (h)", "Desviacion (%)"],
+    )
+
+    rollup = FinancialRollupService.get(project)
+    for phase in project.phases.all():
+        actual = FinancialRollupService.phase_hours(rollup, phase.id)
+        if actual is None:
+            actual = (
+                phase.time_entries.aggregate(total=Sum("duration_hours"))["total"]
+                or Decimal("0")
+            )
         deviation = actual - phase.estimated_hours
         deviation_pct = Decimal("0")
         if phase.estimated_hours > 0:
             deviation_pct = (deviation / phase.estimated_hours * 100).quantize(Decimal("0.01"))
 
-        ws3.cell(row=row_idx, column=1, value=phase.name)
-        ws3.cell(row=row_idx, column=2, value=float(phase.estimated_hours)).number_format = number_format
-        ws3.cell(row=row_idx, column=3, value=float(actual)).number_format = number_format
-        ws3.cell(row=row_idx, column=4, value=float(deviation)).number_format = number_format
-        ws3.cell(row=row_idx, column=5, value=float(deviation_pct)).number_format = number_format
-
-    for col in range(1, 6):
-        ws3.column_dimensions[get_column_letter(col)].width = 18
+        ws3.append([
+            phase.name,
+            *(
+                _styled(ws3, float(value), "number")
+                for value in (phase.estimated_hours, actual, deviation, deviation_pct)
+            ),
+        ])
 
     # --- Hoja 4: Historico ---
-    ws4 = wb.create_sheet("Historico")
-    headers_hist = ["Fecha", "Consumo (%)", "Progreso (%)", "Costo", "Valor Ganado", "Estado", "Score"]
-
-    for col, header in enumerate(headers_hist, 1):
-        cell = ws4.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-
-    snapshots = project.health_snapshots.order_by("-timestamp")
-
-    for row_idx, snap in enumerate(snapshots, 2):
-        ws4.cell(row=row_idx, column=1, value=snap.timestamp.strftime("%Y-%m-%d %H:%M"))
-        ws4.cell(row=row_idx, column=2, value=float(snap.consumption_percent)).number_format = number_format
-        ws4.cell(row=row_idx, column=3, value=float(snap.progress_percent)).number_format = number_format
-        ws4.cell(row=row_idx, column=4, value=float(snap.budget_consumed)).number_format = number_format
-        ws4.cell(row=row_idx, column=5, value=float(snap.earned_value)).number_format = number_format
-        ws4.cell(row=row_idx, column=6, value=snap.health_status)
-        ws4.cell(row=row_idx, column=7, value=snap.health_score)
-
-    for col in range(1, 8):
-        ws4.column_dimensions[get_column_letter(col)].width = 18
-
-    # Save to bytes
+    ws4 = _create_sheet(
+        wb,
+        "Historico",
+        [18] * 7,
+        ["Fecha", "Consumo (%)", "Progreso (%)", "Costo", "Valor Ganado", "Estado", "Score"],
+    )
+
+    snapshots = project.health_snapshots.order_by("-timestamp").iterator(
+        chunk_size=ENTRY_CHUNK_SIZE
+    )
+
+    for snap in snapshots:
+        ws4.append([
+            snap.timestamp.strftime("%Y-%m-%d %H:%M"),
+            *(
+                _styled(ws4, float(value), "number")
+                for value in (
+                    snap.consumption_percent,
+                    snap.progress_percent,
+                    snap.budget_consumed,
+                    snap.earned_value,
+                )
+            ),
+            snap.health_status,
+            snap.health_score,
+        ])
+
+    wb.save(output)
+
+
+def generate_project_excel(project: Project) -> bytes:
+    """
+    Genera un reporte Excel del proyecto con 4 hojas.
+
+    Returns:
+        bytes del archivo XLSX generado.
+    """
     buffer = io.BytesIO()
-    wb.save(buffer)
+    write_project_excel(project, buffer)
     return buffer.getvalue()
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.9 on 2026-10-18 14:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('finance', '0015_rate_card'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_format', models.CharField(choices=[('pdf', 'PDF'), ('xlsx', 'Excel')], max_length=10)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('file', models.FileField(blank=True, upload_to='reports/')),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, default='')),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_accessed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_artifacts', to='finance.project')),
+            ],
+            options={
+                'ordering': ['-requested_at'],
+                'indexes': [models.Index(fields=['status', 'last_accessed_at'], name='reports_rep_status_904527_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reportartifact',
+            constraint=models.UniqueConstraint(fields=('project', 'report_format', 'fingerprint'), name='unique_report_artifact'),
+        ),
+    ]
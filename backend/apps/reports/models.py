@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils import timezone
+
+from apps.finance.models import Project
+
+
+class ReportArtifact(models.Model):
+    """
+    Reporte generado en segundo plano (job) y cacheado en MEDIA_ROOT/reports.
+    Un artefacto por (proyecto, formato, fingerprint de datos): mientras el
+    proyecto no cambie, las descargas reutilizan el mismo archivo.
+    """
+
+    FORMAT_CHOICES = [
+        ("pdf", "PDF"),
+        ("xlsx", "Excel"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    ]
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="report_artifacts"
+    )
+    report_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    file = models.FileField(upload_to="reports/", blank=True)
+    size_bytes = models.BigIntegerField(default=0)
+    error_message = models.TextField(blank=True, default="")
+    requested_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-requested_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "report_format", "fingerprint"],
+                name="unique_report_artifact",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "last_accessed_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.project.code} | {self.report_format} | {self.fingerprint[:12]} | {self.status}"
@@ -6,7 +6,7 @@ from django.template.loader import render_to_string
 from weasyprint import HTML
 
 from apps.finance.models import Project
-from apps.finance.services import TripleAxisService
+from apps.finance.services import FinancialRollupService, TripleAxisService
 
 
 def generate_project_pdf(project: Project) -> bytes:
@@ -27,11 +27,14 @@ def generate_project_pdf(project: Project) -> bytes:
 
     # Phase comparison data
     phases_data = []
+    rollup = FinancialRollupService.get(project)
     for phase in project.phases.all():
-        actual = (
-            phase.time_entries.aggregate(total=Sum("duration_hours"))["total"]
-            or Decimal("0")
-        )
+        actual = FinancialRollupService.phase_hours(rollup, phase.id)
+        if actual is None:
+            actual = (
+                phase.time_entries.aggregate(total=Sum("duration_hours"))["total"]
+                or Decimal("0")
+            )
         phases_data.append(
             {
                 "name": phase.name,
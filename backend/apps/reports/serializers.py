@@ -0,0 +1,39 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import ReportArtifact
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    project_code = serializers.CharField(source="project.code", read_only=True)
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportArtifact
+        fields = [
+            "id",
+            "project",
+            "project_code",
+            "report_format",
+            "status",
+            "size_bytes",
+            "error_message",
+            "requested_at",
+            "finished_at",
+            "status_url",
+            "download_url",
+        ]
+
+    def _url(self, name: str, obj: ReportArtifact) -> str:
+        url = reverse(name, args=[obj.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def get_status_url(self, obj: ReportArtifact) -> str:
+        return self._url("reports:report-job", obj)
+
+    def get_download_url(self, obj: ReportArtifact) -> str | None:
+        if obj.status != "ready":
+            return None
+        return self._url("reports:report-job-download", obj)
@@ -0,0 +1,17 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_report(artifact_id):  # type: ignore[no-untyped-def]
+    """
+    Generar el archivo de un ReportArtifact pendiente (encolado por
+    POST /api/v1/reports/projects/{id}/jobs/) y aplicar la eviccion del cache.
+    """
+    from .artifact_service import ReportArtifactService
+
+    artifact = ReportArtifactService.build(artifact_id)
+    return {"artifact_id": artifact.pk, "status": artifact.status, "size_bytes": artifact.size_bytes}
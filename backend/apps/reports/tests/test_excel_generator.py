@@ -0,0 +1,101 @@
+import io
+from datetime import date
+from decimal import Decimal
+from tempfile import SpooledTemporaryFile
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
+
+from apps.finance.models import BillingRole, Phase, Project, TimeEntry
+from apps.reports.excel_generator import write_project_excel
+
+
+class ProjectExcelTest(TestCase):
+    """Tests del reporte XLSX write-only: contenido, estilos y lectura por cursor."""
+
+    def setUp(self) -> None:
+        self.project = Project.objects.create(
+            name="Reporte",
+            code="XLS-001",
+            client_name="Acme Corp",
+            budget_hours=Decimal("100.00"),
+            client_invoice_amount=Decimal("10000.00"),
+            target_margin=Decimal("30.00"),
+        )
+        phase = Phase.objects.create(
+            project=self.project, name="Dev", estimated_hours=Decimal("10.00")
+        )
+        role = BillingRole.objects.create(role_name="Dev", default_hourly_rate=Decimal("500.00"))
+        TimeEntry.objects.bulk_create([
+            TimeEntry(
+                clockify_id=f"xls-{i}",
+                project=self.project,
+                phase=phase if i % 2 else None,
+                billing_role=role if i % 2 else None,
+                user_name=f"User {i}",
+                user_email=f"user{i}@test.com",
+                duration_hours=Decimal("1.50"),
+                cost=Decimal("750.00"),
+                date=date(2026, 1, 1 + i),
+            )
+            for i in range(5)
+        ])
+
+    def _workbook(self):
+        buffer = io.BytesIO()
+        write_project_excel(self.project, buffer)
+        buffer.seek(0)
+        return load_workbook(buffer)
+
+    def test_sheets_and_rows(self) -> None:
+        wb = self._workbook()
+
+        self.assertEqual(wb.sheetnames, ["Resumen", "Time Entries", "Por Fase", "Historico"])
+        rows = list(wb["Time Entries"].iter_rows(values_only=True))
+        self.assertEqual(rows[0], ("Fecha", "Fase", "Rol", "Usuario", "Horas", "Costo"))
+        self.assertEqual(len(rows), 6)
+        first_date, phase, role, user, hours, cost = rows[1]
+        self.assertEqual(first_date.date(), date(2026, 1, 5))
+        self.assertEqual((phase, role, user, hours, cost), ("-", "-", "User 4", 1.5, 750.0))
+        self.assertEqual(rows[2][1:3], ("Dev", "Dev"))
+        self.assertEqual(
+            list(wb["Por Fase"].iter_rows(min_row=2, values_only=True)),
+            [("Dev", 10.0, 3.0, -7.0, -70.0)],
+        )
+        self.assertEqual(wb["Resumen"]["B2"].value, "XLS-001")
+
+    def test_named_styles_and_widths(self) -> None:
+        wb = self._workbook()
+        ws = wb["Time Entries"]
+
+        self.assertEqual(ws["A1"].style, "header")
+        self.assertTrue(ws["A1"].font.bold)
+        self.assertEqual(ws["F2"].style, "number")
+        self.assertEqual(ws["F2"].number_format, "#,##0.00")
+        self.assertEqual(wb["Resumen"]["A1"].style, "label")
+        self.assertEqual(wb["Resumen"].column_dimensions["A"].width, 22)
+
+    def test_query_count_independent_of_entry_count(self) -> None:
+        def run() -> int:
+            with CaptureQueriesContext(connection) as queries:
+                with SpooledTemporaryFile() as output:
+                    write_project_excel(self.project, output)
+            return len(queries)
+
+        before = run()
+        TimeEntry.objects.bulk_create([
+            TimeEntry(
+                clockify_id=f"xls-extra-{i}",
+                project=self.project,
+                user_name="Extra",
+                user_email="extra@test.com",
+                duration_hours=Decimal("1.00"),
+                cost=Decimal("500.00"),
+                date=date(2026, 2, 1),
+            )
+            for i in range(50)
+        ])
+
+        self.assertEqual(run(), before)
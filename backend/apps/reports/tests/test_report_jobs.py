@@ -0,0 +1,176 @@
+import io
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Organization, UserProfile
+from apps.finance.models import Project, TimeEntry
+from apps.finance.services import (
+    FinancialRollupService,
+    RollupDelta,
+    TimeEntryUpsertService,
+)
+from apps.reports.models import ReportArtifact
+from apps.reports.tasks import generate_report
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="report-jobs-")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReportJobTest(TestCase):
+    """Tests de jobs de reportes: encolado, cache por fingerprint y eviccion LRU."""
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.projects = [
+            Project.objects.create(
+                name=f"Proyecto {i}",
+                code=f"JOB-{i}",
+                client_name="Acme Corp",
+                budget_hours=Decimal("100.00"),
+                client_invoice_amount=Decimal("10000.00"),
+                target_margin=Decimal("30.00"),
+            )
+            for i in range(3)
+        ]
+        self.appix = Organization.objects.create(
+            name="Appix", slug="appix", org_type=Organization.OrgType.INTERNAL
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self._user("director", "DIRECTOR", self.appix))
+
+    @staticmethod
+    def _user(username: str, role: str, organization: Organization) -> User:
+        user = User.objects.create_user(username, f"{username}@test.com", "x")
+        UserProfile.objects.create(user=user, organization=organization, role=role)
+        return user
+
+    def _post(self, project: Project, report_format: str = "xlsx") -> tuple[int, dict, list]:
+        with patch("apps.reports.tasks.generate_report.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    f"/api/v1/reports/projects/{project.id}/jobs/",
+                    {"format": report_format},
+                    format="json",
+                )
+        return response.status_code, response.data, [c.args[0] for c in delay.call_args_list]
+
+    def _run(self, project: Project) -> dict:
+        """POST + ejecutar el task encolado, como lo haria el worker."""
+        _, data, enqueued = self._post(project)
+        for artifact_id in enqueued:
+            generate_report.apply(args=[artifact_id])
+        return data
+
+    def _add_entry(self, project: Project) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            delta = RollupDelta()
+            TimeEntryUpsertService.upsert(
+                [
+                    TimeEntry(
+                        clockify_id=f"job-{project.code}-{TimeEntry.objects.count()}",
+                        project=project,
+                        user_name="Dev",
+                        user_email="dev@test.com",
+                        duration_hours=Decimal("2.00"),
+                        cost=Decimal("1000.00"),
+                        date=date(2026, 1, 5),
+                    )
+                ],
+                delta,
+            )
+            FinancialRollupService.apply_delta(delta)
+
+    def test_enqueue_poll_download_and_reuse(self) -> None:
+        code, data, enqueued = self._post(self.projects[0])
+        self.assertEqual((code, data["status"], data["download_url"]), (202, "pending", None))
+        self.assertEqual(enqueued, [data["id"]])
+
+        pending = self.client.get(f"/api/v1/reports/jobs/{data['id']}/download/")
+        self.assertEqual(pending.status_code, 409)
+
+        generate_report.apply(args=[data["id"]])
+        status = self.client.get(f"/api/v1/reports/jobs/{data['id']}/", {"wait": "5"}).data
+        self.assertEqual(status["status"], "ready")
+        self.assertTrue(status["download_url"].endswith(f"/api/v1/reports/jobs/{data['id']}/download/"))
+
+        response = self.client.get(f"/api/v1/reports/jobs/{data['id']}/download/")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="reporte-JOB-0.xlsx"')
+        self.assertEqual(load_workbook(io.BytesIO(content)).sheetnames[0], "Resumen")
+
+        # Sin cambios en el proyecto: mismo artefacto, sin encolar
+        code, again, enqueued = self._post(self.projects[0])
+        self.assertEqual((code, again["id"], enqueued), (200, data["id"], []))
+
+    def test_data_change_builds_new_artifact_and_drops_old(self) -> None:
+        first = self._run(self.projects[0])
+        old_file = ReportArtifact.objects.get(pk=first["id"]).file.path
+
+        self._add_entry(self.projects[0])
+        second = self._run(self.projects[0])
+
+        self.assertNotEqual(first["id"], second["id"])
+        self.assertEqual(list(ReportArtifact.objects.values_list("pk", flat=True)), [second["id"]])
+        with self.assertRaises(FileNotFoundError):
+            open(old_file, "rb")
+
+    @override_settings(REPORT_CACHE_MAX_FILES=2)
+    def test_lru_eviction(self) -> None:
+        first, second = self._run(self.projects[0]), self._run(self.projects[1])
+        self.client.get(f"/api/v1/reports/jobs/{first['id']}/download/")
+
+        third = self._run(self.projects[2])
+
+        self.assertEqual(
+            set(ReportArtifact.objects.values_list("pk", flat=True)), {first["id"], third["id"]}
+        )
+        self.assertFalse(ReportArtifact.objects.filter(pk=second["id"]).exists())
+
+    def test_failed_job_is_enqueued_again(self) -> None:
+        with (
+            patch("apps.reports.artifact_service.write_project_excel", side_effect=RuntimeError("boom")),
+            self.assertLogs("apps.reports.artifact_service", "ERROR"),
+        ):
+            failed = self._run(self.projects[0])
+        artifact = ReportArtifact.objects.get(pk=failed["id"])
+        self.assertEqual((artifact.status, artifact.error_message), ("failed", "boom"))
+
+        code, data, enqueued = self._post(self.projects[0])
+
+        self.assertEqual((code, data["status"], enqueued), (202, "pending", [failed["id"]]))
+
+    def test_invalid_format(self) -> None:
+        code, _, enqueued = self._post(self.projects[0], "docx")
+
+        self.assertEqual((code, enqueued), (400, []))
+
+    def test_jobs_scoped_to_visible_projects(self) -> None:
+        job = self._run(self.projects[0])
+        job_urls = [f"/api/v1/reports/jobs/{job['id']}/", f"/api/v1/reports/jobs/{job['id']}/download/"]
+
+        # PM sin asignaciones: no ve el proyecto ni sus jobs
+        self.client.force_authenticate(self._user("pm", "PM", self.appix))
+        code, _, enqueued = self._post(self.projects[0])
+        self.assertEqual((code, enqueued), (404, []))
+        self.assertEqual([self.client.get(url).status_code for url in job_urls], [404, 404])
+
+        # CLIENT: los reportes incluyen costo real
+        client_org = Organization.objects.create(name="Acme", slug="acme")
+        self.projects[0].client_org = client_org
+        self.projects[0].save()
+        self.client.force_authenticate(self._user("client", "CLIENT", client_org))
+        code, _, enqueued = self._post(self.projects[0])
+        self.assertEqual((code, enqueued), (403, []))
+        self.assertEqual([self.client.get(url).status_code for url in job_urls], [403, 403])
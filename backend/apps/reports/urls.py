@@ -15,4 +15,19 @@ urlpatterns = [
         views.export_project_excel,
         name="project-excel",
     ),
+    path(
+        "projects/<int:project_id>/jobs/",
+        views.create_report_job,
+        name="project-report-job",
+    ),
+    path(
+        "jobs/<int:job_id>/",
+        views.report_job_status,
+        name="report-job",
+    ),
+    path(
+        "jobs/<int:job_id>/download/",
+        views.download_report_job,
+        name="report-job-download",
+    ),
 ]
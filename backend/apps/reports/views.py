@@ -1,12 +1,41 @@
-from django.http import HttpResponse
+import time
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
+from rest_framework.response import Response
 
+from apps.accounts.permissions import HasUserProfile
+from apps.accounts.querysets import get_projects_for_user
 from apps.finance.models import Project
+from apps.finance.views import _is_client
 
-from .excel_generator import generate_project_excel
+from .artifact_service import CONTENT_TYPES, IN_FLIGHT, ReportArtifactService
+from .excel_generator import XLSX_CONTENT_TYPE, write_project_excel
+from .models import ReportArtifact
 from .pdf_generator import generate_project_pdf
+from .serializers import ReportJobSerializer
+
+# Reportes mas chicos se quedan en memoria; los grandes pasan a disco
+EXCEL_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Intervalo de consulta del long-poll de estado
+JOB_POLL_INTERVAL = 0.5
+
+FORBIDDEN = {"detail": "No tiene permisos para ver datos financieros."}
+
+
+def _visible_jobs(request: Request) -> QuerySet[ReportArtifact]:
+    """Jobs de los proyectos que el usuario puede ver."""
+    return ReportArtifact.objects.select_related("project").filter(
+        project__in=get_projects_for_user(request.user).values("pk")
+    )
 
 
 @api_view(["GET"])
@@ -25,16 +54,98 @@ def export_project_pdf(request: Request, project_id: int) -> HttpResponse:
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
-def export_project_excel(request: Request, project_id: int) -> HttpResponse:
-    """GET /api/v1/reports/projects/{id}/excel/ -> Descarga XLSX."""
+def export_project_excel(request: Request, project_id: int) -> FileResponse:
+    """
+    GET /api/v1/reports/projects/{id}/excel/ -> Descarga XLSX.
+
+    El archivo se escribe en un temporal con spool y se envia por bloques
+    (FileResponse), sin armar la respuesta completa en memoria.
+    """
     project = Project.objects.get(pk=project_id)
-    excel_bytes = generate_project_excel(project)
+    output = SpooledTemporaryFile(max_size=EXCEL_SPOOL_MAX_SIZE)
+    write_project_excel(project, output)
+    output.seek(0)
 
-    response = HttpResponse(
-        excel_bytes,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"reporte-{project.code}.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
     )
-    response["Content-Disposition"] = (
-        f'attachment; filename="reporte-{project.code}.xlsx"'
+
+
+@api_view(["POST"])
+@permission_classes([HasUserProfile])
+def create_report_job(request: Request, project_id: int) -> Response:
+    """
+    POST /api/v1/reports/projects/{id}/jobs/ {"format": "pdf"|"xlsx"}
+
+    Encola la generacion del reporte (202). Si ya hay un artefacto para los
+    datos actuales del proyecto responde 200 con su download_url.
+    """
+    # Los reportes incluyen costo real: fuera del alcance de CLIENT
+    if _is_client(request.user):
+        return Response(FORBIDDEN, status=status.HTTP_403_FORBIDDEN)
+
+    project = get_object_or_404(get_projects_for_user(request.user), pk=project_id)
+    report_format = request.data.get("format", "pdf")
+    if report_format not in CONTENT_TYPES:
+        return Response(
+            {"detail": f"Formato invalido. Opciones: {', '.join(CONTENT_TYPES)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    artifact = ReportArtifactService.request(project, report_format)
+    return Response(
+        ReportJobSerializer(artifact, context={"request": request}).data,
+        status=status.HTTP_200_OK if artifact.status == "ready" else status.HTTP_202_ACCEPTED,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([HasUserProfile])
+def report_job_status(request: Request, job_id: int) -> Response:
+    """
+    GET /api/v1/reports/jobs/{id}/?wait=N -> Estado del job.
+
+    Sin wait responde de inmediato (polling). Con wait espera a que el job
+    termine hasta REPORT_JOB_MAX_WAIT_SECONDS (pocos segundos: la espera
+    ocupa el worker del request).
+    """
+    if _is_client(request.user):
+        return Response(FORBIDDEN, status=status.HTTP_403_FORBIDDEN)
+
+    artifact = get_object_or_404(_visible_jobs(request), pk=job_id)
+    try:
+        wait = min(float(request.query_params.get("wait", 0)), settings.REPORT_JOB_MAX_WAIT_SECONDS)
+    except ValueError:
+        wait = 0
+
+    deadline = time.monotonic() + wait
+    while artifact.status in IN_FLIGHT and time.monotonic() < deadline:
+        time.sleep(JOB_POLL_INTERVAL)
+        artifact.refresh_from_db(fields=["status", "size_bytes", "error_message", "finished_at"])
+
+    return Response(ReportJobSerializer(artifact, context={"request": request}).data)
+
+
+@api_view(["GET"])
+@permission_classes([HasUserProfile])
+def download_report_job(request: Request, job_id: int) -> FileResponse | Response:
+    """GET /api/v1/reports/jobs/{id}/download/ -> Archivo del job terminado."""
+    if _is_client(request.user):
+        return Response(FORBIDDEN, status=status.HTTP_403_FORBIDDEN)
+
+    artifact = get_object_or_404(_visible_jobs(request), pk=job_id)
+    if artifact.status != "ready":
+        return Response(
+            {"detail": "El reporte aun no esta listo.", "status": artifact.status},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    return FileResponse(
+        ReportArtifactService.open(artifact),
+        as_attachment=True,
+        filename=f"reporte-{artifact.project.code}.{artifact.report_format}",
+        content_type=CONTENT_TYPES[artifact.report_format],
     )
-    return response
@@ -126,6 +126,35 @@ REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": True,
 }
 
+# Cache (Redis): ceo_dashboard payloads (apps.finance.dashboard_cache) and rates
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("CACHE_URL", default="redis://redis:6379/2"),
+    }
+}
+CEO_DASHBOARD_CACHE_TTL = config("CEO_DASHBOARD_CACHE_TTL", default=900, cast=int)
+# Serve an outdated payload immediately and recompute it in Celery
+CEO_DASHBOARD_STALE_WHILE_REVALIDATE = config(
+    "CEO_DASHBOARD_STALE_WHILE_REVALIDATE", default=False, cast=bool
+)
+CEO_DASHBOARD_STALE_TTL = config("CEO_DASHBOARD_STALE_TTL", default=86400, cast=int)
+# Effective hourly rates (apps.finance.services.RateService); versioned, so
+# the TTL only bounds memory
+RATE_CACHE_TTL = config("RATE_CACHE_TTL", default=86400, cast=int)
+
+# Background report jobs (apps.reports.artifact_service): artifacts cached in
+# MEDIA_ROOT/reports by project + data fingerprint, least recently downloaded
+# evicted first once either limit is exceeded
+REPORT_CACHE_MAX_BYTES = config("REPORT_CACHE_MAX_BYTES", default=512 * 1024 * 1024, cast=int)
+REPORT_CACHE_MAX_FILES = config("REPORT_CACHE_MAX_FILES", default=500, cast=int)
+# A pending/running job older than this is assumed lost and enqueued again
+REPORT_JOB_TIMEOUT_SECONDS = config("REPORT_JOB_TIMEOUT_SECONDS", default=600, cast=int)
+# Upper bound for ?wait= (long-poll) on the job status endpoint. The wait
+# sleeps inside the request and holds a sync gunicorn worker, so keep it to a
+# few seconds; clients should re-poll rather than wait for the whole job
+REPORT_JOB_MAX_WAIT_SECONDS = config("REPORT_JOB_MAX_WAIT_SECONDS", default=3, cast=int)
+
 # Celery
 CELERY_BROKER_URL = config("CELERY_BROKER_URL", default="redis://redis:6379/0")
 CELERY_RESULT_BACKEND = config("CELERY_RESULT_BACKEND", default="redis://redis:6379/1")
@@ -149,16 +178,53 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": 3600.0,
         "options": {"countdown": 600},  # 10 min after clockify
     },
+    "compact-health-snapshots": {
+        "task": "apps.integrations.tasks.compact_health_snapshots",
+        "schedule": 86400.0,  # Daily retention tiers for HealthSnapshot
+    },
+    "jira-mirror-full-refresh": {
+        "task": "apps.integrations.tasks.refresh_jira_issue_mirror",
+        "schedule": 86400.0,  # Daily: picks up deleted/moved issues
+        "kwargs": {"full": True},
+    },
 }
 
 # External Integrations
 CLOCKIFY_API_KEY = config("CLOCKIFY_API_KEY", default="")
 CLOCKIFY_WORKSPACE_ID = config("CLOCKIFY_WORKSPACE_ID", default="")
 CLOCKIFY_BASE_URL = "https://api.clockify.me/api/v1"
+CLOCKIFY_REPORTS_URL = "https://reports.api.clockify.me/v1"
+# Backfills (no previous sync, or a gap longer than CLOCKIFY_BACKFILL_AFTER_DAYS)
+# use the workspace-wide detailed report instead of per-user requests
+CLOCKIFY_BACKFILL_START = config("CLOCKIFY_BACKFILL_START", default="2025-01-01")
+CLOCKIFY_BACKFILL_AFTER_DAYS = config("CLOCKIFY_BACKFILL_AFTER_DAYS", default=7, cast=int)
+# Concurrent per-user fetch; 1 disables the worker pool
+CLOCKIFY_SYNC_WORKERS = config("CLOCKIFY_SYNC_WORKERS", default=4, cast=int)
+# Clockify allows 50 requests/second per workspace with an API key
+CLOCKIFY_REQUESTS_PER_SECOND = config("CLOCKIFY_REQUESTS_PER_SECOND", default=50, cast=float)
+CLOCKIFY_MAX_RETRIES = config("CLOCKIFY_MAX_RETRIES", default=5, cast=int)
 
 JIRA_BASE_URL = config("JIRA_BASE_URL", default="")
 JIRA_API_TOKEN = config("JIRA_API_TOKEN", default="")
 JIRA_USER_EMAIL = config("JIRA_USER_EMAIL", default="")
+# Parallel requests for the batched progress refresh
+JIRA_MAX_WORKERS = config("JIRA_MAX_WORKERS", default=8, cast=int)
+# Health evaluation reuses the progress stored by sync_jira_progress while fresh
+JIRA_PROGRESS_TTL_SECONDS = config("JIRA_PROGRESS_TTL_SECONDS", default=1800, cast=int)
+
+# HealthSnapshot retention: hourly for N days, then last-of-day up to M days,
+# then last-of-week (see HealthSnapshotRetentionService)
+HEALTH_SNAPSHOT_HOURLY_DAYS = config("HEALTH_SNAPSHOT_HOURLY_DAYS", default=14, cast=int)
+HEALTH_SNAPSHOT_DAILY_DAYS = config("HEALTH_SNAPSHOT_DAILY_DAYS", default=365, cast=int)
+
+# Opt-in: hourly evaluation only writes a new HealthSnapshot when the status
+# changes, consumption/progress move more than the epsilon (percentage points)
+# or the actual cost moves more than epsilon percent of the previous
+# snapshot's; otherwise it extends the previous snapshot's valid_until
+HEALTH_SNAPSHOT_DEDUPE = config("HEALTH_SNAPSHOT_DEDUPE", default=False, cast=bool)
+HEALTH_SNAPSHOT_DEDUPE_EPSILON = config(
+    "HEALTH_SNAPSHOT_DEDUPE_EPSILON", default="0.10", cast=Decimal
+)
 
 # Financial precision constant
 DECIMAL_QUANTIZE = Decimal("0.01")